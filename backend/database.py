@@ -1,13 +1,145 @@
-from sqlalchemy import create_engine
+"""
+Engines and sessions.
+
+`DATABASE_URL` selects the database. The default is the SQLite file
+`backend_db.sqlite3` at the repository root, resolved to an absolute path so
+it does not move with the working directory.
+
+- SQLite connections run in WAL mode with synchronous=NORMAL, a memory map
+  and a larger page cache, so readers do not block on a writer's commit and
+  commits skip the per-transaction fsync of the rollback journal. File
+  databases keep a connection pool (SQLAlchemy 1.4 would open a connection
+  per session), so the page cache and map survive between requests.
+- PostgreSQL (``postgresql://``; ``postgres://`` is accepted) uses a
+  pre-pinged, recycled pool. It needs psycopg2 (sync) and asyncpg (async).
+
+Pools are sized by `DB_POOL_SIZE` and `DB_MAX_OVERFLOW` per engine.
+"""
+import os
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
-DATABASE_URL = "sqlite:///./backend_db.sqlite3"
+_DEFAULT_SQLITE_PATH = Path(__file__).resolve().parent.parent / "backend_db.sqlite3"
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# SQLite tuning.
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_MB = int(os.environ.get("SQLITE_CACHE_MB", "64"))
+SQLITE_MMAP_MB = int(os.environ.get("SQLITE_MMAP_MB", "256"))
+
+# Connection pools (file SQLite and PostgreSQL).
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT_S = float(os.environ.get("DB_POOL_TIMEOUT_S", "10"))
+DB_POOL_RECYCLE_S = int(os.environ.get("DB_POOL_RECYCLE_S", "1800"))
+
+
+def database_url(raw=None) -> str:
+    url = raw or os.environ.get("DATABASE_URL") or f"sqlite:///{_DEFAULT_SQLITE_PATH}"
+    if url.startswith("postgres://"):
+        # Heroku/Render style scheme; SQLAlchemy only knows "postgresql".
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def async_database_url(url: str) -> str:
+    """The same database through an asyncio driver."""
+    parsed = make_url(url)
+    driver = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}.get(
+        parsed.get_backend_name()
+    )
+    if driver is None:
+        raise ValueError(f"No async driver configured for '{parsed.drivername}'")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def _engine_options(url: str, async_driver: bool = False) -> dict:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        if parsed.database in (None, "", ":memory:"):
+            return {} if async_driver else {"connect_args": {"check_same_thread": False}}
+        options = {
+            "poolclass": AsyncAdaptedQueuePool if async_driver else QueuePool,
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT_S,
+        }
+        if not async_driver:
+            options["connect_args"] = {"check_same_thread": False}
+        return options
+    if backend == "postgresql":
+        return {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT_S,
+            "pool_recycle": DB_POOL_RECYCLE_S,
+            "pool_pre_ping": True,
+        }
+    return {}
+
+
+def make_engine(url: str):
+    """Sync engine for `url` with the per-backend settings above."""
+    engine_out = create_engine(url, **_engine_options(url))
+    if engine_out.dialect.name == "sqlite":
+        event.listen(engine_out, "connect", _sqlite_pragmas)
+    return engine_out
+
+
+def make_async_engine(url: str):
+    """Async engine for `url` (a sync URL; the driver is swapped in)."""
+    engine_out = create_async_engine(async_database_url(url), **_engine_options(url, True))
+    if engine_out.dialect.name == "sqlite":
+        event.listen(engine_out.sync_engine, "connect", _sqlite_pragmas)
+    return engine_out
+
+
+DATABASE_URL = database_url()
+
+engine = make_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine on the same database for request handlers that should not
+# hold a worker thread while they wait on I/O.
+ASYNC_DATABASE_URL = async_database_url(DATABASE_URL)
+async_engine = make_async_engine(DATABASE_URL)
+AsyncSessionLocal = sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 Base = declarative_base()
 
 def init_db(engine_in=engine):
     Base.metadata.create_all(bind=engine_in)
+    # create_all skips columns and indexes of tables that already exist; add
+    # missing nullable columns and missing indexes.
+    existing = inspect(engine_in)
+    with engine_in.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            present = {column["name"] for column in existing.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in present and column.nullable:
+                    column_type = column.type.compile(dialect=engine_in.dialect)
+                    connection.execute(
+                        text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}')
+                    )
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine_in, checkfirst=True)
@@ -1,16 +1,69 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, File, HTTPException, Query, Request, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
+import asyncio
+import json
 import os
 from pathlib import Path
+from typing import Optional
 
 from backend import models
 from backend import schemas
-from backend.database import SessionLocal, engine, init_db
-from backend.services.priority_calculator import calculate_priority, priority_to_zone
-from backend.services.ai_client import ask_ai_for_plan
-from backend.services.layout_builder import generate_layout
+from backend.database import AsyncSessionLocal, SessionLocal, async_engine, engine, init_db
+from backend.services.priority_calculator import active_formula, calculate_priority, priority_to_zone
+from backend.services.affinity import AFFINITY, affinity_layout, iter_csv_orders
+from backend.services.ai_client import get_plan_cache
+from backend.services.calibration import CALIBRATOR
+from backend.services.layout_builder import load_warehouse
+from backend.services.jobs import (
+    JOBS,
+    JobQueueFull,
+    apply_job,
+    get_job,
+    is_finished,
+    job_result,
+    job_summary,
+    list_jobs,
+    recover_interrupted,
+    sse_events,
+)
+from backend.services.layout_cache import cached_layout, current_etag, get_layout
+from backend.services.live_layout import LIVE_LAYOUT
+from backend.services.metric_history import METRIC_HISTORY
+from backend.services.metric_scaling import check_drift, load_active_scale, normalization_status
+from backend.services.move_planner import plan_relocation
+from backend.services.normalization import prepare_metrics
+from backend.services.optimizer import optimize_layout_async
+from backend.services.rack_model import grid_summary, slot_grid, slot_layout
+from backend.services.rule_engine import validate_rules
+from backend.services.scenarios import evaluate_scenarios
+from backend.services.scoring import (
+    activate_profile,
+    active_profile,
+    create_profile,
+    interrupted_recompute,
+    list_profiles,
+    load_active_profile,
+    profile_summary,
+    queue_recompute,
+    scoring_status,
+    update_profile,
+)
+from backend.services.slot_solver import solve_layout
+from backend.services.travel_sim import run_evaluation
+from backend.services.sku_import import (
+    IMPORT_CHUNK_SIZE,
+    SUPPORTED_FORMATS,
+    detect_format,
+    import_stream,
+)
+from backend.services.sku_ingest import upsert_skus
+from backend.services.sku_query import MAX_PAGE_SIZE, parse_fields
+from backend.services.sku_store import SKU_STORE
 
 # Load environment variables from .env file
 # Get the backend directory path
@@ -43,14 +96,40 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
 @app.on_event("startup")
 def startup_event():
     # create tables
     init_db()
+    with SessionLocal() as db:
+        interrupted = recover_interrupted(db)
+        load_active_profile(db)
+        load_active_scale(db)
+        SKU_STORE.ensure_loaded(db)
+        METRIC_HISTORY.ensure_loaded(db)
+        CALIBRATOR.recalibrate(db)
+        resume_profile = interrupted_recompute(db)
+        if resume_profile is not None:
+            queue_recompute(db, resume_profile, lambda params: JOBS.submit("rescore", params))
+            print(f"[SCORING] Resuming the recompute of profile {resume_profile}")
+    if interrupted:
+        print(f"[JOBS] Marked {interrupted} interrupted jobs as failed")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    JOBS.shutdown()
+    with SessionLocal() as db:
+        METRIC_HISTORY.flush(db)
+    await async_engine.dispose()
 
 
 @app.get("/")
-def root():
+async def root():
     """Health check endpoint for Railway"""
     return {
         "status": "ok",
@@ -60,15 +139,21 @@ def root():
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
 
 @app.post("/api/sku/add", response_model=schemas.SKUItemOut)
 def add_sku(item: schemas.SKUCreate, db: Session = Depends(get_db)):
+    try:
+        metrics = prepare_metrics(item.dict(), item.normalized)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
     # compute priority and zone
-    pr = calculate_priority(item.f, item.w, item.s, item.i)
+    formula = active_formula()
+    pr = calculate_priority(metrics["f"], metrics["w"], metrics["s"], metrics["i"])
     zone = priority_to_zone(pr)
 
     # check existing
@@ -77,71 +162,671 @@ def add_sku(item: schemas.SKUCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="SKU code already exists")
 
     db_item = models.SKUItem(
-        sku_code=item.sku_code,
-        product_name=item.product_name,
-        f=item.f,
-        w=item.w,
-        s=item.s,
-        i=item.i,
+        **metrics,
         priority=pr,
         zone=zone,
+        profile_id=formula["profile_id"],
+        profile_version=formula["profile_version"],
     )
     db.add(db_item)
     db.commit()
     db.refresh(db_item)
+    LIVE_LAYOUT.record_saved(db_item)
+    METRIC_HISTORY.record_saved(db, db_item)
+    _after_sku_write(db)
     return db_item
 
 
-@app.get("/api/sku/list", response_model=list[schemas.SKUItemOut])
-def list_skus(db: Session = Depends(get_db)):
-    items = db.query(models.SKUItem).order_by(models.SKUItem.priority.desc()).all()
-    return items
+@app.post("/api/sku/bulk", response_model=schemas.SKUBulkResponse)
+def bulk_add_skus(request: schemas.SKUBulkRequest, db: Session = Depends(get_db)):
+    try:
+        rows = [prepare_metrics(item.dict(), item.normalized) for item in request.items]
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    results = upsert_skus(db, rows, on_conflict=request.on_conflict)
+    statuses = [entry["status"] for entry in results]
+    # upsert_skus scored the rows in place; write the applied ones through.
+    applied = [row for row, entry in zip(rows, results) if entry["status"] in ("created", "updated")]
+    LIVE_LAYOUT.record_bulk_write(db, applied)
+    METRIC_HISTORY.record_rows(db, applied)
+    _after_sku_write(db)
+    print(f"[BULK] {len(results)} rows processed")
+    return {
+        "created": statuses.count("created"),
+        "updated": statuses.count("updated"),
+        "skipped": statuses.count("skipped"),
+        "duplicates": statuses.count("duplicate"),
+        "failed": statuses.count("error"),
+        "results": results,
+    }
+
+
+@app.post("/api/sku/import", response_model=schemas.SKUImportResponse)
+def import_skus(
+    file: UploadFile = File(...),
+    format: str = Query(default=None, description="csv or ndjson; detected from the filename if omitted"),
+    offset: int = Query(default=0, ge=0, description="Records to skip, for resuming an import"),
+    chunk_size: int = Query(default=IMPORT_CHUNK_SIZE, ge=1, le=10000),
+    on_conflict: str = Query(default="update", regex="^(update|skip)$"),
+    normalized: bool = Query(default=False, description="Metrics are already within 0..1"),
+    db: Session = Depends(get_db),
+):
+    fmt = (format or detect_format(file.filename)).lower()
+    if fmt not in SUPPORTED_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}'")
+
+    def report(stats):
+        if stats["chunks"] % 10:
+            return
+        print(
+            f"[IMPORT] {file.filename}: next_offset={stats['next_offset']} "
+            f"created={stats['created']} updated={stats['updated']} "
+            f"invalid={stats['invalid']} ({stats['rows_per_s']:.0f} rows/s)"
+        )
+
+    try:
+        return import_stream(
+            db,
+            file.file,
+            fmt,
+            offset=offset,
+            chunk_size=chunk_size,
+            on_conflict=on_conflict,
+            normalized=normalized,
+            progress=report,
+        )
+    finally:
+        LIVE_LAYOUT.record_bulk_write()
+        _after_sku_write(db)
+
+
+def _parse_zones(zone: Optional[str]):
+    return [z.strip().upper() for z in zone.split(",") if z.strip()] if zone else None
+
+
+@app.get("/api/sku/list")
+async def list_skus(
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Page size; omit for all rows"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    zone: Optional[str] = Query(default=None, description="Zone or comma-separated zones, e.g. A,B"),
+    min_priority: Optional[float] = Query(default=None, ge=0.0, le=1.0),
+    max_priority: Optional[float] = Query(default=None, ge=0.0, le=1.0),
+    code_prefix: Optional[str] = Query(default=None, min_length=1),
+    fields: Optional[str] = Query(default=None, description="Comma-separated subset of SKU fields"),
+    session: AsyncSession = Depends(get_async_db),
+):
+    try:
+        columns = parse_fields(fields)
+        await SKU_STORE.ensure_loaded_async(session)
+        # Filtering and building the row dicts runs on a worker thread.
+        rows, next_cursor = await asyncio.to_thread(
+            SKU_STORE.list_rows,
+            None,
+            fields=columns,
+            limit=limit,
+            cursor=cursor,
+            zones=_parse_zones(zone),
+            min_priority=min_priority,
+            max_priority=max_priority,
+            code_prefix=code_prefix,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return JSONResponse(content=rows, headers=headers)
+
+
+@app.get("/api/sku/top")
+async def top_skus(
+    k: int = Query(default=10, ge=1, le=MAX_PAGE_SIZE),
+    zone: Optional[str] = Query(default=None, description="Limit to one zone"),
+    session: AsyncSession = Depends(get_async_db),
+):
+    await SKU_STORE.ensure_loaded_async(session)
+    return SKU_STORE.top(None, k, zone)
+
+
+@app.get("/api/sku/percentiles")
+async def sku_percentiles(
+    q: str = Query(default="0.1,0.25,0.5,0.75,0.9", description="Comma-separated quantiles, 0-1"),
+    zone: Optional[str] = Query(default=None, description="Zone or comma-separated zones; default all"),
+    session: AsyncSession = Depends(get_async_db),
+):
+    try:
+        qs = [float(value) for value in q.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="q must be comma-separated numbers")
+    if not qs or any(not 0.0 <= value <= 1.0 for value in qs):
+        raise HTTPException(status_code=400, detail="q values must be between 0 and 1")
+    await SKU_STORE.ensure_loaded_async(session)
+    return SKU_STORE.quantiles(None, qs, _parse_zones(zone))
+
+
+@app.get("/api/sku/{sku_code}/rank")
+async def sku_rank(sku_code: str, session: AsyncSession = Depends(get_async_db)):
+    await SKU_STORE.ensure_loaded_async(session)
+    try:
+        return SKU_STORE.rank(None, sku_code)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+
+@app.get("/api/sku/{sku_code}/history")
+def sku_history(sku_code: str, limit: int = Query(default=100, ge=1, le=5000), db: Session = Depends(get_db)):
+    try:
+        return METRIC_HISTORY.history(db, sku_code, limit=limit)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+
+@app.get("/api/sku/{sku_code}/trend")
+def sku_trend(sku_code: str, db: Session = Depends(get_db)):
+    try:
+        return METRIC_HISTORY.trend(db, sku_code)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+
+@app.get("/api/history/candidates")
+def reslot_candidates(
+    limit: int = Query(default=100, ge=1, le=10000),
+    direction: Optional[str] = Query(default=None, regex="^(promote|demote)$"),
+    db: Session = Depends(get_db),
+):
+    return METRIC_HISTORY.candidates(db, limit=limit, direction=direction)
+
+
+@app.get("/api/history/stats")
+def history_stats():
+    return METRIC_HISTORY.stats()
+
+
+def _build_visualize():
+    with SessionLocal() as db:
+        return get_layout(db, build=LIVE_LAYOUT.full_layout)
+
+
+def _sync_live_layout():
+    with SessionLocal() as db:
+        LIVE_LAYOUT.sync(db)
 
 
 @app.get("/api/sku/visualize")
-def visualize(db: Session = Depends(get_db)):
-    return generate_layout(db)
+async def visualize(request: Request):
+    # ETag checks and cache hits stay on the event loop; only a rebuild, or
+    # the periodic check for other processes' writes (which bumps the data
+    # version and so the ETag), takes a worker thread.
+    if SKU_STORE.recheck_due():
+        await run_in_threadpool(_sync_live_layout)
+    etag = current_etag()
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    cached = cached_layout()
+    body, etag = cached if cached is not None else await run_in_threadpool(_build_visualize)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+@app.get("/api/sku/layout/changes")
+def layout_changes(
+    since: Optional[int] = Query(default=None, ge=0, description="Data version the client already has"),
+    db: Session = Depends(get_db),
+):
+    return LIVE_LAYOUT.changes(db, since)
+
+
+@app.get("/api/sku/layout/affinity")
+def layout_affinity(db: Session = Depends(get_db)):
+    return affinity_layout(db)
+
+
+@app.get("/api/sku/layout/solve")
+def solve_slots(
+    mode: str = Query(default="zone", regex="^(zone|global)$"),
+    include_placements: bool = Query(default=True),
+    db: Session = Depends(get_db),
+):
+    result = solve_layout(db, mode=mode, include_placements=include_placements)
+    print(
+        f"[SOLVE] mode={mode} objective={result['objective']['solver']} "
+        f"banded={result['objective']['banded']} in {result['solve_ms']} ms"
+    )
+    return result
+
+
+@app.get("/api/slots/grid")
+def slots_grid():
+    return grid_summary(slot_grid())
+
+
+@app.get("/api/slots/layout")
+def slots_layout(
+    include_placements: bool = Query(default=True),
+    db: Session = Depends(get_db),
+):
+    result = slot_layout(db, include_placements=include_placements)
+    if result["overflow_count"]:
+        print(f"[SLOTS] {result['overflow_count']} SKUs did not fit their zone")
+    return result
+
+
+def _slot_origin(x_m, y_m, position_id, sku_code):
+    return {"x_m": x_m, "y_m": y_m, "position": position_id, "sku_code": sku_code}
+
+
+@app.get("/api/slots/nearest")
+def slots_nearest(
+    x_m: Optional[float] = None,
+    y_m: Optional[float] = None,
+    position_id: Optional[str] = None,
+    sku_code: Optional[str] = None,
+    zone: Optional[str] = Query(default=None, description="Comma-separated zone filter, e.g. B or A,B"),
+    state: str = Query(default="free", regex="^(free|occupied|any)$"),
+    k: int = Query(default=1, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """Nearest slots to a point, a position_id, a SKU, or (by default) the gate."""
+    try:
+        return LIVE_LAYOUT.nearest(
+            db, _slot_origin(x_m, y_m, position_id, sku_code), state, _parse_zones(zone), k
+        )
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.get("/api/slots/within")
+def slots_within(
+    radius_m: float = Query(..., gt=0, le=500),
+    x_m: Optional[float] = None,
+    y_m: Optional[float] = None,
+    position_id: Optional[str] = None,
+    sku_code: Optional[str] = None,
+    zone: Optional[str] = Query(default=None, description="Comma-separated zone filter"),
+    state: str = Query(default="occupied", regex="^(free|occupied|any)$"),
+    db: Session = Depends(get_db),
+):
+    """Slots (by default occupied ones, with their SKU) within `radius_m`."""
+    try:
+        return LIVE_LAYOUT.within(
+            db, _slot_origin(x_m, y_m, position_id, sku_code), radius_m, state, _parse_zones(zone)
+        )
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.post("/api/layout/evaluate")
+def evaluate_layouts(request: schemas.EvaluateRequest, db: Session = Depends(get_db)):
+    result = run_evaluation(
+        db,
+        layouts=request.layouts,
+        placements=[entry.dict() for entry in request.placements]
+        if request.placements is not None
+        else None,
+        orders=request.orders,
+        synthetic_orders=request.synthetic_orders,
+        mean_lines=request.mean_lines,
+        seed=request.seed,
+        per_order=request.per_order,
+    )
+    print(
+        f"[EVALUATE] {len(result['results'])} layouts x {result['lines']} lines "
+        f"in {result['elapsed_ms']} ms"
+    )
+    return result
+
+
+@app.post("/api/scenarios/evaluate")
+def evaluate_scenario_grid(request: schemas.ScenarioRequest, db: Session = Depends(get_db)):
+    try:
+        result = evaluate_scenarios(
+            db,
+            scenarios=[scenario.dict() for scenario in request.scenarios],
+            grid=request.grid.dict() if request.grid is not None else None,
+            travel=request.travel,
+            orders=request.orders,
+            synthetic_orders=request.synthetic_orders,
+            mean_lines=request.mean_lines,
+            seed=request.seed,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    print(
+        f"[SCENARIOS] {result['scenarios']} scenarios x {result['skus']} SKUs "
+        f"in {result['elapsed_ms']} ms (scoring {result['scoring_ms']} ms)"
+    )
+    return result
+
+
+def _queue_rescore(db: Session, profile_id: int) -> dict:
+    try:
+        return queue_recompute(db, profile_id, lambda params: JOBS.submit("rescore", params))
+    except JobQueueFull as exc:
+        raise HTTPException(status_code=429, detail=str(exc))
+
+
+def _after_sku_write(db: Session) -> None:
+    """Follow a SKU write: capacity cut-offs, then the normalization scale.
+    A new scale re-normalizes stored rows through a rescore job."""
+    CALIBRATOR.recalibrate(db)
+    adopted = check_drift(db)
+    if adopted is not None:
+        _renormalize(db)
+
+
+def _renormalize(db: Session) -> Optional[dict]:
+    profile = active_profile(db)
+    if profile is None:
+        return None
+    try:
+        return queue_recompute(db, profile.id, lambda params: JOBS.submit("rescore", params))
+    except JobQueueFull as exc:
+        # The write itself succeeded; POST /api/scoring/recompute catches up.
+        print(f"[NORMALIZE] Re-normalization not queued: {exc}")
+        return None
+
+
+@app.get("/api/scoring/profiles")
+def scoring_profiles(db: Session = Depends(get_db)):
+    return {"profiles": list_profiles(db)}
+
+
+@app.post("/api/scoring/profiles", status_code=201)
+def add_scoring_profile(request: schemas.ScoringProfileIn, db: Session = Depends(get_db)):
+    try:
+        profile = create_profile(
+            db, request.name, request.weights, request.thresholds, request.threshold_mode
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    print(f"[SCORING] Created profile {profile.id} '{profile.name}'")
+    if not request.activate:
+        return profile_summary(profile)
+    return activate_scoring_profile(profile.id, db)
+
+
+@app.put("/api/scoring/profiles/{profile_id}")
+def edit_scoring_profile(
+    profile_id: int, request: schemas.ScoringProfileUpdate, db: Session = Depends(get_db)
+):
+    try:
+        profile = update_profile(
+            db, profile_id, request.weights, request.thresholds, request.threshold_mode
+        )
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    print(f"[SCORING] Profile {profile.id} is now version {profile.version}")
+    if not profile.is_active:
+        return profile_summary(profile)
+    job = _queue_rescore(db, profile.id)
+    db.refresh(profile)
+    return JSONResponse(status_code=202, content={"profile": profile_summary(profile), "job": job})
+
+
+@app.post("/api/scoring/profiles/{profile_id}/activate", status_code=202)
+def activate_scoring_profile(profile_id: int, db: Session = Depends(get_db)):
+    try:
+        profile = activate_profile(db, profile_id)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    print(f"[SCORING] Activated profile {profile.id} v{profile.version}")
+    job = _queue_rescore(db, profile.id)
+    db.refresh(profile)
+    return JSONResponse(status_code=202, content={"profile": profile_summary(profile), "job": job})
+
+
+@app.get("/api/scoring/status")
+def scoring_profile_status(db: Session = Depends(get_db)):
+    return scoring_status(db)
+
+
+@app.get("/api/scoring/calibration")
+def scoring_calibration(db: Session = Depends(get_db)):
+    return CALIBRATOR.status(db)
+
+
+@app.post("/api/scoring/calibration")
+def recalibrate_scoring(db: Session = Depends(get_db)):
+    """Re-derive capacity cut-offs now, e.g. after layout.json changed."""
+    result = CALIBRATOR.recalibrate(db)
+    return {"recalibrated": result is not None, "result": result, "status": CALIBRATOR.status(db)}
+
+
+@app.get("/api/scoring/normalization")
+def scoring_normalization(db: Session = Depends(get_db)):
+    return normalization_status(db)
+
+
+@app.post("/api/scoring/normalization")
+def renormalize_scoring(db: Session = Depends(get_db)):
+    """Adopt the scale the raw distribution calls for now, however small the
+    drift, and re-normalize stored rows."""
+    adopted = check_drift(db, force=True)
+    job = _renormalize(db) if adopted is not None else None
+    return {"adopted": adopted, "job": job, "status": normalization_status(db)}
+
+
+@app.post("/api/scoring/recompute", status_code=202)
+def resume_scoring(db: Session = Depends(get_db)):
+    """Re-score the rows the active profile has not stamped yet, e.g. after a
+    failed recompute."""
+    profile = active_profile(db)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="No active scoring profile")
+    job = _queue_rescore(db, profile.id)
+    db.refresh(profile)
+    return JSONResponse(status_code=202, content={"profile": profile_summary(profile), "job": job})
+
+
+@app.post("/api/orders/ingest")
+def ingest_orders(request: schemas.OrderIngestRequest):
+    stats = AFFINITY.ingest(request.orders)
+    print(f"[AFFINITY] {stats['orders']} orders / {stats['lines']} lines in {stats['elapsed_s']} s")
+    return stats
+
+
+@app.post("/api/orders/import")
+def import_orders(file: UploadFile = File(...)):
+    stats = AFFINITY.ingest(iter_csv_orders(file.file))
+    print(
+        f"[AFFINITY] {file.filename}: {stats['orders']} orders / {stats['lines']} lines "
+        f"({stats['lines_per_s']:.0f} lines/s)"
+    )
+    return stats
+
+
+@app.get("/api/affinity/stats")
+def affinity_stats():
+    return AFFINITY.stats()
+
+
+@app.get("/api/affinity/{sku_code}")
+def affinity_neighbors(sku_code: str, k: int = Query(default=10, ge=1, le=100)):
+    return {"sku_code": sku_code, "neighbors": AFFINITY.neighbors(sku_code, k)}
+
+
+@app.delete("/api/affinity")
+def reset_affinity():
+    AFFINITY.reset()
+    return {"status": "ok", "detail": "reset"}
+
+
+@app.post("/api/layout/moves")
+def plan_layout_moves(request: schemas.MovePlanRequest, db: Session = Depends(get_db)):
+    try:
+        result = plan_relocation(
+            db,
+            proposal=request.proposal,
+            zone_overrides=request.zone_overrides,
+            placements=[entry.dict() for entry in request.placements]
+            if request.placements is not None
+            else None,
+            mode=request.mode,
+            max_moves=request.max_moves,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    summary = result["summary"]
+    print(
+        f"[MOVES] {summary['proposal']}/{summary['mode']}: {summary['moves']} moves "
+        f"(naive {summary['naive_moves']}) in {summary['elapsed_ms']} ms"
+    )
+    return result
 
 
 @app.post("/api/sku/optimize", response_model=schemas.OptimizeResponse)
-def optimize(
-    request: schemas.OptimizeRequest, db: Session = Depends(get_db)
+async def optimize(
+    request: schemas.OptimizeRequest, session: AsyncSession = Depends(get_async_db)
 ):
-    items = (
-        db.query(models.SKUItem)
-        .order_by(models.SKUItem.priority.desc())
-        .all()
+    print(f"[OPTIMIZE] Instructions: {request.instructions} (engine={request.engine})")
+    rules = [rule.dict() for rule in request.rules]
+    try:
+        validate_rules(rules, [zone["id"] for zone in load_warehouse()["zones"]])
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    layout = await optimize_layout_async(
+        session,
+        request.instructions,
+        engine=request.engine,
+        operator_rules=rules,
+        sharded=request.sharded,
+        max_concurrency=request.max_concurrency,
+        prune_prompt=request.prune_prompt,
     )
+    # Validating and encoding a large layout takes seconds; do it off the
+    # event loop instead of through response_model.
+    body = await run_in_threadpool(_encode_optimize_response, layout)
+    return Response(content=body, media_type="application/json")
+
+
+def _encode_optimize_response(layout: dict) -> bytes:
+    schemas.OptimizeResponse(**layout)  # same checks response_model would run
+    return json.dumps(layout).encode("utf-8")
+
 
-    ai_payload = [
+def _submit_job(kind: str, params: dict):
+    try:
+        summary = JOBS.submit(kind, params)
+    except JobQueueFull as exc:
+        raise HTTPException(status_code=429, detail=str(exc))
+    return JSONResponse(status_code=202, content=summary)
+
+
+@app.post("/api/jobs/optimize", status_code=202)
+def submit_optimize_job(request: schemas.OptimizeRequest):
+    rules = [rule.dict() for rule in request.rules]
+    try:
+        validate_rules(rules, [zone["id"] for zone in load_warehouse()["zones"]])
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return _submit_job(
+        "optimize",
         {
-            "sku_code": item.sku_code,
-            "priority": item.priority,
-            "zone": item.zone,
-            "f": item.f,
-            "w": item.w,
-            "s": item.s,
-            "i": item.i,
-        }
-        for item in items
-    ]
-
-    print(f"[OPTIMIZE] Instructions: {request.instructions}")
-    ai_plan = ask_ai_for_plan(ai_payload, request.instructions)
-    print(f"[OPTIMIZE] AI plan summary: {ai_plan.get('summary')}")
-    print(f"[OPTIMIZE] AI reassignments count: {len(ai_plan.get('reassignments', []))}")
-
-    zone_overrides = {
-        entry["sku_code"]: entry["recommended_zone"]
-        for entry in ai_plan.get("reassignments", [])
-        if isinstance(entry, dict)
-    }
-    print(f"[OPTIMIZE] Zone overrides: {zone_overrides}")
+            "instructions": request.instructions,
+            "engine": request.engine,
+            "operator_rules": rules,
+            "sharded": request.sharded,
+            "max_concurrency": request.max_concurrency,
+            "prune_prompt": request.prune_prompt,
+        },
+    )
+
+
+@app.post("/api/jobs/solve", status_code=202)
+def submit_solve_job(mode: str = Query(default="zone", regex="^(zone|global)$")):
+    return _submit_job("solve", {"mode": mode})
+
 
-    layout = generate_layout(db, zone_overrides=zone_overrides)
-    layout["assistant_summary"] = ai_plan.get("summary")
-    layout["assistant_reassignments"] = ai_plan.get("reassignments", [])
-    return layout
+@app.get("/api/jobs")
+def jobs_list(
+    status: Optional[str] = Query(default=None, regex="^(queued|running|succeeded|failed)$"),
+    limit: int = Query(default=50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    return {"jobs": list_jobs(db, limit, status), "runner": JOBS.stats()}
+
+
+@app.get("/api/jobs/{job_id}")
+def job_status(job_id: str, db: Session = Depends(get_db)):
+    try:
+        return job_summary(get_job(db, job_id))
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+
+@app.get("/api/jobs/{job_id}/result")
+def job_result_view(job_id: str, db: Session = Depends(get_db)):
+    try:
+        return job_result(db, job_id)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+@app.post("/api/jobs/{job_id}/apply")
+def job_apply(job_id: str, db: Session = Depends(get_db)):
+    try:
+        return apply_job(db, job_id)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+def _stored_job(job_id: str):
+    with SessionLocal() as db:
+        return job_summary(get_job(db, job_id))
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """Server-sent progress events until the job finishes; reconnecting
+    clients resume after their Last-Event-ID."""
+    try:
+        stored = await run_in_threadpool(_stored_job, job_id)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    last_id = request.headers.get("last-event-id", "")
+    cursor = int(last_id) if last_id.lstrip("-").isdigit() else -1
+
+    async def stream():
+        nonlocal cursor
+        while True:
+            events = JOBS.events_since(job_id, cursor)
+            if events is None:
+                # Submitted by an earlier process: report the stored state once.
+                yield sse_events([{"id": 0, "event": "status", "data": stored}])
+                return
+            if events:
+                cursor = events[-1]["id"]
+                yield sse_events(events)
+                if is_finished(events):
+                    return
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(0.25)
+
+    return StreamingResponse(
+        stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+    )
+
+
+@app.get("/api/ai/cache/stats")
+def ai_cache_stats():
+    return get_plan_cache().stats()
+
+
+@app.get("/api/sku/store/stats")
+def sku_store_stats():
+    return SKU_STORE.stats()
 
 
 @app.delete("/api/sku/{sku_id}")
@@ -149,8 +834,12 @@ def delete_sku(sku_id: int, db: Session = Depends(get_db)):
     item = db.query(models.SKUItem).filter(models.SKUItem.id == sku_id).first()
     if not item:
         raise HTTPException(status_code=404, detail="SKU not found")
+    sku_code = item.sku_code
     db.delete(item)
     db.commit()
+    LIVE_LAYOUT.record_deleted(sku_id)
+    METRIC_HISTORY.record_deleted(db, sku_code)
+    _after_sku_write(db)
     return {"status": "ok", "detail": "deleted"}
 
 
@@ -159,22 +848,28 @@ def update_sku(sku_id: int, item_update: schemas.SKUCreate, db: Session = Depend
     item = db.query(models.SKUItem).filter(models.SKUItem.id == sku_id).first()
     if not item:
         raise HTTPException(status_code=404, detail="SKU not found")
+    try:
+        metrics = prepare_metrics(item_update.dict(), item_update.normalized)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
     # update fields
-    item.sku_code = item_update.sku_code
-    item.product_name = item_update.product_name
-    item.f = item_update.f
-    item.w = item_update.w
-    item.s = item_update.s
-    item.i = item_update.i
+    for name, value in metrics.items():
+        setattr(item, name, value)
 
     # recompute priority and zone
+    formula = active_formula()
     pr = calculate_priority(item.f, item.w, item.s, item.i)
     zone = priority_to_zone(pr)
     item.priority = pr
     item.zone = zone
+    item.profile_id = formula["profile_id"]
+    item.profile_version = formula["profile_version"]
 
     db.add(item)
     db.commit()
     db.refresh(item)
+    LIVE_LAYOUT.record_saved(item)
+    METRIC_HISTORY.record_saved(db, item)
+    _after_sku_write(db)
     return item
@@ -1,4 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Float, Index, Integer, String, Text, event, insert, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
 from backend.database import Base
 
 
@@ -14,3 +18,172 @@ class SKUItem(Base):
     i = Column(Float, default=0.0)
     priority = Column(Float, default=0.0)
     zone = Column(String, default="D")
+    # Scoring profile (id, version) that computed priority/zone; NULL for
+    # rows scored before profiles existed.
+    profile_id = Column(Integer, nullable=True)
+    profile_version = Column(Integer, nullable=True)
+    # Metrics as submitted, before normalization, and the metric scale
+    # version (metric_scales.id) that normalized f/w/s/i. Raw metrics are NULL
+    # for rows submitted already normalized (and rows stored before raw
+    # metrics were kept); norm_version is NULL for the latter only.
+    raw_f = Column(Float, nullable=True)
+    raw_w = Column(Float, nullable=True)
+    raw_s = Column(Float, nullable=True)
+    raw_i = Column(Float, nullable=True)
+    norm_version = Column(Integer, nullable=True)
+
+
+# Keyset pagination walks (priority DESC, id); the zone index serves zone filters.
+Index("ix_sku_items_priority_id", SKUItem.priority.desc(), SKUItem.id)
+Index("ix_sku_items_zone_priority_id", SKUItem.zone, SKUItem.priority.desc(), SKUItem.id)
+
+
+class OptimizationJob(Base):
+    __tablename__ = "optimization_jobs"
+
+    id = Column(String, primary_key=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="queued", index=True)
+    stage = Column(String, nullable=True)
+    progress = Column(Float, default=0.0)
+    request = Column(Text, nullable=True)
+    result = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    applied_at = Column(DateTime, nullable=True)
+
+
+class ScoringProfile(Base):
+    __tablename__ = "scoring_profiles"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+    version = Column(Integer, nullable=False, default=1)
+    weight_f = Column(Float, nullable=False)
+    weight_w = Column(Float, nullable=False)
+    weight_s = Column(Float, nullable=False)
+    weight_i = Column(Float, nullable=False)
+    threshold_a = Column(Float, nullable=False)
+    threshold_b = Column(Float, nullable=False)
+    threshold_c = Column(Float, nullable=False)
+    # fixed: the cut-offs above; capacity: derived from zone capacity and kept
+    # up to date by services/calibration.py. NULL (older rows) means fixed.
+    threshold_mode = Column(String, nullable=True, default="fixed")
+    is_active = Column(Boolean, nullable=False, default=False)
+    # idle, running, done or failed; the recompute of SKU rows after activation.
+    recompute_status = Column(String, nullable=False, default="idle")
+    recompute_job_id = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    activated_at = Column(DateTime, nullable=True)
+    recomputed_at = Column(DateTime, nullable=True)
+
+
+# One version of the raw metric scale (services/metric_scaling.py); the
+# newest row is the active one.
+class MetricScale(Base):
+    __tablename__ = "metric_scales"
+
+    id = Column(Integer, primary_key=True)
+    scale_f = Column(Float, nullable=False)
+    scale_w = Column(Float, nullable=False)
+    scale_s = Column(Float, nullable=False)
+    scale_i = Column(Float, nullable=False)
+    # Raw quantile the scale was taken at and the SKUs it was taken over;
+    # NULL / 0 for the built-in scale.
+    quantile = Column(Float, nullable=True)
+    samples = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# Append-only metric observations, one per SKU write, written in batches by
+# services/metric_history.py.
+class SKUMetricSample(Base):
+    __tablename__ = "sku_metric_history"
+
+    id = Column(Integer, primary_key=True)
+    sku_code = Column(String, nullable=False)
+    recorded_at = Column(DateTime, nullable=False)
+    # UTC days since the epoch of recorded_at; the 7/30-day windows group by it.
+    day = Column(Integer, nullable=False, index=True)
+    raw_f = Column(Float, nullable=True)
+    raw_w = Column(Float, nullable=True)
+    raw_s = Column(Float, nullable=True)
+    raw_i = Column(Float, nullable=True)
+    priority = Column(Float, nullable=True)
+    zone = Column(String, nullable=True)
+
+
+Index("ix_sku_metric_history_code_at", SKUMetricSample.sku_code, SKUMetricSample.recorded_at)
+
+
+# Running state of one SKU's metric trend, so the EWMA and the watcher's
+# smoothed zone survive a restart without replaying the history.
+class SKUMetricTrend(Base):
+    __tablename__ = "sku_metric_trends"
+
+    sku_code = Column(String, primary_key=True)
+    samples = Column(Integer, nullable=False, default=0)
+    last_at = Column(DateTime, nullable=False)
+    # Time-decayed sample weight and raw metric sums as of last_at; the EWMA
+    # is sum / weight.
+    weight = Column(Float, nullable=False)
+    sum_f = Column(Float, nullable=False)
+    sum_w = Column(Float, nullable=False)
+    sum_s = Column(Float, nullable=False)
+    sum_i = Column(Float, nullable=False)
+    smoothed_zone = Column(String, nullable=True)
+    # When the smoothed zone last crossed a boundary; NULL if it never did.
+    crossed_at = Column(DateTime, nullable=True)
+
+
+# Count of committed transactions that wrote sku_items, from any process.
+# Process-local copies of the table (services/sku_store.py) compare it with
+# the version they mirror to notice writes made elsewhere.
+class SKUDataVersion(Base):
+    __tablename__ = "sku_data_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+# session.info keys: the transaction wrote sku_items / the data version its
+# commit produced.
+SKU_WRITTEN_KEY = "sku_items_written"
+SKU_VERSION_KEY = "sku_data_version"
+
+
+def _writes_skus(statement) -> bool:
+    return isinstance(statement, UpdateBase) and getattr(statement.table, "name", None) == SKUItem.__tablename__
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_sku_statement(state):
+    # Core insert/update/delete run through Session.execute.
+    if _writes_skus(state.statement):
+        state.session.info[SKU_WRITTEN_KEY] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _note_sku_flush(session, flush_context):
+    if any(isinstance(obj, SKUItem) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[SKU_WRITTEN_KEY] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_sku_version(session):
+    session.flush()
+    if not session.info.pop(SKU_WRITTEN_KEY, False):
+        return
+    table = SKUDataVersion.__table__
+    if session.execute(update(table).where(table.c.id == 1).values(version=table.c.version + 1)).rowcount == 0:
+        session.execute(insert(table).values(id=1, version=1))
+    session.info[SKU_VERSION_KEY] = session.execute(select(table.c.version).where(table.c.id == 1)).scalar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_sku_write(session):
+    session.info.pop(SKU_WRITTEN_KEY, None)
+    session.info.pop(SKU_VERSION_KEY, None)
@@ -1,14 +1,19 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 
 class SKUCreate(BaseModel):
     sku_code: str = Field(..., example="SKU001")
     product_name: Optional[str] = Field(None, example="Laptop Dell XPS 13")
-    f: float = Field(..., ge=0.0, le=1.0, example=0.25)
-    w: float = Field(..., ge=0.0, le=1.0, example=0.4)
-    s: float = Field(..., ge=0.0, le=1.0, example=0.2)
-    i: float = Field(..., ge=0.0, le=1.0, example=0.3)
+    f: float = Field(..., ge=0.0, example=0.25)
+    w: float = Field(..., ge=0.0, example=0.4)
+    s: float = Field(..., ge=0.0, example=0.2)
+    i: float = Field(..., ge=0.0, example=0.3)
+    normalized: bool = Field(
+        default=True,
+        description="Metrics are already within 0..1; otherwise they are raw values "
+        "(e.g. picks, kg, cm3) normalized server-side.",
+    )
 
 
 class SKUItemOut(BaseModel):
@@ -21,17 +26,94 @@ class SKUItemOut(BaseModel):
     i: float
     priority: float
     zone: str
+    raw_f: Optional[float] = None
+    raw_w: Optional[float] = None
+    raw_s: Optional[float] = None
+    raw_i: Optional[float] = None
 
     class Config:
         orm_mode = True
 
 
+class SKUBulkRequest(BaseModel):
+    items: List[SKUCreate] = Field(..., min_items=1, max_items=10000)
+    on_conflict: Literal["update", "skip"] = Field(
+        default="update",
+        description="Whether existing sku_codes are overwritten or left untouched.",
+    )
+
+
+class SKUBulkResult(BaseModel):
+    sku_code: str
+    status: Literal["created", "updated", "skipped", "duplicate", "error"]
+    priority: Optional[float] = None
+    zone: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class SKUBulkResponse(BaseModel):
+    created: int
+    updated: int
+    skipped: int
+    duplicates: int
+    failed: int
+    results: List[SKUBulkResult]
+
+
+class SKUImportError(BaseModel):
+    offset: int
+    detail: Optional[str] = None
+
+
+class SKUImportResponse(BaseModel):
+    start_offset: int
+    next_offset: int
+    created: int
+    updated: int
+    skipped: int
+    invalid: int
+    failed: int
+    chunks: int
+    elapsed_s: float
+    rows_per_s: float
+    errors: List[SKUImportError] = Field(default_factory=list)
+
+
+class LocalRule(BaseModel):
+    when: Dict[str, Dict[str, Any]] = Field(
+        default_factory=dict,
+        example={"w": {"gt": 0.5}, "zone": {"in": ["A", "B"]}},
+        description="Field -> {operator: value}; all conditions must match.",
+    )
+    zone: str = Field(..., example="C")
+    reason: Optional[str] = None
+    confidence: float = Field(default=0.95, ge=0.0, le=1.0)
+
+
 class OptimizeRequest(BaseModel):
     instructions: Optional[str] = Field(
         default=None,
         max_length=600,
         description="Optional operator hints passed to the AI model.",
     )
+    sharded: Optional[bool] = Field(
+        default=None,
+        description="Plan in concurrent zone-grouped batches; defaults to on for large SKU sets.",
+    )
+    max_concurrency: int = Field(default=4, ge=1, le=16)
+    prune_prompt: bool = Field(
+        default=True,
+        description="Send only borderline or instruction-touched SKUs to the model.",
+    )
+    engine: Literal["local", "ai", "hybrid"] = Field(
+        default="ai",
+        description="local: rule engine only; ai: model with local fallback; hybrid: rules plus model for uncertain SKUs.",
+    )
+    rules: List[LocalRule] = Field(
+        default_factory=list,
+        max_items=100,
+        description="Operator rules applied after the engine, in order (later rules win).",
+    )
 
 
 class AIReassignment(BaseModel):
@@ -47,3 +129,111 @@ class OptimizeResponse(BaseModel):
     counts: dict
     assistant_summary: Optional[str] = None
     assistant_reassignments: List[AIReassignment] = Field(default_factory=list)
+    ai_prompt_stats: Optional[dict] = None
+    engine_used: Optional[str] = None
+
+
+class PlacementIn(BaseModel):
+    sku_code: str
+    x_m: float
+    y_m: float
+
+
+class EvaluateRequest(BaseModel):
+    layouts: List[Literal["current", "solver_zone", "solver_global", "slots", "affinity"]] = Field(
+        default_factory=lambda: ["current"],
+        description="Built-in layouts to evaluate side by side.",
+    )
+    placements: Optional[List[PlacementIn]] = Field(
+        default=None,
+        description="A custom layout (e.g. placements from /api/sku/optimize), reported as 'custom'.",
+    )
+    orders: Optional[List[List[str]]] = Field(
+        default=None,
+        max_items=200000,
+        description="Orders as lists of SKU codes; a synthetic stream is generated when omitted.",
+    )
+    synthetic_orders: int = Field(default=10000, ge=1, le=1000000)
+    mean_lines: float = Field(default=3.0, ge=1.0, le=50.0)
+    seed: int = 7
+    per_order: bool = False
+
+
+class SlotPlacementIn(BaseModel):
+    sku_code: str
+    position_id: str
+    zone: str
+    x_m: float
+    y_m: float
+
+
+class MovePlanRequest(BaseModel):
+    proposal: Literal["overrides", "solver_zone", "solver_global", "placements"] = "overrides"
+    zone_overrides: Dict[str, str] = Field(
+        default_factory=dict,
+        description="sku_code -> zone, e.g. the reassignments from /api/sku/optimize.",
+    )
+    placements: Optional[List[SlotPlacementIn]] = Field(
+        default=None, description="Explicit target layout for proposal=placements."
+    )
+    mode: Optional[Literal["exact", "zone"]] = Field(
+        default=None,
+        description="exact: reach every proposed slot; zone: only reach the proposed zone. "
+        "Defaults to zone for overrides, exact otherwise.",
+    )
+    max_moves: Optional[int] = Field(default=None, ge=1, le=1000000)
+
+
+class OrderIngestRequest(BaseModel):
+    orders: List[List[str]] = Field(
+        ..., max_items=200000, description="Orders as lists of SKU codes, one entry per line."
+    )
+
+
+class ScenarioIn(BaseModel):
+    name: Optional[str] = None
+    weights: Optional[List[float]] = Field(
+        default=None, min_items=4, max_items=4,
+        description="Priority weights for (f, w, s, i); the current ones when omitted.",
+    )
+    thresholds: Optional[List[float]] = Field(
+        default=None, min_items=3, max_items=3,
+        description="Descending A/B/C cut-offs; the current ones when omitted.",
+    )
+
+
+class ScenarioGrid(BaseModel):
+    weights: List[List[float]] = Field(default_factory=list, description="Weight vectors to combine.")
+    thresholds: List[List[float]] = Field(default_factory=list, description="Cut-off triples to combine.")
+
+
+class ScenarioRequest(BaseModel):
+    scenarios: List[ScenarioIn] = Field(default_factory=list, max_items=10000)
+    grid: Optional[ScenarioGrid] = Field(
+        default=None, description="Adds every weights x thresholds combination as a scenario."
+    )
+    travel: bool = Field(default=False, description="Simulate picker travel per scenario (at most 100).")
+    orders: Optional[List[List[str]]] = Field(default=None, max_items=200000)
+    synthetic_orders: int = Field(default=10000, ge=1, le=1000000)
+    mean_lines: float = Field(default=3.0, ge=1.0, le=50.0)
+    seed: int = 7
+
+
+class ScoringProfileIn(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    weights: List[float] = Field(..., min_items=4, max_items=4, description="Priority weights for (f, w, s, i).")
+    thresholds: Optional[List[float]] = Field(
+        default=None, min_items=3, max_items=3,
+        description="Descending A/B/C cut-offs; the built-in ones when omitted.",
+    )
+    threshold_mode: str = Field(
+        default="fixed", regex="^(fixed|capacity)$",
+        description="capacity derives the cut-offs from zone capacity in layout.json.",
+    )
+    activate: bool = Field(default=False, description="Activate it and re-score every SKU.")
+
+
+class ScoringProfileUpdate(BaseModel):
+    weights: Optional[List[float]] = Field(default=None, min_items=4, max_items=4)
+    thresholds: Optional[List[float]] = Field(default=None, min_items=3, max_items=3)
+    threshold_mode: Optional[str] = Field(default=None, regex="^(fixed|capacity)$")
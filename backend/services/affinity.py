@@ -0,0 +1,325 @@
+"""
+Order co-occurrence affinity between SKUs.
+
+Order lines are folded into a sparse co-occurrence matrix stored as two
+sorted NumPy arrays (pair key, co-orders). After every batch each SKU keeps
+only its `2 * top_k` strongest candidates (lossy counting): frequent pairs
+come back before the next cut and survive, one-off pairs are dropped, and
+memory stays O(SKUs x top_k) however many lines are ingested.
+
+Pairs are generated per batch with NumPy, grouped by order length, and
+merged with one `np.unique`. Nothing runs per pair in Python.
+
+Affinity between two SKUs is co-orders / sqrt(orders_a * orders_b), a
+cosine in 0..1. `affinity_layout` uses it to put a SKU's strongest
+partners in the same zone into the slots right behind it in its column of
+the banded layout.
+"""
+import csv
+import io
+import os
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from backend.services.layout_builder import generate_layout, load_warehouse, position_for
+from backend.services.live_layout import LIVE_LAYOUT
+
+AFFINITY_TOP_K = int(os.environ.get("AFFINITY_TOP_K", "16"))
+# Only the first lines of a huge order form pairs (pairs grow quadratically).
+MAX_PAIR_LINES = 50
+INGEST_BATCH_ORDERS = 50000
+# Pairs weaker than this are not worth breaking priority order for.
+MIN_AFFINITY = 0.05
+# A SKU and the partners placed behind it in the same column.
+AFFINITY_CLUSTER = 3
+ADJACENT_M = 4.5
+
+
+class AffinityMatrix:
+    def __init__(self, top_k: int = AFFINITY_TOP_K) -> None:
+        self.top_k = top_k
+        self.capacity = 2 * top_k
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._index: Dict[str, int] = {}
+            self._codes: List[str] = []
+            self._orders = np.zeros(0, dtype=np.int64)
+            # Pair (a << 32 | b) -> co-orders, sorted by key; both directions stored.
+            self._keys = np.zeros(0, dtype=np.int64)
+            self._counts = np.zeros(0, dtype=np.int64)
+            self._totals = {"orders": 0, "lines": 0, "pairs": 0, "evictions": 0}
+
+    def ingest(self, orders: Iterable[Sequence[str]]) -> Dict[str, Any]:
+        """Fold orders (lists of SKU codes) into the matrix, in batches."""
+        started = time.perf_counter()
+        before = dict(self._totals)
+        batch: List[Sequence[str]] = []
+        for order in orders:
+            batch.append(order)
+            if len(batch) >= INGEST_BATCH_ORDERS:
+                self._ingest_batch(batch)
+                batch = []
+        if batch:
+            self._ingest_batch(batch)
+        elapsed = time.perf_counter() - started
+        lines = self._totals["lines"] - before["lines"]
+        return {
+            "orders": self._totals["orders"] - before["orders"],
+            "lines": lines,
+            "pairs": self._totals["pairs"] - before["pairs"],
+            "elapsed_s": round(elapsed, 3),
+            "lines_per_s": round(lines / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    def _ingest_batch(self, orders: Sequence[Sequence[str]]) -> None:
+        lengths = np.fromiter((len(order) for order in orders), dtype=np.int64, count=len(orders))
+        flat = [code for order in orders for code in order]
+        with self._lock:
+            for code in dict.fromkeys(flat):
+                if code not in self._index:
+                    self._index[code] = len(self._codes)
+                    self._codes.append(code)
+            size = len(self._codes)
+            self._orders = np.concatenate(
+                [self._orders, np.zeros(size - len(self._orders), dtype=np.int64)]
+            )
+            self._totals["orders"] += len(orders)
+            self._totals["lines"] += len(flat)
+            if not flat:
+                return
+
+            # Distinct SKUs per order, sorted by (order, SKU id).
+            index = self._index
+            ids = np.fromiter((index[code] for code in flat), dtype=np.int64, count=len(flat))
+            lines = np.unique(np.repeat(np.arange(len(orders)), lengths) * size + ids)
+            order_no, sku = lines // size, lines % size
+            self._orders += np.bincount(sku, minlength=size)
+
+            per_order = np.bincount(order_no, minlength=len(orders))
+            starts = np.concatenate([[0], np.cumsum(per_order)[:-1]])
+            keys = []
+            for length in np.unique(np.minimum(per_order, MAX_PAIR_LINES)).tolist():
+                if length < 2:
+                    continue
+                chosen = starts[np.minimum(per_order, MAX_PAIR_LINES) == length]
+                members = sku[chosen[:, None] + np.arange(length)]
+                left, right = np.triu_indices(length, k=1)
+                a, b = members[:, left].ravel(), members[:, right].ravel()
+                keys.append((a << 32) | b)
+                keys.append((b << 32) | a)
+            if not keys:
+                return
+            batch = np.concatenate(keys)
+            self._totals["pairs"] += batch.size // 2
+            self._merge(batch)
+
+    def _merge(self, batch: np.ndarray) -> None:
+        """Add one batch of pair keys, then keep each SKU's `capacity` best."""
+        keys, inverse = np.unique(np.concatenate([self._keys, batch]), return_inverse=True)
+        counts = np.bincount(
+            inverse, weights=np.concatenate([self._counts, np.ones(batch.size)])
+        ).astype(np.int64)
+        rows = keys >> 32
+        order = np.lexsort((-counts, rows))
+        rows_sorted = rows[order]
+        group_start = np.flatnonzero(np.r_[True, rows_sorted[1:] != rows_sorted[:-1]])
+        rank = np.arange(rows_sorted.size) - np.repeat(group_start, np.diff(np.r_[group_start, rows_sorted.size]))
+        keep = np.sort(order[rank < self.capacity])
+        self._totals["evictions"] += int(keys.size - keep.size)
+        self._keys, self._counts = keys[keep], counts[keep]
+
+    def _ranked(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(row, partner, co-orders, affinity) for every stored pair."""
+        rows = self._keys >> 32
+        partners = self._keys & 0xFFFFFFFF
+        affinity = self._counts / np.sqrt(np.maximum(self._orders[rows] * self._orders[partners], 1))
+        return rows, partners, self._counts, affinity
+
+    def neighbors(self, sku_code: str, k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Strongest partners of a SKU, best first."""
+        with self._lock:
+            idx = self._index.get(sku_code)
+            if idx is None:
+                return []
+            lo, hi = np.searchsorted(self._keys, [idx << 32, (idx + 1) << 32])
+            partners = self._keys[lo:hi] & 0xFFFFFFFF
+            counts = self._counts[lo:hi]
+            affinity = counts / np.sqrt(np.maximum(self._orders[idx] * self._orders[partners], 1))
+            best = np.argsort(-affinity, kind="stable")[: k or self.top_k]
+            return [
+                {"sku_code": self._codes[other], "co_orders": co, "affinity": round(score, 4)}
+                for other, co, score in zip(
+                    partners[best].tolist(), counts[best].tolist(), affinity[best].tolist()
+                )
+            ]
+
+    def partner_scores(self, min_affinity: float = MIN_AFFINITY) -> Dict[str, List[Tuple[float, str]]]:
+        """sku_code -> [(affinity, partner code)] best first, top_k per SKU."""
+        with self._lock:
+            rows, partners, _, affinity = self._ranked()
+            strong = affinity >= min_affinity
+            rows, partners, affinity = rows[strong], partners[strong], affinity[strong]
+            order = np.lexsort((-affinity, rows))
+            result: Dict[str, List[Tuple[float, str]]] = {}
+            codes = self._codes
+            for row, partner, score in zip(
+                rows[order].tolist(), partners[order].tolist(), affinity[order].tolist()
+            ):
+                ranked = result.setdefault(codes[row], [])
+                if len(ranked) < self.top_k:
+                    ranked.append((score, codes[partner]))
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._totals,
+                "skus": len(self._codes),
+                "stored_pairs": int(self._keys.size),
+                "top_k": self.top_k,
+                "max_stored_pairs": len(self._codes) * self.capacity,
+                "memory_bytes": int(self._keys.nbytes + self._counts.nbytes + self._orders.nbytes),
+            }
+
+
+AFFINITY = AffinityMatrix()
+
+
+def iter_csv_orders(stream: BinaryIO) -> Iterator[List[str]]:
+    """Orders from a CSV of `order_id,sku_code` lines grouped by order_id.
+
+    An order is closed when the order_id changes, so an export sorted by
+    order streams in constant memory.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        current_id = None
+        order: List[str] = []
+        for row in csv.DictReader(text):
+            order_id = (row.get("order_id") or "").strip()
+            sku_code = (row.get("sku_code") or "").strip()
+            if not order_id or not sku_code:
+                continue
+            if order_id != current_id and order:
+                yield order
+                order = []
+            current_id = order_id
+            order.append(sku_code)
+        if order:
+            yield order
+    finally:
+        text.detach()
+
+
+def affinity_slots(
+    codes: Sequence[str],
+    partners: Dict[str, List[Tuple[float, str]]],
+    cols: int,
+    cluster: int = AFFINITY_CLUSTER,
+) -> Dict[str, int]:
+    """Slot index per SKU of one zone, given in priority order.
+
+    Each SKU takes the lowest free slot. Up to `cluster - 1` of its strongest
+    unplaced partners from the same zone then take the next free slots in the
+    same column (idx + cols, idx + 2 * cols, ...). That keeps them in one aisle
+    of the travel model, so an order picking both walks that aisle once.
+    """
+    members = set(codes)
+    slot: Dict[str, int] = {}
+    taken = set()
+    cursor = 0
+    for code in codes:
+        if code in slot:
+            continue
+        while cursor in taken:
+            cursor += 1
+        slot[code] = anchor = cursor
+        taken.add(cursor)
+        below = anchor
+        pulled = 0
+        for _, partner in partners.get(code, ()):
+            if pulled >= cluster - 1:
+                break
+            if partner in members and partner not in slot:
+                below += cols
+                while below in taken:
+                    below += cols
+                slot[partner] = below
+                taken.add(below)
+                pulled += 1
+    return slot
+
+
+def adjacency_score(
+    placements: Sequence[Dict[str, Any]], partners: Dict[str, List[Tuple[float, str]]]
+) -> Dict[str, Any]:
+    """Affinity of partner pairs stored within ADJACENT_M of each other."""
+    position = {entry["sku_code"]: (entry["x_m"], entry["y_m"]) for entry in placements}
+    seen = set()
+    adjacent, score = 0, 0.0
+    for code, ranked in partners.items():
+        here = position.get(code)
+        if here is None:
+            continue
+        for affinity, partner in ranked:
+            there = position.get(partner)
+            pair = (code, partner) if code < partner else (partner, code)
+            if there is None or pair in seen:
+                continue
+            seen.add(pair)
+            if abs(here[0] - there[0]) + abs(here[1] - there[1]) <= ADJACENT_M:
+                adjacent += 1
+                score += affinity
+    return {"adjacent_pairs": adjacent, "adjacent_affinity": round(score, 3)}
+
+
+def affinity_layout(
+    db: Session,
+    zone_overrides: Optional[Dict[str, str]] = None,
+    matrix: AffinityMatrix = AFFINITY,
+) -> Dict[str, Any]:
+    """The banded layout with co-picked SKUs stacked in the same column.
+
+    Slots left empty by the column stacking stay free, so a zone can reach a
+    few slot indexes past its SKU count.
+    """
+    started = time.perf_counter()
+    base = generate_layout(db, zone_overrides) if zone_overrides else LIVE_LAYOUT.full_layout(db)
+    partners = matrix.partner_scores()
+    warehouse = load_warehouse()
+    bands = {zone["id"]: (zone["from_m"], zone["to_m"]) for zone in warehouse["zones"]}
+
+    by_zone: Dict[str, List[Dict[str, Any]]] = {}
+    for entry in base["placements"]:
+        by_zone.setdefault(entry["zone"], []).append(entry)
+    placements = []
+    moved = 0
+    for zone_id, entries in by_zone.items():
+        band_from, band_to = bands[zone_id]
+        cols = max(1, int((band_to - band_from) // 4))
+        chosen = affinity_slots([entry["sku_code"] for entry in entries], partners, cols)
+        for entry in entries:
+            idx = chosen[entry["sku_code"]]
+            slot = position_for(zone_id, band_from, band_to, warehouse["height_m"], idx)
+            moved += slot["position_id"] != entry["position_id"]
+            placements.append({**entry, **slot})
+
+    return {
+        "warehouse": base["warehouse"],
+        "placements": placements,
+        "counts": base["counts"],
+        "affinity": {
+            "before": adjacency_score(base["placements"], partners),
+            "after": adjacency_score(placements, partners),
+            "repositioned": moved,
+            "skus_with_partners": len(partners),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        },
+    }
@@ -2,32 +2,86 @@
 OpenAI API client for warehouse optimization.
 Updated: 2025-11-10 - Fixed API compatibility
 """
+import asyncio
 import json
 import os
-from typing import Any, Dict, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from backend.services.plan_cache import PlanCache, payload_key
+
+AI_MODEL = "gpt-4o-mini"
 
 _CLIENT: Optional[OpenAI] = None
+_ASYNC_CLIENT: Optional[AsyncOpenAI] = None
 
+# Per-request limits; a hung call fails into the local fallback instead of
+# holding a worker.
+AI_TIMEOUT_S = float(os.environ.get("OPENAI_TIMEOUT_S", "30"))
+AI_CONNECT_TIMEOUT_S = 5.0
+AI_MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", "1"))
 
-def _get_client() -> OpenAI:
-    global _CLIENT
-    if _CLIENT is not None:
-        return _CLIENT
+# Sharded planning: prompt budget per batch, batch size cap, parallel calls.
+SHARD_TOKEN_BUDGET = 1500
+SHARD_MAX_SKUS = 60
+SHARD_AUTO_THRESHOLD = 40
+AI_MAX_CONCURRENCY = 4
 
+_PLAN_CACHE: Optional[PlanCache] = None
+_PLAN_CACHE_LOCK = threading.Lock()
+
+
+def _api_key() -> str:
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError(
             "OPENAI_API_KEY environment variable is not set. Cannot call OpenAI API."
         )
+    return api_key
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(AI_TIMEOUT_S, connect=AI_CONNECT_TIMEOUT_S)
+
 
-    _CLIENT = OpenAI(api_key=api_key)
+def _get_client() -> OpenAI:
+    global _CLIENT
+    if _CLIENT is not None:
+        return _CLIENT
+
+    _CLIENT = OpenAI(api_key=_api_key(), timeout=_timeout(), max_retries=AI_MAX_RETRIES)
     return _CLIENT
 
 
+def _get_async_client() -> AsyncOpenAI:
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is not None:
+        return _ASYNC_CLIENT
+
+    _ASYNC_CLIENT = AsyncOpenAI(api_key=_api_key(), timeout=_timeout(), max_retries=AI_MAX_RETRIES)
+    return _ASYNC_CLIENT
+
+
+def get_plan_cache() -> PlanCache:
+    """Cache of plans for identical (model, instructions, SKU payload) requests."""
+    global _PLAN_CACHE
+    with _PLAN_CACHE_LOCK:
+        if _PLAN_CACHE is None:
+            _PLAN_CACHE = PlanCache(
+                max_entries=int(os.environ.get("AI_PLAN_CACHE_SIZE", "128")),
+                ttl_s=float(os.environ.get("AI_PLAN_CACHE_TTL_S", "900")),
+            )
+        return _PLAN_CACHE
+
+
 def build_ai_prompt(
-    items: List[Dict[str, Any]], instructions: Optional[str] = None
+    items: List[Dict[str, Any]],
+    instructions: Optional[str] = None,
+    context_note: Optional[str] = None,
 ) -> str:
     lines = [
         "You are an expert warehouse optimization assistant.",
@@ -49,24 +103,27 @@ def build_ai_prompt(
         "Example response: {\"summary\": \"Applied 3 custom rules, reassigned 5 SKUs\", \"reassignments\":[{\"sku_code\":\"SKU1\",\"recommended_zone\":\"A\",\"confidence\":0.95,\"reason\":\"High inbound frequency (f=180) matches operator rule\"}]}",
     ]
 
+    if context_note:
+        lines.append(context_note)
     lines.append("SKU data:")
     for item in items:
-        lines.append(
-            f"- {item['sku_code']}: priority={item['priority']:.4f}, "
-            f"zone={item['zone']}, f={item['f']:.2f}, w={item['w']:.2f}, "
-            f"s={item['s']:.2f}, i={item['i']:.2f}"
-        )
+        lines.append(sku_prompt_line(item))
 
     return "\n".join(lines)
 
 
 def ask_ai_for_plan(
-    items: List[Dict[str, Any]], instructions: Optional[str] = None
+    items: List[Dict[str, Any]],
+    instructions: Optional[str] = None,
+    context_note: Optional[str] = None,
+    max_tokens: int = 600,
 ) -> Dict[str, Any]:
     """Call OpenAI to obtain optimization suggestions.
 
     Returns a dictionary with keys 'summary' and 'reassignments'.
     In case of error or missing configuration, falls back to defaults.
+    Identical requests are answered from the plan cache, and concurrent
+    identical requests share a single API call.
     """
 
     if not items:
@@ -75,38 +132,111 @@ def ask_ai_for_plan(
     try:
         client = _get_client()
     except RuntimeError as exc:
-        return {"summary": str(exc), "reassignments": []}
+        return {"summary": str(exc), "reassignments": [], "error": str(exc)}
+
+    key = payload_key(AI_MODEL, instructions or "", context_note or "", max_tokens, items)
+    return get_plan_cache().get_or_compute(
+        key,
+        lambda: _request_plan(client, items, instructions, context_note, max_tokens),
+        cacheable=lambda plan: "error" not in plan,
+    )
+
+
+async def ask_ai_for_plan_async(
+    items: List[Dict[str, Any]],
+    instructions: Optional[str] = None,
+    context_note: Optional[str] = None,
+    max_tokens: int = 600,
+) -> Dict[str, Any]:
+    """`ask_ai_for_plan` on the async OpenAI client; shares the plan cache."""
+    if not items:
+        return {"summary": "No SKUs available for optimization.", "reassignments": []}
+
+    try:
+        client = _get_async_client()
+    except RuntimeError as exc:
+        return {"summary": str(exc), "reassignments": [], "error": str(exc)}
 
-    prompt = build_ai_prompt(items, instructions)
+    key = payload_key(AI_MODEL, instructions or "", context_note or "", max_tokens, items)
+    return await get_plan_cache().get_or_compute_async(
+        key,
+        lambda: _request_plan_async(client, items, instructions, context_note, max_tokens),
+        cacheable=lambda plan: "error" not in plan,
+    )
 
+
+def _request_kwargs(
+    items: List[Dict[str, Any]],
+    instructions: Optional[str],
+    context_note: Optional[str],
+    max_tokens: int,
+) -> Dict[str, Any]:
+    prompt = build_ai_prompt(items, instructions, context_note)
+    print(f"[DEBUG] Calling OpenAI API with prompt length: {len(prompt)}")
+    return {
+        "model": AI_MODEL,
+        "messages": [
+            {
+                "role": "system",
+                "content": "You generate concise, structured warehouse slotting recommendations. Always respond with valid JSON.",
+            },
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": 0.3,
+        "max_tokens": max_tokens,
+    }
+
+
+def _failed_plan(exc: Exception) -> Dict[str, Any]:
+    import traceback
+    print(f"[ERROR] OpenAI API call failed: {exc}")
+    print(traceback.format_exc())
+    return {
+        "summary": f"AI optimization unavailable: {exc}",
+        "reassignments": [],
+        "error": str(exc),
+    }
+
+
+def _request_plan(
+    client: OpenAI,
+    items: List[Dict[str, Any]],
+    instructions: Optional[str],
+    context_note: Optional[str] = None,
+    max_tokens: int = 600,
+) -> Dict[str, Any]:
     try:
-        print(f"[DEBUG] Calling OpenAI API with prompt length: {len(prompt)}")
         response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You generate concise, structured warehouse slotting recommendations. Always respond with valid JSON.",
-                },
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.3,
-            max_tokens=600,
+            **_request_kwargs(items, instructions, context_note, max_tokens)
         )
-
         content = response.choices[0].message.content if response.choices else ""
         print(f"[DEBUG] OpenAI response received, length: {len(content)}")
+        data = json.loads(content) if content else {}
+    except Exception as exc:  # pragma: no cover - network/JSON errors
+        return _failed_plan(exc)
+    return _clean_plan(data)
+
 
+async def _request_plan_async(
+    client: AsyncOpenAI,
+    items: List[Dict[str, Any]],
+    instructions: Optional[str],
+    context_note: Optional[str] = None,
+    max_tokens: int = 600,
+) -> Dict[str, Any]:
+    try:
+        response = await client.chat.completions.create(
+            **_request_kwargs(items, instructions, context_note, max_tokens)
+        )
+        content = response.choices[0].message.content if response.choices else ""
+        print(f"[DEBUG] OpenAI response received, length: {len(content)}")
         data = json.loads(content) if content else {}
     except Exception as exc:  # pragma: no cover - network/JSON errors
-        import traceback
-        print(f"[ERROR] OpenAI API call failed: {exc}")
-        print(traceback.format_exc())
-        return {
-            "summary": f"AI optimization unavailable: {exc}",
-            "reassignments": [],
-        }
+        return _failed_plan(exc)
+    return _clean_plan(data)
+
 
+def _clean_plan(data: Any) -> Dict[str, Any]:
     summary = data.get("summary") if isinstance(data, dict) else None
     reassignments = data.get("reassignments") if isinstance(data, dict) else None
 
@@ -135,3 +265,164 @@ def ask_ai_for_plan(
         )
 
     return {"summary": summary, "reassignments": cleaned}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for this prompt style)."""
+    return len(text) // 4 + 1
+
+
+def sku_prompt_line(item: Dict[str, Any]) -> str:
+    return (
+        f"- {item['sku_code']}: priority={item['priority']:.4f}, "
+        f"zone={item['zone']}, f={item['f']:.2f}, w={item['w']:.2f}, "
+        f"s={item['s']:.2f}, i={item['i']:.2f}"
+    )
+
+
+def shard_items(
+    items: List[Dict[str, Any]],
+    token_budget: int = SHARD_TOKEN_BUDGET,
+    max_skus: int = SHARD_MAX_SKUS,
+) -> List[List[Dict[str, Any]]]:
+    """Split SKUs into batches grouped by current zone.
+
+    Each batch keeps its SKU lines under `token_budget` prompt tokens and at
+    most `max_skus` SKUs, so the answer fits the per-shard output budget.
+    """
+    by_zone: Dict[str, List[Dict[str, Any]]] = {}
+    for item in items:
+        by_zone.setdefault(str(item.get("zone") or ""), []).append(item)
+
+    shards: List[List[Dict[str, Any]]] = []
+    for zone in sorted(by_zone):
+        current: List[Dict[str, Any]] = []
+        used = 0
+        for item in by_zone[zone]:
+            cost = estimate_tokens(sku_prompt_line(item))
+            if current and (used + cost > token_budget or len(current) >= max_skus):
+                shards.append(current)
+                current, used = [], 0
+            current.append(item)
+            used += cost
+        if current:
+            shards.append(current)
+    return shards
+
+
+def _merge_shard_plans(
+    shards: List[List[Dict[str, Any]]], plans: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    merged: Dict[str, Dict[str, Any]] = {}
+    failed = 0
+    for shard, plan in zip(shards, plans):
+        if "error" in plan:
+            failed += 1
+            continue
+        shard_codes = {item["sku_code"] for item in shard}
+        for entry in plan.get("reassignments", []):
+            # Ignore SKUs the model invented or took from another shard.
+            if entry["sku_code"] not in shard_codes:
+                continue
+            current = merged.get(entry["sku_code"])
+            rank = (-entry["confidence"], entry["recommended_zone"])
+            if current is None or rank < (-current["confidence"], current["recommended_zone"]):
+                merged[entry["sku_code"]] = entry
+
+    reassignments = [merged[code] for code in sorted(merged)]
+    summary = (
+        f"Sharded plan over {len(shards)} batches ({failed} failed): "
+        f"{len(reassignments)} SKUs reassigned."
+    )
+    result: Dict[str, Any] = {
+        "summary": summary,
+        "reassignments": reassignments,
+        "shards": len(shards),
+        "failed_shards": failed,
+    }
+    if failed == len(shards):
+        result["summary"] = plans[0].get("summary", summary)
+        result["error"] = plans[0].get("error", "All shards failed")
+    return result
+
+
+def ask_ai_for_plan_sharded(
+    items: List[Dict[str, Any]],
+    instructions: Optional[str] = None,
+    max_concurrency: int = AI_MAX_CONCURRENCY,
+    token_budget: int = SHARD_TOKEN_BUDGET,
+    context_note: Optional[str] = None,
+    on_shard: Optional[Callable[[int, int, Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Plan large SKU sets as concurrent zone-grouped batches.
+
+    Batches run on at most `max_concurrency` threads, each through the
+    cached `ask_ai_for_plan`. Reassignments are merged by sku_code, so the
+    result does not depend on which batch finishes first. `on_shard(done,
+    total, plan)` is called as each batch finishes.
+    """
+    shards = shard_items(items, token_budget)
+    if len(shards) <= 1:
+        return ask_ai_for_plan(items, instructions, context_note=context_note)
+
+    def run(index: int) -> Dict[str, Any]:
+        shard = shards[index]
+        return ask_ai_for_plan(
+            shard,
+            instructions,
+            context_note=_shard_note(index, shards, context_note),
+            max_tokens=_shard_max_tokens(len(shard)),
+        )
+
+    print(f"[AI] Planning {len(items)} SKUs in {len(shards)} shards (concurrency {max_concurrency})")
+    plans: List[Dict[str, Any]] = [{} for _ in shards]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(shards)))) as pool:
+        futures = {pool.submit(run, index): index for index in range(len(shards))}
+        for done, future in enumerate(as_completed(futures), start=1):
+            plans[futures[future]] = future.result()
+            if on_shard:
+                on_shard(done, len(shards), plans[futures[future]])
+    return _merge_shard_plans(shards, plans)
+
+
+async def ask_ai_for_plan_sharded_async(
+    items: List[Dict[str, Any]],
+    instructions: Optional[str] = None,
+    max_concurrency: int = AI_MAX_CONCURRENCY,
+    token_budget: int = SHARD_TOKEN_BUDGET,
+    context_note: Optional[str] = None,
+) -> Dict[str, Any]:
+    """`ask_ai_for_plan_sharded` on the event loop: batches are coroutines
+    bounded by a semaphore instead of threads."""
+    shards = shard_items(items, token_budget)
+    if len(shards) <= 1:
+        return await ask_ai_for_plan_async(items, instructions, context_note=context_note)
+
+    limit = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(index: int) -> Dict[str, Any]:
+        shard = shards[index]
+        async with limit:
+            return await ask_ai_for_plan_async(
+                shard,
+                instructions,
+                context_note=_shard_note(index, shards, context_note),
+                max_tokens=_shard_max_tokens(len(shard)),
+            )
+
+    print(f"[AI] Planning {len(items)} SKUs in {len(shards)} async shards (concurrency {max_concurrency})")
+    plans = await asyncio.gather(*(run(index) for index in range(len(shards))))
+    return _merge_shard_plans(shards, list(plans))
+
+
+def _shard_note(index: int, shards: List[List[Dict[str, Any]]], context_note: Optional[str]) -> str:
+    note = (
+        f"This is batch {index + 1} of {len(shards)} (SKUs currently in zone "
+        f"{shards[index][0].get('zone')}); only return reassignments for SKUs listed below."
+    )
+    return f"{context_note}\n{note}" if context_note else note
+
+
+def _shard_max_tokens(count: int) -> int:
+    # ~45 output tokens per reassignment plus the summary.
+    return min(4096, 200 + 45 * count)
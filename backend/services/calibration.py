@@ -0,0 +1,203 @@
+"""
+Zone cut-offs calibrated to zone capacity.
+
+A scoring profile in ``capacity`` threshold mode has no fixed A/B/C
+cut-offs. Instead each cut-off is the priority at the rank where the zones
+up to it run out of room, read off the SKU store's priority index. A zone
+holds as many SKUs as the rack model places there (services/rack_model.py):
+its slots times `skus_per_slot`. While the catalog
+fits, the zones fill in order, A first. Once it overflows, every zone is
+over capacity by the same factor rather than everything spilling into D.
+SKUs tied on a boundary priority all land in the higher zone.
+
+After every SKU write `CALIBRATOR.recalibrate` looks up the boundary
+priorities again (one index lookup per cut-off). If a cut-off moved, only
+the SKUs whose priority lies between its old and new value are re-zoned,
+so the thresholds follow the distribution without rescanning the table.
+"""
+import contextlib
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.services.live_layout import LIVE_LAYOUT
+from backend.services.priority_calculator import (
+    DEFAULT_ZONE,
+    ZONE_THRESHOLDS,
+    active_formula,
+    calculate_priority_batch,
+    priority_to_zone_batch,
+    set_active_formula,
+)
+from backend.services.rack_model import slot_grid
+from backend.services.sku_store import SKU_STORE
+
+ZONE_LABELS = [zone for _, zone in ZONE_THRESHOLDS] + [DEFAULT_ZONE]
+# Smallest step between stored priorities (calculate_priority rounds to 4 places).
+PRIORITY_STEP = 1e-4
+
+
+def zone_capacities(grid: Dict[str, Any]) -> Dict[str, int]:
+    """SKUs each zone label holds in the rack slot grid (slots times
+    `skus_per_slot`); 0 for labels without a zone."""
+    per_slot = int(grid["config"]["skus_per_slot"])
+    slots = np.bincount(grid["zone"], minlength=len(grid["zone_ids"]))
+    held = {zone_id: int(count) * per_slot for zone_id, count in zip(grid["zone_ids"], slots.tolist())}
+    return {label: held.get(label, 0) for label in ZONE_LABELS}
+
+
+def boundary_ranks(capacities: Sequence[int], total: int) -> List[int]:
+    """SKUs that belong in the zones up to each cut-off (A, A+B, A+B+C)."""
+    scale = max(1.0, total / max(sum(capacities), 1))
+    return [min(total, int(round(slots * scale))) for slots in np.cumsum(capacities)[:-1]]
+
+
+def capacity_cutoffs(
+    priorities_at: Callable[[List[int]], List[Optional[float]]], total: int, grid: Dict[str, Any]
+) -> Optional[List[float]]:
+    """Cut-offs that fill each zone to its capacity, given the priority at
+    1-based ranks; None for an empty catalog."""
+    if total == 0:
+        return None
+    ranks = boundary_ranks(list(zone_capacities(grid).values()), total)
+    values = priorities_at([max(rank, 1) for rank in ranks])
+    # A boundary at rank 0 admits nobody: cut just above the top priority.
+    return [
+        value if rank else min(1.0, round(value + PRIORITY_STEP, 4))
+        for rank, value in zip(ranks, values)
+    ]
+
+
+def cutoffs_for_weights(db: Session, weights: Sequence[float]) -> Optional[List[float]]:
+    """Capacity cut-offs if every SKU were scored with `weights`: one pass
+    over the store's metric columns, used when such a profile is activated."""
+    columns = SKU_STORE.columns(db, ("f", "w", "s", "i"))
+    priorities = np.sort(
+        calculate_priority_batch(columns["f"], columns["w"], columns["s"], columns["i"], weights=weights)
+    )[::-1]
+    return capacity_cutoffs(
+        lambda ranks: priorities[np.array(ranks) - 1].tolist(), int(priorities.size), slot_grid()
+    )
+
+
+class ZoneCalibrator:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._paused = 0
+        self._last: Optional[Dict[str, Any]] = None
+
+    @contextlib.contextmanager
+    def paused(self) -> Iterator[None]:
+        """No recalibration meanwhile, e.g. while a recompute zones every row
+        with fixed cut-offs."""
+        with self._lock:
+            self._paused += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._paused -= 1
+
+    def recalibrate(
+        self, db: Session, previous: Optional[Sequence[float]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Move the active capacity profile's cut-offs to the current
+        distribution and re-zone the SKUs they passed. `previous` are the
+        cut-offs the stored zones follow (the active ones by default).
+        Returns a summary, or None if nothing moved."""
+        with self._lock:
+            formula = active_formula()
+            if formula["threshold_mode"] != "capacity" or self._paused:
+                return None
+            started = time.perf_counter()
+            total = SKU_STORE.count(db)
+            cutoffs = capacity_cutoffs(
+                lambda ranks: SKU_STORE.priorities_at(None, ranks), total, slot_grid()
+            )
+            current = [cut for cut, _ in formula["thresholds"]]
+            previous = list(previous) if previous is not None else current
+            if cutoffs is None or (cutoffs == previous and cutoffs == current):
+                return None
+
+            # Stored zones follow `previous`, so only SKUs between an old and
+            # a new cut-off can change zone.
+            affected: Dict[int, int] = {}
+            band: Dict[str, List[Any]] = {"id": [], "sku_code": [], "zone": [], "priority": []}
+            for old, new in zip(previous, cutoffs):
+                if old == new:
+                    continue
+                rows = SKU_STORE.priority_band(None, min(old, new), max(old, new))
+                for position, item_id in enumerate(rows["id"]):
+                    if item_id not in affected:
+                        affected[item_id] = len(band["id"])
+                        for name in band:
+                            band[name].append(rows[name][position])
+            zones = priority_to_zone_batch(band["priority"], cutoffs=cutoffs).tolist()
+            changed = [
+                position for position, zone in enumerate(zones) if zone != band["zone"][position]
+            ]
+
+            table = models.SKUItem.__table__
+            if changed:
+                db.execute(
+                    update(table).where(table.c.id == bindparam("row_id")).values(zone=bindparam("new_zone")),
+                    [{"row_id": band["id"][position], "new_zone": zones[position]} for position in changed],
+                )
+            profile_table = models.ScoringProfile.__table__
+            db.execute(
+                update(profile_table)
+                .where(profile_table.c.id == formula["profile_id"])
+                .values(threshold_a=cutoffs[0], threshold_b=cutoffs[1], threshold_c=cutoffs[2])
+            )
+            db.commit()
+            set_active_formula(
+                formula["weights"], cutoffs, formula["profile_id"], formula["profile_version"], "capacity"
+            )
+            if changed:
+                LIVE_LAYOUT.record_bulk_write(
+                    db,
+                    [{"sku_code": band["sku_code"][position], "zone": zones[position]} for position in changed],
+                )
+            self._last = {
+                "previous": previous,
+                "thresholds": cutoffs,
+                "examined": len(band["id"]),
+                "rezoned": len(changed),
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            }
+            if changed:
+                print(
+                    f"[CALIBRATE] Cut-offs {previous} -> {cutoffs}: {len(changed)} SKUs re-zoned "
+                    f"in {self._last['elapsed_ms']} ms"
+                )
+            return self._last
+
+    def status(self, db: Session) -> Dict[str, Any]:
+        formula = active_formula()
+        total = SKU_STORE.count(db)
+        capacities = zone_capacities(slot_grid())
+        ranks = [0] + boundary_ranks(list(capacities.values()), total) + [total]
+        counts = SKU_STORE.zone_counts(None)
+        return {
+            "mode": formula["threshold_mode"],
+            "profile_id": formula["profile_id"],
+            "thresholds": [cut for cut, _ in formula["thresholds"]],
+            "skus": total,
+            "zones": {
+                label: {
+                    "capacity": capacities[label],
+                    "target": ranks[position + 1] - ranks[position],
+                    "count": counts.get(label, 0),
+                }
+                for position, label in enumerate(ZONE_LABELS)
+            },
+            "last": self._last,
+        }
+
+
+CALIBRATOR = ZoneCalibrator()
@@ -0,0 +1,358 @@
+"""
+Background optimization jobs.
+
+Submitting a job stores an `optimization_jobs` row and returns at once. The
+work runs on a bounded thread pool:
+
+- ``optimize`` jobs run the optimize flow on the thread (they mostly wait on
+  the OpenAI API);
+- ``solve`` jobs hand the CPU-bound slot solver to a process pool, so it does
+  not hold the GIL against request handlers;
+- ``rescore`` jobs re-score stored SKUs with a scoring profile, writing as
+  they go (see services/scoring.py).
+
+Progress events (stage, fraction, partial results) are kept in memory per
+job and streamed by the SSE endpoint. The row is updated on every stage
+change, and the final result is stored as JSON so it can be fetched or
+applied later without recomputing.
+"""
+import json
+import multiprocessing
+import os
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.database import SessionLocal
+from backend.services.live_layout import LIVE_LAYOUT
+from backend.services.optimizer import optimize_layout
+from backend.services.scoring import mark_recompute_failed, recompute_profile
+from backend.services.slot_solver import solve_layout
+
+JOB_KINDS = ("optimize", "solve", "rescore")
+TERMINAL_STATUSES = ("succeeded", "failed")
+JOB_WORKERS = int(os.environ.get("OPTIMIZE_JOB_WORKERS", "2"))
+SOLVER_PROCESSES = int(os.environ.get("SOLVER_PROCESSES", "2"))
+MAX_PENDING_JOBS = int(os.environ.get("MAX_PENDING_JOBS", "32"))
+EVENT_LOG_SIZE = 500
+# Jobs whose event logs are kept in memory.
+TRACKED_JOBS = 256
+APPLY_CHUNK_SIZE = 500
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+def _solve_in_process(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Process pool entry point: its own session against the same database."""
+    db = SessionLocal()
+    try:
+        return solve_layout(db, params.get("mode", "zone"), params.get("zone_overrides"))
+    finally:
+        db.close()
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() + "Z" if value else None
+
+
+def job_summary(job: models.OptimizationJob) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": round(job.progress or 0.0, 3),
+        "error": job.error,
+        "created_at": _timestamp(job.created_at),
+        "started_at": _timestamp(job.started_at),
+        "finished_at": _timestamp(job.finished_at),
+        "applied_at": _timestamp(job.applied_at),
+    }
+
+
+class JobRunner:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        workers: int = JOB_WORKERS,
+        processes: int = SOLVER_PROCESSES,
+        max_pending: int = MAX_PENDING_JOBS,
+    ) -> None:
+        self._session_factory = session_factory
+        self._workers = workers
+        self._processes = processes
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._events: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._next_event: Dict[str, int] = {}
+
+    # ----------------------------------------------------------- pools
+    def _threads(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=self._workers, thread_name_prefix="job"
+                )
+            return self._thread_pool
+
+    def _solver_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._process_pool is None:
+                # spawn: forking a process that runs threads is not safe.
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self._processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._process_pool
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pools = [self._thread_pool, self._process_pool]
+            self._thread_pool = self._process_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    # ----------------------------------------------------------- events
+    def _emit(self, job_id: str, event: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            if job_id not in self._events and len(self._events) >= TRACKED_JOBS:
+                # Forget the oldest job; its stream falls back to the stored row.
+                oldest = next(iter(self._events))
+                del self._events[oldest]
+                self._next_event.pop(oldest, None)
+            log = self._events.setdefault(job_id, deque(maxlen=EVENT_LOG_SIZE))
+            number = self._next_event.get(job_id, 0)
+            self._next_event[job_id] = number + 1
+            log.append({"id": number, "event": event, "data": data})
+
+    def events_since(self, job_id: str, after: int = -1) -> Optional[List[Dict[str, Any]]]:
+        """Events of a job numbered above `after`; None if this process has
+        no event log for it (unknown job or submitted before a restart)."""
+        with self._lock:
+            log = self._events.get(job_id)
+            if log is None:
+                return None
+            return [event for event in log if event["id"] > after]
+
+    # ----------------------------------------------------------- jobs
+    def _update(self, job_id: str, **fields: Any) -> None:
+        with self._session_factory() as db:
+            db.query(models.OptimizationJob).filter(models.OptimizationJob.id == job_id).update(
+                fields, synchronize_session=False
+            )
+            db.commit()
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"kind must be one of {', '.join(JOB_KINDS)}")
+        with self._lock:
+            if self._pending >= self._max_pending:
+                raise JobQueueFull(f"{self._pending} jobs already pending")
+            self._pending += 1
+        job_id = uuid.uuid4().hex
+        try:
+            with self._session_factory() as db:
+                job = models.OptimizationJob(
+                    id=job_id, kind=kind, status="queued", stage="queued", progress=0.0,
+                    request=json.dumps(params),
+                )
+                db.add(job)
+                db.commit()
+                summary = job_summary(job)
+            self._emit(job_id, "status", {"status": "queued", "stage": "queued", "progress": 0.0})
+            self._threads().submit(self._run, job_id, kind, params)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        print(f"[JOBS] {kind} job {job_id} queued")
+        return summary
+
+    def _run(self, job_id: str, kind: str, params: Dict[str, Any]) -> None:
+        last_stage = [None]
+
+        def progress(stage: str, fraction: float, partial: Optional[Dict[str, Any]] = None) -> None:
+            self._emit(
+                job_id, "progress", {"stage": stage, "progress": round(fraction, 3), "partial": partial}
+            )
+            if stage != last_stage[0]:
+                last_stage[0] = stage
+                self._update(job_id, stage=stage, progress=fraction)
+
+        try:
+            self._update(job_id, status="running", stage="started", started_at=datetime.utcnow())
+            self._emit(job_id, "status", {"status": "running", "stage": "started", "progress": 0.0})
+            if kind == "solve":
+                progress("solving", 0.1)
+                result = self._solver_pool().submit(_solve_in_process, params).result()
+            elif kind == "rescore":
+                with self._session_factory() as db:
+                    try:
+                        result = recompute_profile(db, params["profile_id"], progress=progress)
+                    except Exception:
+                        mark_recompute_failed(db, params["profile_id"])
+                        raise
+            else:
+                with self._session_factory() as db:
+                    result = optimize_layout(db, progress=progress, **params)
+            self._update(
+                job_id,
+                status="succeeded",
+                stage="done",
+                progress=1.0,
+                result=json.dumps(result),
+                finished_at=datetime.utcnow(),
+            )
+            self._emit(job_id, "status", {"status": "succeeded", "stage": "done", "progress": 1.0})
+            print(f"[JOBS] {kind} job {job_id} succeeded")
+        except Exception as exc:  # the job records any failure instead of raising
+            self._update(
+                job_id, status="failed", stage="failed", error=str(exc), finished_at=datetime.utcnow()
+            )
+            self._emit(job_id, "status", {"status": "failed", "stage": "failed", "error": str(exc)})
+            print(f"[JOBS] {kind} job {job_id} failed: {exc}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": self._pending,
+                "max_pending": self._max_pending,
+                "workers": self._workers,
+                "solver_processes": self._processes,
+            }
+
+
+JOBS = JobRunner()
+
+
+def recover_interrupted(db: Session) -> int:
+    """Fail jobs a previous process left queued or running."""
+    count = (
+        db.query(models.OptimizationJob)
+        .filter(models.OptimizationJob.status.in_(("queued", "running")))
+        .update(
+            {"status": "failed", "stage": "failed", "error": "interrupted by a server restart",
+             "finished_at": datetime.utcnow()},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return count
+
+
+def get_job(db: Session, job_id: str) -> models.OptimizationJob:
+    job = db.query(models.OptimizationJob).filter(models.OptimizationJob.id == job_id).first()
+    if job is None:
+        raise LookupError(f"job {job_id} not found")
+    return job
+
+
+def list_jobs(db: Session, limit: int = 50, status: Optional[str] = None) -> List[Dict[str, Any]]:
+    query = db.query(models.OptimizationJob)
+    if status:
+        query = query.filter(models.OptimizationJob.status == status)
+    jobs = query.order_by(models.OptimizationJob.created_at.desc()).limit(limit).all()
+    return [job_summary(job) for job in jobs]
+
+
+def job_result(db: Session, job_id: str) -> Dict[str, Any]:
+    job = get_job(db, job_id)
+    if job.status != "succeeded":
+        raise ValueError(f"job is {job.status}, no result yet")
+    return json.loads(job.result)
+
+
+def _target_zones(kind: str, result: Dict[str, Any]) -> Dict[str, str]:
+    if kind == "optimize":
+        return {
+            entry["sku_code"]: entry["recommended_zone"]
+            for entry in result.get("assistant_reassignments", [])
+            if isinstance(entry, dict)
+        }
+    return {entry["sku_code"]: entry["zone"] for entry in result.get("placements", [])}
+
+
+def apply_job(db: Session, job_id: str) -> Dict[str, Any]:
+    """Write a finished job's zone assignments to the SKU table.
+
+    Optimize jobs apply their reassignments; solve jobs apply the zone of
+    every placement (only ``global`` mode changes zones). Slot positions are
+    derived from zones and priority, so nothing else is stored.
+    """
+    job = get_job(db, job_id)
+    if job.kind == "rescore":
+        raise ValueError("rescore jobs write their results as they run")
+    if job.status != "succeeded":
+        raise ValueError(f"job is {job.status}; only succeeded jobs can be applied")
+    if job.applied_at is not None:
+        raise ValueError(f"job was already applied at {_timestamp(job.applied_at)}")
+
+    targets = _target_zones(job.kind, json.loads(job.result))
+    current: Dict[str, str] = {}
+    codes = list(targets)
+    for start in range(0, len(codes), APPLY_CHUNK_SIZE):
+        chunk = codes[start : start + APPLY_CHUNK_SIZE]
+        rows = (
+            db.query(models.SKUItem.sku_code, models.SKUItem.zone)
+            .filter(models.SKUItem.sku_code.in_(chunk))
+            .all()
+        )
+        current.update({code: zone for code, zone in rows})
+
+    changes: Dict[str, List[str]] = {}
+    for code, zone in targets.items():
+        if code in current and current[code] != zone:
+            changes.setdefault(zone, []).append(code)
+    updated = 0
+    for zone, zone_codes in changes.items():
+        for start in range(0, len(zone_codes), APPLY_CHUNK_SIZE):
+            chunk = zone_codes[start : start + APPLY_CHUNK_SIZE]
+            updated += (
+                db.query(models.SKUItem)
+                .filter(models.SKUItem.sku_code.in_(chunk))
+                .update({models.SKUItem.zone: zone}, synchronize_session=False)
+            )
+    job.applied_at = datetime.utcnow()
+    db.commit()
+    if updated:
+        LIVE_LAYOUT.record_bulk_write(
+            db,
+            [{"sku_code": code, "zone": zone} for zone, zone_codes in changes.items() for code in zone_codes],
+        )
+    print(f"[JOBS] Applied job {job_id}: {updated} SKUs changed zone")
+    return {
+        "job": job_summary(job),
+        "updated": updated,
+        "unchanged": len(current) - updated,
+        "missing": len(targets) - len(current),
+    }
+
+
+def sse_events(events: List[Dict[str, Any]]) -> str:
+    """Server-sent events wire format."""
+    return "".join(
+        f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+        for event in events
+    )
+
+
+def is_finished(events: List[Dict[str, Any]]) -> bool:
+    return any(
+        event["event"] == "status" and event["data"].get("status") in TERMINAL_STATUSES
+        for event in events
+    )
@@ -1,110 +1,189 @@
+import asyncio
 import json
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from backend import models
+from backend.services.sku_store import SKU_STORE
 
 _LAYOUT_PATH = Path(__file__).resolve().parent / ".." / "layouts" / "layout.json"
 
+# Configuration for cell numbering
+BLOCK_ROWS = 2
+BLOCK_COLS = 2
+_CELL_MAPPING = [1, 3, 2, 4]
+
+# Parsed layout.json, reused until the file's mtime changes.
+_layout_cache: Tuple[int, Optional[Dict]] = (0, None)
+
+
+def layout_path() -> Path:
+    return _LAYOUT_PATH.resolve()
+
+
+def layout_mtime_ns() -> int:
+    try:
+        return layout_path().stat().st_mtime_ns
+    except OSError:
+        return 0
+
 
 def _load_layout() -> Dict:
-    with _LAYOUT_PATH.resolve().open("r", encoding="utf-8") as handle:
-        return json.load(handle)
+    global _layout_cache
+    path = layout_path()
+    mtime = path.stat().st_mtime_ns
+    cached_mtime, cached = _layout_cache
+    if cached is not None and cached_mtime == mtime:
+        return cached
+    with path.open("r", encoding="utf-8") as handle:
+        layout = json.load(handle)
+    _layout_cache = (mtime, layout)
+    return layout
 
 
-def generate_layout(
-    db: Session, zone_overrides: Optional[Dict[str, str]] = None
-) -> Dict:
-    layout = _load_layout()
-    warehouse = layout["warehouse"]
+def load_warehouse() -> Dict:
+    return _load_layout()["warehouse"]
 
-    items = (
-        db.query(models.SKUItem)
-        .order_by(models.SKUItem.priority.desc())
-        .all()
-    )
 
-    overrides = {k: v for k, v in (zone_overrides or {}).items() if v}
+def warehouse_summary(warehouse: Dict) -> Dict:
+    return {
+        "width_m": warehouse["width_m"],
+        "height_m": warehouse["height_m"],
+        "zones": warehouse["zones"],
+    }
+
+
+def position_id(zone_id: str, idx: int) -> str:
+    """Position ID: Zone-Block-Cell."""
+    # Block number (1-4, from top to bottom)
+    block_num = (idx // (BLOCK_COLS * BLOCK_ROWS)) + 1
+    # Cell number within block (1-4: top-left=1, top-right=3, bottom-left=2, bottom-right=4)
+    cell_in_block = idx % (BLOCK_COLS * BLOCK_ROWS)
+    # Mapping: 0->1, 1->3, 2->2, 3->4 (top-left, top-right, bottom-left, bottom-right)
+    cell_num = _CELL_MAPPING[cell_in_block]
+    return f"{zone_id}-{block_num}-{cell_num}"
+
+
+def parse_position_id(position_id: str) -> Tuple[str, int]:
+    """Inverse of `position_id`: "B-3-2" -> ("B", 9). Raises ValueError."""
+    try:
+        zone_id, block, cell = position_id.strip().rsplit("-", 2)
+        block_num, cell_num = int(block), int(cell)
+        cell_in_block = _CELL_MAPPING.index(cell_num)
+    except ValueError as exc:
+        raise ValueError(f"Invalid position_id '{position_id}'") from exc
+    if block_num < 1:
+        raise ValueError(f"Invalid position_id '{position_id}'")
+    return zone_id.upper(), (block_num - 1) * BLOCK_COLS * BLOCK_ROWS + cell_in_block
+
+
+def position_for(
+    zone_id: str, band_from: float, band_to: float, warehouse_height: float, idx: int
+) -> Dict:
+    """Position of the `idx`-th item (priority order) within a zone band."""
+    band_width = band_to - band_from
+    cols = max(1, int(band_width // 4))
+    rows = max(1, int(warehouse_height // 4))
+
+    col = idx % cols
+    row = idx // cols
+    x_m = band_from + (col + 0.5) * (band_width / max(1, cols))
+    y_m = (row + 0.5) * (warehouse_height / max(1, rows))
 
-    zone_bands: Dict[str, Dict[str, List[Dict]]] = {
-        zone["id"]: {"from": zone["from_m"], "to": zone["to_m"], "items": []}
-        for zone in warehouse["zones"]
+    return {
+        "position_id": position_id(zone_id, idx),
+        "x_m": round(x_m, 2),
+        "y_m": round(y_m, 2),
     }
 
-    for obj in items:
-        target_zone = overrides.get(obj.sku_code, obj.zone or "").upper()
-        if target_zone not in zone_bands:
-            fallback_zone = (obj.zone or "").upper()
-            target_zone = fallback_zone if fallback_zone in zone_bands else None
-        if not target_zone:
-            continue
 
-        zone_bands[target_zone]["items"].append(
-            {
-                "sku_code": obj.sku_code,
-                "product_name": obj.product_name,
-                "priority": obj.priority,
-                "zone": target_zone,
-                "f": obj.f,
-                "w": obj.w,
-                "s": obj.s,
-                "i": obj.i,
-            }
-        )
+def slot_coordinates(
+    band_from: float, band_to: float, warehouse_height: float, count: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized (x_m, y_m) of slots 0..count-1 in a band, as in `position_for`."""
+    band_width = band_to - band_from
+    cols = max(1, int(band_width // 4))
+    rows = max(1, int(warehouse_height // 4))
+    idx = np.arange(count)
+    x_m = band_from + (idx % cols + 0.5) * (band_width / cols)
+    y_m = (idx // cols + 0.5) * (warehouse_height / rows)
+    return np.round(x_m, 2), np.round(y_m, 2)
+
+
+def band_capacity(band_from: float, band_to: float, warehouse_height: float) -> int:
+    """Slots that fit inside a band before `position_for` overflows its height."""
+    return max(1, int((band_to - band_from) // 4)) * max(1, int(warehouse_height // 4))
+
+
+# (zone, band, height) -> position_for() of slots 0..n-1, grown on demand.
+_positions: Dict[Tuple[str, float, float, float], List[Dict]] = {}
+_positions_lock = threading.Lock()
+
+
+def zone_positions(
+    zone_id: str, band_from: float, band_to: float, warehouse_height: float, count: int
+) -> List[Dict]:
+    """`position_for` of the first `count` slots of a band, memoized."""
+    key = (zone_id, band_from, band_to, warehouse_height)
+    with _positions_lock:
+        positions = _positions.setdefault(key, [])
+        if len(positions) < count:
+            positions.extend(
+                position_for(zone_id, band_from, band_to, warehouse_height, idx)
+                for idx in range(len(positions), max(count, 2 * len(positions)))
+            )
+        return positions
 
-    placements = []
-    warehouse_width = warehouse["width_m"]
+
+def generate_layout(
+    db: Optional[Session], zone_overrides: Optional[Dict[str, str]] = None
+) -> Dict:
+    """Banded layout: each zone's SKUs in (priority DESC, id) order fill its
+    slots. The order comes pre-sorted from the SKU store's priority index
+    (`db` loads the store if needed; None when the caller already did)."""
+    warehouse = load_warehouse()
+    zone_ids = [zone["id"] for zone in warehouse["zones"]]
+    ranked = SKU_STORE.ranked_by_zone(db, zone_overrides, override_zones=zone_ids)
     warehouse_height = warehouse["height_m"]
-    
-    # Configuration for cell numbering
-    BLOCK_ROWS = 2
-    BLOCK_COLS = 2
-    ROW_COUNT = 4  # number of 2x2 blocks per zone vertically
-
-    for zone_id, band in zone_bands.items():
-        band_width = band["to"] - band["from"]
-        cols = max(1, int(band_width // 4))
-        rows = max(1, int(warehouse_height // 4))
-
-        for idx, entry in enumerate(band["items"]):
-            col = idx % cols
-            row = idx // cols
-            x_m = band["from"] + (col + 0.5) * (band_width / max(1, cols))
-            y_m = (row + 0.5) * (warehouse_height / max(1, rows))
-            
-            # Calculate position ID: Zone-Block-Cell
-            # Block number (1-4, from top to bottom)
-            block_num = (idx // (BLOCK_COLS * BLOCK_ROWS)) + 1
-            # Cell number within block (1-4: top-left=1, top-right=3, bottom-left=2, bottom-right=4)
-            cell_in_block = idx % (BLOCK_COLS * BLOCK_ROWS)
-            cell_row = cell_in_block // BLOCK_COLS
-            cell_col = cell_in_block % BLOCK_COLS
-            # Mapping: 0->1, 1->3, 2->2, 3->4 (top-left, top-right, bottom-left, bottom-right)
-            cell_mapping = [1, 3, 2, 4]
-            cell_num = cell_mapping[cell_in_block]
-            
-            position_id = f"{zone_id}-{block_num}-{cell_num}"
-            
-            placements.append(
-                {
-                    "sku_code": entry["sku_code"],
-                    "product_name": entry.get("product_name"),
-                    "priority": entry["priority"],
-                    "zone": zone_id,
-                    "position_id": position_id,
-                    "x_m": round(x_m, 2),
-                    "y_m": round(y_m, 2),
-                }
+
+    placements = []
+    counts = {}
+    empty = {"sku_code": [], "product_name": [], "priority": []}
+    for zone in warehouse["zones"]:
+        zone_id = zone["id"]
+        members = ranked.get(zone_id, empty)
+        count = len(members["sku_code"])
+        positions = zone_positions(zone_id, zone["from_m"], zone["to_m"], warehouse_height, count)
+        placements.extend(
+            {
+                "sku_code": sku_code,
+                "product_name": product_name,
+                "priority": priority,
+                "zone": zone_id,
+                **position,
+            }
+            for sku_code, product_name, priority, position in zip(
+                members["sku_code"], members["product_name"], members["priority"], positions
             )
+        )
+        counts[zone_id] = count
 
     return {
-        "warehouse": {
-            "width_m": warehouse_width,
-            "height_m": warehouse_height,
-            "zones": warehouse["zones"],
-        },
+        "warehouse": warehouse_summary(warehouse),
         "placements": placements,
-        "counts": {zone: len(data["items"]) for zone, data in zone_bands.items()},
+        "counts": counts,
     }
+
+
+async def generate_layout_async(
+    session: AsyncSession, zone_overrides: Optional[Dict[str, str]] = None
+) -> Dict:
+    """`generate_layout` loading the store through an async session; the
+    placement pass runs on a worker thread so it does not stall the event
+    loop."""
+    await SKU_STORE.ensure_loaded_async(session)
+    return await asyncio.to_thread(generate_layout, None, zone_overrides)
@@ -0,0 +1,71 @@
+"""
+Versioned cache for the default (no override) warehouse layout.
+
+Every SKU write bumps a process-wide data version. The cached layout is keyed
+by that version plus the layout file's mtime, and is stored already encoded as
+JSON so a cache hit skips both the database and serialization.
+"""
+import json
+import threading
+import uuid
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from backend.services.layout_builder import generate_layout, layout_mtime_ns
+
+_LOCK = threading.Lock()
+# Distinguishes ETags issued by different processes / restarts.
+_BOOT_ID = uuid.uuid4().hex[:8]
+_data_version = 0
+_cached_key: Optional[Tuple[int, int]] = None
+_cached_body: Optional[bytes] = None
+
+
+def bump_data_version() -> int:
+    """Mark SKU data as changed; call after every committed SKU write."""
+    global _data_version
+    with _LOCK:
+        _data_version += 1
+        return _data_version
+
+
+def data_version() -> int:
+    return _data_version
+
+
+def _etag(key: Tuple[int, int]) -> str:
+    return f'"{_BOOT_ID}-{key[0]}-{key[1]}"'
+
+
+def current_etag() -> str:
+    return _etag((_data_version, layout_mtime_ns()))
+
+
+def cached_layout() -> Optional[Tuple[bytes, str]]:
+    """The encoded layout and its ETag if the cache is fresh, else None."""
+    key = (_data_version, layout_mtime_ns())
+    with _LOCK:
+        if _cached_key == key and _cached_body is not None:
+            return _cached_body, _etag(key)
+    return None
+
+
+def get_layout(
+    db: Session, build: Callable[[Session], Dict] = generate_layout
+) -> Tuple[bytes, str]:
+    """Return the encoded default layout and its ETag, rebuilding if stale."""
+    global _cached_key, _cached_body
+
+    key = (_data_version, layout_mtime_ns())
+    with _LOCK:
+        if _cached_key == key and _cached_body is not None:
+            return _cached_body, _etag(key)
+
+    body = json.dumps(jsonable_encoder(build(db))).encode("utf-8")
+    with _LOCK:
+        # A write during the rebuild bumps the version, so an older key
+        # simply misses on the next call.
+        _cached_key, _cached_body = key, body
+    return body, _etag(key)
@@ -0,0 +1,438 @@
+"""
+Live per-zone placement index maintained incrementally from SKU writes.
+
+Each zone keeps its SKUs in a `SortedKeyList` ordered by (-priority, id),
+the same order `generate_layout` uses, so a SKU's slot is just its index in
+that list. A single add / update / delete is O(log n) to find and index the
+key plus a move of at most a couple of thousand keys inside one sublist (see
+`sorted_keys`), so its cost stays flat as a zone grows.
+
+Every write is recorded in a bounded change log as (version, zone, start,
+end): the index range whose occupants shifted (`end` is None when everything
+after `start` shifted). `changes(since)` replays that log to return only the
+placements that moved.
+
+Slot coordinates are static, so a `SlotIndex` built once per layout.json
+answers spatial queries; occupancy is read from the zone lists, which keeps
+`nearest`/`within` in sync with every write without extra bookkeeping.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.services.layout_builder import (
+    layout_mtime_ns,
+    load_warehouse,
+    parse_position_id,
+    position_for,
+    position_id,
+    warehouse_summary,
+)
+from backend.services.layout_cache import bump_data_version, data_version
+from backend.services.sku_store import SKU_STORE
+from backend.services.slot_solver import gate_point
+from backend.services.sorted_keys import SortedKeyList
+from backend.services.spatial_index import SlotIndex
+
+CHANGE_LOG_SIZE = 10000
+
+_Key = Tuple[float, int]
+
+
+class LiveLayout:
+    def __init__(self, change_log_size: int = CHANGE_LOG_SIZE) -> None:
+        self._lock = threading.RLock()
+        self._change_log_size = change_log_size
+        self._loaded = False
+        # Oldest version `changes()` can answer incrementally from.
+        self._floor_version = 0
+        self._layout_mtime = 0
+        # SKU_STORE.foreign_reloads the index was built against.
+        self._store_reloads = 0
+        self._warehouse: Dict[str, Any] = {}
+        self._bands: Dict[str, Tuple[float, float]] = {}
+        self._zones: Dict[str, SortedKeyList] = {}
+        self._items: Dict[int, Dict[str, Any]] = {}
+        self._codes: Dict[str, int] = {}
+        self._changes: Deque[Tuple[int, str, int, Optional[int]]] = deque()
+        self._removed: Deque[Tuple[int, str]] = deque()
+        self._slots: Optional[SlotIndex] = None
+
+    # ------------------------------------------------------------------ load
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded = False
+
+    def _ensure_loaded(self, db: Session) -> None:
+        # Lets the store notice writes from other processes.
+        SKU_STORE.ensure_loaded(db)
+        if (
+            self._loaded
+            and self._layout_mtime == layout_mtime_ns()
+            and self._store_reloads == SKU_STORE.foreign_reloads
+        ):
+            return
+
+        skus = SKU_STORE.columns(db, ("id", "priority"))
+
+        self._layout_mtime = layout_mtime_ns()
+        self._store_reloads = SKU_STORE.foreign_reloads
+        self._warehouse = load_warehouse()
+        self._bands = {
+            zone["id"]: (zone["from_m"], zone["to_m"]) for zone in self._warehouse["zones"]
+        }
+        zone_keys: Dict[str, List[_Key]] = {zone_id: [] for zone_id in self._bands}
+        self._slots = SlotIndex(self._warehouse)
+        self._items = {}
+        self._codes = {}
+        for item_id, sku_code, product_name, priority, zone in zip(
+            skus["id"].tolist(),
+            skus["sku_code"],
+            skus["product_name"],
+            skus["priority"].tolist(),
+            skus["zone"].tolist(),
+        ):
+            item = self._make_item(item_id, sku_code, product_name, priority, zone)
+            self._items[item_id] = item
+            self._codes[sku_code] = item_id
+            if item["zone"] in zone_keys:
+                # Rows arrive in key order, so appending keeps every zone sorted.
+                zone_keys[item["zone"]].append(item["key"])
+        self._zones = {zone_id: SortedKeyList(keys) for zone_id, keys in zone_keys.items()}
+
+        if self._loaded:
+            # layout.json or another process's SKU writes changed under a
+            # loaded index: every position may have moved, so clients (and
+            # the layout cache) must take a full snapshot.
+            bump_data_version()
+        self._changes.clear()
+        self._removed.clear()
+        self._floor_version = data_version()
+        self._loaded = True
+
+    def sync(self, db: Session) -> None:
+        """Reload if the layout file or another process changed the data."""
+        with self._lock:
+            self._ensure_loaded(db)
+
+    @staticmethod
+    def _make_item(
+        item_id: int,
+        sku_code: str,
+        product_name: Optional[str],
+        priority: Optional[float],
+        zone: Optional[str],
+    ) -> Dict[str, Any]:
+        priority = priority or 0.0
+        return {
+            "id": item_id,
+            "sku_code": sku_code,
+            "product_name": product_name,
+            "priority": priority,
+            "zone": (zone or "").upper(),
+            "key": (-priority, item_id),
+        }
+
+    # ---------------------------------------------------------- maintenance
+    def _log_change(
+        self, version: int, zone: str, start: int, end: Optional[int] = None
+    ) -> None:
+        if len(self._changes) >= self._change_log_size:
+            self._floor_version = max(self._floor_version, self._changes.popleft()[0])
+        self._changes.append((version, zone, start, end))
+
+    def _log_removed(self, version: int, sku_code: str) -> None:
+        if len(self._removed) >= self._change_log_size:
+            self._floor_version = max(self._floor_version, self._removed.popleft()[0])
+        self._removed.append((version, sku_code))
+
+    def _detach(self, item: Dict[str, Any]) -> Optional[int]:
+        keys = self._zones.get(item["zone"])
+        if keys is None:
+            return None
+        return keys.remove(item["key"])
+
+    def _attach(self, item: Dict[str, Any]) -> Optional[int]:
+        keys = self._zones.get(item["zone"])
+        if keys is None:
+            return None
+        return keys.add(item["key"])
+
+    def record_saved(self, obj: models.SKUItem) -> int:
+        """Bump the data version and apply an added or updated SKU."""
+        with self._lock:
+            version = bump_data_version()
+            SKU_STORE.record_saved(obj)
+            if not self._loaded:
+                return version
+
+            item = self._make_item(obj.id, obj.sku_code, obj.product_name, obj.priority, obj.zone)
+            previous = self._items.get(obj.id)
+            old_index = None
+            if previous is not None:
+                old_index = self._detach(previous)
+                if previous["sku_code"] != item["sku_code"]:
+                    self._codes.pop(previous["sku_code"], None)
+                    self._log_removed(version, previous["sku_code"])
+            self._items[obj.id] = item
+            self._codes[item["sku_code"]] = obj.id
+            new_index = self._attach(item)
+
+            if old_index is not None and new_index is not None and previous["zone"] == item["zone"]:
+                # A move inside one zone only shifts the items between both slots.
+                self._log_change(
+                    version, item["zone"], min(old_index, new_index), max(old_index, new_index) + 1
+                )
+            else:
+                if old_index is not None:
+                    self._log_change(version, previous["zone"], old_index)
+                if new_index is not None:
+                    self._log_change(version, item["zone"], new_index)
+            return version
+
+    def record_deleted(self, item_id: int) -> int:
+        """Bump the data version and drop a deleted SKU."""
+        with self._lock:
+            version = bump_data_version()
+            SKU_STORE.record_deleted(item_id)
+            if not self._loaded:
+                return version
+
+            previous = self._items.pop(item_id, None)
+            if previous is not None:
+                index = self._detach(previous)
+                if index is not None:
+                    self._log_change(version, previous["zone"], index)
+                self._codes.pop(previous["sku_code"], None)
+                self._log_removed(version, previous["sku_code"])
+            return version
+
+    def record_bulk_write(
+        self, db: Optional[Session] = None, rows: Optional[List[Dict[str, Any]]] = None
+    ) -> int:
+        """Bump the data version after a multi-row write; forces a reload.
+
+        With the written `rows` (keyed by sku_code; `db` looks up the ids of
+        new SKUs) the SKU store is updated in place and the reload reads from
+        it; without them the store reloads from the database as well.
+        """
+        with self._lock:
+            version = bump_data_version()
+            if rows is not None:
+                SKU_STORE.record_rows(db, rows)
+            else:
+                SKU_STORE.invalidate()
+            self._loaded = False
+            return version
+
+    # --------------------------------------------------------------- reads
+    def _placement(self, zone_id: str, index: int, key: _Key) -> Dict[str, Any]:
+        item = self._items[key[1]]
+        band_from, band_to = self._bands[zone_id]
+        return {
+            "sku_code": item["sku_code"],
+            "product_name": item["product_name"],
+            "priority": item["priority"],
+            "zone": zone_id,
+            **position_for(zone_id, band_from, band_to, self._warehouse["height_m"], index),
+        }
+
+    def _zone_placements(
+        self, zone_id: str, start: int = 0, end: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        keys = self._zones[zone_id].islice(start, end)
+        return [self._placement(zone_id, idx, key) for idx, key in enumerate(keys, start)]
+
+    def _counts(self) -> Dict[str, int]:
+        return {zone_id: len(keys) for zone_id, keys in self._zones.items()}
+
+    def full_layout(self, db: Session) -> Dict[str, Any]:
+        """Same shape as `generate_layout(db)`, built from the live index."""
+        with self._lock:
+            self._ensure_loaded(db)
+            placements: List[Dict[str, Any]] = []
+            for zone_id in self._zones:
+                placements.extend(self._zone_placements(zone_id))
+            return {
+                "warehouse": warehouse_summary(self._warehouse),
+                "placements": placements,
+                "counts": self._counts(),
+            }
+
+    def changes(self, db: Session, since: Optional[int]) -> Dict[str, Any]:
+        """Placements whose position changed after data version `since`.
+
+        Falls back to a full snapshot (`full: true`) when `since` is missing
+        or older than the retained change log.
+        """
+        with self._lock:
+            self._ensure_loaded(db)
+            version = data_version()
+
+            if since is None or since < self._floor_version or since > version:
+                layout = self.full_layout(db)
+                layout.update({"version": version, "full": True, "removed": []})
+                return layout
+
+            ranges: Dict[str, List[Tuple[int, int]]] = {}
+            for change_version, zone_id, start, end in self._changes:
+                if change_version > since:
+                    zone_size = len(self._zones[zone_id])
+                    ranges.setdefault(zone_id, []).append(
+                        (start, zone_size if end is None else min(end, zone_size))
+                    )
+
+            placements: List[Dict[str, Any]] = []
+            for zone_id, zone_ranges in ranges.items():
+                for start, end in _merge_ranges(zone_ranges):
+                    placements.extend(self._zone_placements(zone_id, start, end))
+
+            removed = sorted(
+                {
+                    code
+                    for removed_version, code in self._removed
+                    if removed_version > since and code not in self._codes
+                }
+            )
+            return {
+                "version": version,
+                "full": False,
+                "placements": placements,
+                "removed": removed,
+                "counts": self._counts(),
+            }
+
+    # -------------------------------------------------------------- spatial
+    def _origin(
+        self,
+        x_m: Optional[float],
+        y_m: Optional[float],
+        position: Optional[str],
+        sku_code: Optional[str],
+    ) -> Tuple[float, float]:
+        """Query point from coordinates, a position_id, a SKU code, or the gate."""
+        if position:
+            zone_id, idx = parse_position_id(position)
+            if zone_id not in self._zones:
+                raise ValueError(f"Unknown zone in position_id '{position}'")
+            return self._slots.coordinates(zone_id, idx)
+        if sku_code:
+            item_id = self._codes.get(sku_code)
+            item = self._items.get(item_id) if item_id is not None else None
+            if item is None or item["zone"] not in self._zones:
+                raise LookupError(f"SKU '{sku_code}' is not placed")
+            keys = self._zones[item["zone"]]
+            return self._slots.coordinates(item["zone"], keys.bisect_left(item["key"]))
+        if x_m is not None and y_m is not None:
+            return x_m, y_m
+        if x_m is not None or y_m is not None:
+            raise ValueError("Both x_m and y_m are required")
+        return gate_point(self._warehouse)
+
+    def _slot_filter(self, state: str):
+        capacity = self._slots.capacity
+        sizes = self._counts()
+        if state == "free":
+            return lambda zone_id, idx: sizes[zone_id] <= idx < capacity[zone_id]
+        if state == "occupied":
+            return lambda zone_id, idx: idx < sizes[zone_id]
+        return lambda zone_id, idx: idx < max(sizes[zone_id], capacity[zone_id])
+
+    def _describe(self, distance: float, zone_id: str, idx: int) -> Dict[str, Any]:
+        x_m, y_m = self._slots.coordinates(zone_id, idx)
+        keys = self._zones[zone_id]
+        entry: Dict[str, Any] = {
+            "position_id": position_id(zone_id, idx),
+            "zone": zone_id,
+            "x_m": x_m,
+            "y_m": y_m,
+            "distance_m": round(distance, 2),
+            "occupied": idx < len(keys),
+        }
+        if idx < len(keys):
+            item = self._items[keys[idx][1]]
+            entry.update(
+                {
+                    "sku_code": item["sku_code"],
+                    "product_name": item["product_name"],
+                    "priority": item["priority"],
+                }
+            )
+        return entry
+
+    def _spatial_query(self, db: Session, origin: Dict[str, Any], run) -> Dict[str, Any]:
+        with self._lock:
+            self._ensure_loaded(db)
+            for zone_id, keys in self._zones.items():
+                self._slots.ensure(zone_id, len(keys))
+            x_m, y_m = self._origin(**origin)
+            started = time.perf_counter()
+            hits = run(x_m, y_m)
+            query_ms = (time.perf_counter() - started) * 1000
+            return {
+                "origin": {"x_m": x_m, "y_m": y_m},
+                "version": data_version(),
+                "query_ms": round(query_ms, 3),
+                "results": [self._describe(*hit) for hit in hits],
+            }
+
+    def nearest(
+        self,
+        db: Session,
+        origin: Dict[str, Any],
+        state: str = "free",
+        zones: Optional[List[str]] = None,
+        k: int = 1,
+    ) -> Dict[str, Any]:
+        """The `k` slots closest to `origin` in the given occupancy `state`
+        (free, occupied or any). Free slots are inside the building only."""
+
+        def run(x_m: float, y_m: float):
+            candidates = zones or list(self._zones)
+            if state == "free":
+                # Full zones cannot contribute; skip them instead of scanning.
+                capacity = self._slots.capacity
+                candidates = [
+                    zone_id
+                    for zone_id in candidates
+                    if zone_id in self._zones and len(self._zones[zone_id]) < capacity[zone_id]
+                ]
+            if not candidates:
+                return []
+            return self._slots.nearest(x_m, y_m, self._slot_filter(state), k, candidates)
+
+        return self._spatial_query(db, origin, run)
+
+    def within(
+        self,
+        db: Session,
+        origin: Dict[str, Any],
+        radius_m: float,
+        state: str = "occupied",
+        zones: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Slots within `radius_m` of `origin`, nearest first."""
+        return self._spatial_query(
+            db,
+            origin,
+            lambda x_m, y_m: self._slots.within(x_m, y_m, radius_m, self._slot_filter(state), zones),
+        )
+
+
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+LIVE_LAYOUT = LiveLayout()
@@ -0,0 +1,572 @@
+"""
+Metric history and smoothed trends per SKU.
+
+Every SKU write appends one observation (raw f/w/s/i, priority, zone) to an
+in-memory buffer. The buffer goes to the append-only
+``sku_metric_history`` table in one executemany insert once it holds
+`HISTORY_BATCH_ROWS` samples or its oldest sample is `HISTORY_FLUSH_S`
+seconds old. It is also flushed on shutdown, at the end of an import and
+before history is read.
+
+Trends are updated on ingest in columnar NumPy arrays, one row per tracked
+SKU, so nothing re-reads the history:
+
+- An EWMA of the raw metrics with a half-life of `HISTORY_HALFLIFE_DAYS`.
+  It is kept as a time-decayed sum and weight, so irregular and
+  simultaneous samples are weighted correctly. The smoothed priority is the
+  active formula applied to the EWMA, normalized with the active scale.
+  A sample submitted normalized (no raw values) enters the EWMA as the raw
+  values the active scale maps to its metrics; its history row keeps NULL.
+- The 7 and 30-day mean priority, from a ring of 30 daily (sum, count)
+  columns. When a new day starts, the column it reuses is zeroed once for
+  every SKU.
+
+The watcher keeps a smoothed zone per SKU with hysteresis. The zone only
+changes once the smoothed priority is past a zone boundary by
+`HISTORY_HYSTERESIS`. Re-slotting candidates are the SKUs whose smoothed
+zone differs from the zone they are stored in. Listing them is a mask over
+the arrays plus one store lookup per candidate. A new formula, cut-off or
+scale re-evaluates every tracked SKU from the arrays on the next read.
+
+The running state is written to ``sku_metric_trends`` with each batch. On
+load, the daily windows are rebuilt from the last 30 days of history with
+one grouped query. Like the SKU store, the state is process-local: writes
+made by another process are seen after a restart.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.services.normalization import METRICS, RAW_FIELDS, metric_scale, scale_version
+from backend.services.priority_calculator import (
+    DEFAULT_ZONE,
+    ZONE_THRESHOLDS,
+    active_formula,
+    calculate_priority_batch,
+)
+from backend.services.sku_store import SKU_STORE
+
+HISTORY_BATCH_ROWS = int(os.environ.get("HISTORY_BATCH_ROWS", "1000"))
+HISTORY_FLUSH_S = float(os.environ.get("HISTORY_FLUSH_S", "5"))
+HISTORY_HALFLIFE_DAYS = float(os.environ.get("HISTORY_HALFLIFE_DAYS", "3"))
+HISTORY_HYSTERESIS = float(os.environ.get("HISTORY_HYSTERESIS", "0.02"))
+WINDOW_DAYS = (7, 30)
+RING_DAYS = max(WINDOW_DAYS)
+DAY_S = 86400
+ZONE_LABELS = [zone for _, zone in ZONE_THRESHOLDS] + [DEFAULT_ZONE]
+# Zone code of SKUs without a smoothed zone yet, or stored outside A-D.
+_NO_ZONE = 255
+_ZONE_CODES = {zone: code for code, zone in enumerate(ZONE_LABELS)}
+DELETE_CHUNK_SIZE = 500
+_MIN_CAPACITY = 1024
+_EPOCH = datetime(1970, 1, 1)
+# Per-SKU state, one row per tracked SKU.
+_ARRAYS = (
+    "_samples", "_last", "_weight", "_sums", "_smoothed", "_smoothed_zone", "_zone",
+    "_crossed", "_window_sum", "_window_count",
+)
+
+
+def _to_datetime(seconds: float) -> datetime:
+    return _EPOCH + timedelta(seconds=seconds)
+
+
+def _to_epoch(value: datetime) -> float:
+    return (value - _EPOCH).total_seconds()
+
+
+def _isoformat(seconds: float) -> Optional[str]:
+    return None if np.isnan(seconds) else _to_datetime(float(seconds)).isoformat() + "Z"
+
+
+def _zone_codes(zones: Sequence[Optional[str]]) -> np.ndarray:
+    return np.array([_ZONE_CODES.get((zone or "").upper(), _NO_ZONE) for zone in zones], dtype=np.uint8)
+
+
+def _bands(cutoffs: Sequence[float]):
+    """Upper and lower priority bound per zone code (A first)."""
+    return np.array([np.inf, *cutoffs]), np.array([*cutoffs, -np.inf])
+
+
+class MetricHistory:
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._bind = None
+        self._buffer: List[Dict[str, Any]] = []
+        self._buffered_since: Optional[float] = None
+        self._dirty: set = set()
+        self._deleted: set = set()
+        self._totals = {
+            "samples": 0, "crossings": 0, "flushed": 0, "flushes": 0, "flush_ms": 0.0, "failed_flushes": 0,
+        }
+        self._load_ms = 0.0
+        self._reset(0)
+
+    def _reset(self, capacity: int) -> None:
+        self._size = 0
+        self._codes: List[str] = []
+        self._row_by_code: Dict[str, int] = {}
+        self._samples = np.zeros(capacity, dtype=np.int64)
+        self._last = np.zeros(capacity, dtype=np.float64)
+        self._weight = np.zeros(capacity, dtype=np.float64)
+        self._sums = np.zeros((capacity, len(METRICS)), dtype=np.float64)
+        self._smoothed = np.zeros(capacity, dtype=np.float64)
+        self._smoothed_zone = np.full(capacity, _NO_ZONE, dtype=np.uint8)
+        # Stored zone as of the SKU's last sample or the last re-evaluation.
+        self._zone = np.full(capacity, _NO_ZONE, dtype=np.uint8)
+        self._crossed = np.full(capacity, np.nan, dtype=np.float64)
+        # Daily priority sums and sample counts; column day % RING_DAYS holds
+        # that day while it is one of the last RING_DAYS days.
+        self._window_sum = np.zeros((capacity, RING_DAYS), dtype=np.float32)
+        self._window_count = np.zeros((capacity, RING_DAYS), dtype=np.uint16)
+        self._day = int(time.time() // DAY_S)
+        self._stamp = None
+
+    # ------------------------------------------------------------------ load
+    def ensure_loaded(self, db: Session) -> None:
+        with self._lock:
+            bind = db.get_bind()
+            if self._loaded and self._bind == bind.url:
+                return
+            self._load(db)
+            self._bind = bind.url
+            self._loaded = True
+
+    def _load(self, db: Session) -> None:
+        started = time.perf_counter()
+        trends = db.execute(select(models.SKUMetricTrend.__table__)).all()
+        self._reset(max(_MIN_CAPACITY, len(trends)))
+        self._buffer, self._buffered_since = [], None
+        self._dirty, self._deleted = set(), set()
+        for trend in trends:
+            row = self._append(trend.sku_code)
+            self._samples[row] = trend.samples
+            self._last[row] = _to_epoch(trend.last_at)
+            self._weight[row] = trend.weight
+            self._sums[row] = [getattr(trend, f"sum_{metric}") for metric in METRICS]
+            self._smoothed_zone[row] = _zone_codes([trend.smoothed_zone])[0]
+            if trend.crossed_at is not None:
+                self._crossed[row] = _to_epoch(trend.crossed_at)
+        if self._size:
+            self._day = max(self._day, int(self._last[: self._size].max() // DAY_S))
+
+        history = models.SKUMetricSample.__table__
+        windows = db.execute(
+            select(history.c.sku_code, history.c.day, func.sum(history.c.priority), func.count())
+            .where(history.c.day > self._day - RING_DAYS)
+            .group_by(history.c.sku_code, history.c.day)
+        )
+        for sku_code, day, total, count in windows:
+            row = self._row_by_code.get(sku_code)
+            if row is not None and day <= self._day:
+                self._window_sum[row, day % RING_DAYS] = total or 0.0
+                self._window_count[row, day % RING_DAYS] = min(count, np.iinfo(np.uint16).max)
+        self._zone[: self._size] = _zone_codes(SKU_STORE.zones_of(db, self._codes))
+        self._load_ms = (time.perf_counter() - started) * 1000
+        print(f"[HISTORY] Loaded the trends of {self._size} SKUs in {self._load_ms:.0f} ms")
+
+    def _grow(self) -> None:
+        capacity = max(_MIN_CAPACITY, 2 * len(self._samples))
+        for name in _ARRAYS:
+            old = getattr(self, name)
+            fill = _NO_ZONE if old.dtype == np.uint8 else (np.nan if name == "_crossed" else 0)
+            grown = np.full((capacity,) + old.shape[1:], fill, dtype=old.dtype)
+            grown[: self._size] = old[: self._size]
+            setattr(self, name, grown)
+
+    def _append(self, sku_code: str) -> int:
+        if self._size == len(self._samples):
+            self._grow()
+        row = self._size
+        self._size += 1
+        # The slot may hold a deleted SKU's values.
+        self._samples[row] = 0
+        self._last[row] = self._weight[row] = self._smoothed[row] = 0.0
+        self._sums[row] = 0.0
+        self._smoothed_zone[row] = self._zone[row] = _NO_ZONE
+        self._crossed[row] = np.nan
+        self._window_sum[row] = 0.0
+        self._window_count[row] = 0
+        self._codes.append(sku_code)
+        self._row_by_code[sku_code] = row
+        return row
+
+    def _advance(self, day: int) -> None:
+        """Make `day` the newest day of the window ring."""
+        if day <= self._day:
+            return
+        for passed in range(self._day + 1, min(day, self._day + RING_DAYS) + 1):
+            self._window_sum[:, passed % RING_DAYS] = 0.0
+            self._window_count[:, passed % RING_DAYS] = 0
+        self._day = day
+
+    # --------------------------------------------------------------- writes
+    def record_saved(self, db: Session, obj: models.SKUItem, at: Optional[float] = None) -> None:
+        """Record one added or updated SKU."""
+        self.record_rows(
+            db,
+            [{"sku_code": obj.sku_code, "priority": obj.priority, "zone": obj.zone,
+              **{field: getattr(obj, field) for field in METRICS + RAW_FIELDS}}],
+            at=at,
+        )
+
+    def record_rows(
+        self, db: Session, rows: Sequence[Dict[str, Any]], at: Optional[float] = None
+    ) -> None:
+        """Record rows written by a bulk upsert or import (sku_code, the
+        normalized and raw metrics, priority and zone), observed at epoch
+        seconds `at` (now by default)."""
+        if not rows:
+            return
+        with self._lock:
+            self.ensure_loaded(db)
+            now = time.time()
+            observed = now if at is None else at
+            day = int(observed // DAY_S)
+            self._advance(day)
+            recorded_at = _to_datetime(observed)
+            codes = [row["sku_code"] for row in rows]
+            raw = np.array([[row[field] for field in RAW_FIELDS] for row in rows], dtype=np.float64)
+            missing = np.isnan(raw)
+            if missing.any():
+                scale = metric_scale()
+                equivalent = np.array([[row[metric] * scale[metric] for metric in METRICS] for row in rows])
+                raw[missing] = equivalent[missing]
+            priority = np.array([row["priority"] for row in rows], dtype=np.float64)
+            zones = _zone_codes([row["zone"] for row in rows])
+            self._buffer.extend(
+                {
+                    "sku_code": row["sku_code"],
+                    "recorded_at": recorded_at,
+                    "day": day,
+                    **{field: row[field] for field in RAW_FIELDS},
+                    "priority": row["priority"],
+                    "zone": row["zone"],
+                }
+                for row in rows
+            )
+            # A code written twice in one call is applied in order, one pass
+            # per repeat, so every pass touches each row once.
+            pending = list(range(len(rows)))
+            while pending:
+                seen: set = set()
+                batch: List[int] = []
+                repeats: List[int] = []
+                for position in pending:
+                    (repeats if codes[position] in seen else batch).append(position)
+                    seen.add(codes[position])
+                self._ingest(
+                    [codes[position] for position in batch],
+                    raw[batch],
+                    priority[batch],
+                    zones[batch],
+                    observed,
+                    day,
+                )
+                pending = repeats
+            self._dirty.update(codes)
+            self._totals["samples"] += len(rows)
+            if self._buffered_since is None:
+                self._buffered_since = now
+            if len(self._buffer) >= HISTORY_BATCH_ROWS or now - self._buffered_since >= HISTORY_FLUSH_S:
+                self.flush(db)
+
+    def _ingest(
+        self,
+        codes: List[str],
+        raw: np.ndarray,
+        priority: np.ndarray,
+        zones: np.ndarray,
+        observed: float,
+        day: int,
+    ) -> None:
+        rows = np.array(
+            [self._row_by_code[code] if code in self._row_by_code else self._append(code) for code in codes],
+            dtype=np.int64,
+        )
+        elapsed = np.maximum(observed - self._last[rows], 0.0)
+        decay = np.where(
+            self._samples[rows] > 0, 0.5 ** (elapsed / (HISTORY_HALFLIFE_DAYS * DAY_S)), 0.0
+        )
+        self._sums[rows] = self._sums[rows] * decay[:, None] + raw
+        self._weight[rows] = self._weight[rows] * decay + 1.0
+        self._last[rows] = np.maximum(self._last[rows], observed)
+        self._samples[rows] += 1
+        self._zone[rows] = zones
+        if day > self._day - RING_DAYS:
+            column = day % RING_DAYS
+            self._window_sum[rows, column] += priority.astype(np.float32)
+            counts = self._window_count[rows, column]
+            self._window_count[rows, column] = np.where(counts < np.iinfo(np.uint16).max, counts + 1, counts)
+        self._evaluate(rows, observed)
+
+    def _evaluate(self, rows: np.ndarray, observed: float) -> None:
+        """Smoothed priority and zone of `rows` under the active formula and
+        scale. The smoothed zone only moves once the priority is past its
+        band by HISTORY_HYSTERESIS."""
+        if not rows.size:
+            return
+        formula = active_formula()
+        scale = metric_scale()
+        ewma = self._sums[rows] / self._weight[rows][:, None]
+        normalized = np.round(np.clip(ewma / np.array([scale[metric] for metric in METRICS]), 0.0, 1.0), 4)
+        smoothed = calculate_priority_batch(*normalized.T, weights=formula["weights"])
+        cutoffs = [cut for cut, _ in formula["thresholds"]]
+        target = len(cutoffs) - np.searchsorted(np.array(cutoffs[::-1]), smoothed, side="right")
+        previous = self._smoothed_zone[rows]
+        known = previous != _NO_ZONE
+        band = np.where(known, previous, 0)
+        upper, lower = _bands(cutoffs)
+        keep = known & (smoothed >= lower[band] - HISTORY_HYSTERESIS) & (smoothed < upper[band] + HISTORY_HYSTERESIS)
+        zone = np.where(keep, previous, target).astype(np.uint8)
+        crossed = rows[known & (zone != previous)]
+        self._crossed[crossed] = observed
+        self._totals["crossings"] += int(crossed.size)
+        self._dirty.update(self._codes[row] for row in crossed.tolist())
+        self._smoothed[rows] = smoothed
+        self._smoothed_zone[rows] = zone
+
+    def _refresh(self, db: Session) -> None:
+        """Re-evaluate every tracked SKU after the formula, cut-offs or scale
+        changed, and re-read their stored zones (a recompute or
+        recalibration re-zones stored SKUs without a new sample)."""
+        formula = active_formula()
+        stamp = (formula["weights"], formula["thresholds"], scale_version())
+        if stamp == self._stamp:
+            return
+        self._evaluate(np.arange(self._size), time.time())
+        self._zone[: self._size] = _zone_codes(SKU_STORE.zones_of(db, self._codes))
+        self._stamp = stamp
+
+    def record_deleted(self, db: Session, sku_code: str) -> None:
+        """Stop tracking a deleted SKU; its history rows stay."""
+        with self._lock:
+            self.ensure_loaded(db)
+            row = self._row_by_code.pop(sku_code, None)
+            if row is None:
+                return
+            last = self._size - 1
+            if row != last:
+                # Move the last row into the hole.
+                for name in _ARRAYS:
+                    array = getattr(self, name)
+                    array[row] = array[last]
+                self._codes[row] = self._codes[last]
+                self._row_by_code[self._codes[row]] = row
+            self._codes.pop()
+            self._size = last
+            self._dirty.discard(sku_code)
+            self._deleted.add(sku_code)
+
+    def flush(self, db: Session) -> int:
+        """Write the buffered samples and the trends they changed in one
+        transaction. Returns the samples written; on a database error they
+        stay buffered for the next flush."""
+        with self._lock:
+            if not (self._buffer or self._dirty or self._deleted):
+                return 0
+            started = time.perf_counter()
+            samples = self._buffer
+            codes = sorted(self._dirty | self._deleted)
+            trends = self._trend_rows(sorted(self._dirty))
+            history = models.SKUMetricSample.__table__
+            trend_table = models.SKUMetricTrend.__table__
+            try:
+                if samples:
+                    db.execute(insert(history), samples)
+                for start in range(0, len(codes), DELETE_CHUNK_SIZE):
+                    chunk = codes[start : start + DELETE_CHUNK_SIZE]
+                    db.execute(delete(trend_table).where(trend_table.c.sku_code.in_(chunk)))
+                if trends:
+                    db.execute(insert(trend_table), trends)
+                db.commit()
+            except SQLAlchemyError as exc:
+                db.rollback()
+                self._totals["failed_flushes"] += 1
+                print(f"[HISTORY] Flush of {len(samples)} samples failed, kept buffered: {exc}")
+                return 0
+            self._buffer, self._buffered_since = [], None
+            self._dirty, self._deleted = set(), set()
+            self._totals["flushed"] += len(samples)
+            self._totals["flushes"] += 1
+            self._totals["flush_ms"] += (time.perf_counter() - started) * 1000
+            return len(samples)
+
+    def _trend_rows(self, codes: Sequence[str]) -> List[Dict[str, Any]]:
+        rows = np.array([self._row_by_code[code] for code in codes], dtype=np.int64)
+        labels = ZONE_LABELS + [None]
+        columns = {
+            "sku_code": list(codes),
+            "samples": self._samples[rows].tolist(),
+            "last_at": [_to_datetime(value) for value in self._last[rows].tolist()],
+            "weight": self._weight[rows].tolist(),
+            **{f"sum_{metric}": self._sums[rows, k].tolist() for k, metric in enumerate(METRICS)},
+            "smoothed_zone": [labels[zone] for zone in np.minimum(self._smoothed_zone[rows], len(ZONE_LABELS)).tolist()],
+            "crossed_at": [
+                None if np.isnan(value) else _to_datetime(value) for value in self._crossed[rows].tolist()
+            ],
+        }
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    # --------------------------------------------------------------- reads
+    def _windows(self, rows: np.ndarray) -> Dict[int, Dict[str, np.ndarray]]:
+        """Samples and mean priority per window, counted back from today."""
+        today = max(self._day, int(time.time() // DAY_S))
+        column_day = self._day - (self._day - np.arange(RING_DAYS)) % RING_DAYS
+        windows = {}
+        for days in WINDOW_DAYS:
+            columns = np.flatnonzero(column_day > today - days)
+            counts = self._window_count[rows][:, columns].sum(axis=1, dtype=np.int64)
+            sums = self._window_sum[rows][:, columns].sum(axis=1, dtype=np.float64)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                windows[days] = {"samples": counts, "mean": np.where(counts > 0, sums / counts, np.nan)}
+        return windows
+
+    def _margin(self, rows: np.ndarray) -> np.ndarray:
+        """How far the smoothed priority lies outside the stored zone's band,
+        towards the smoothed zone (negative: still inside it)."""
+        upper, lower = _bands([cut for cut, _ in active_formula()["thresholds"]])
+        zone = np.minimum(self._zone[rows], len(ZONE_LABELS) - 1)
+        smoothed = self._smoothed[rows]
+        promote = self._smoothed_zone[rows] < self._zone[rows]
+        return np.where(promote, smoothed - upper[zone], lower[zone] - smoothed)
+
+    def _describe(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        windows = self._windows(rows)
+        margins = self._margin(rows)
+        ewma = self._sums[rows] / self._weight[rows][:, None]
+        items = []
+        for position, row in enumerate(rows.tolist()):
+            zone, smoothed_zone = int(self._zone[row]), int(self._smoothed_zone[row])
+            candidate = zone != _NO_ZONE and smoothed_zone != zone
+            items.append(
+                {
+                    "sku_code": self._codes[row],
+                    "zone": ZONE_LABELS[zone] if zone != _NO_ZONE else None,
+                    "smoothed_zone": ZONE_LABELS[smoothed_zone],
+                    "smoothed_priority": round(float(self._smoothed[row]), 4),
+                    "candidate": candidate,
+                    "direction": ("promote" if smoothed_zone < zone else "demote") if candidate else None,
+                    "margin": round(float(margins[position]), 4) if candidate else None,
+                    "ewma": {metric: round(float(value), 4) for metric, value in zip(METRICS, ewma[position])},
+                    "windows": {
+                        f"{days}d": {
+                            "samples": int(window["samples"][position]),
+                            "mean_priority": None
+                            if np.isnan(window["mean"][position])
+                            else round(float(window["mean"][position]), 4),
+                        }
+                        for days, window in windows.items()
+                    },
+                    "samples": int(self._samples[row]),
+                    "last_at": _isoformat(self._last[row]),
+                    "crossed_at": _isoformat(self._crossed[row]),
+                }
+            )
+        return items
+
+    def trend(self, db: Session, sku_code: str) -> Dict[str, Any]:
+        """One SKU's smoothed metrics, windowed means and watcher state."""
+        with self._lock:
+            self.ensure_loaded(db)
+            self._refresh(db)
+            row = self._row_by_code.get(sku_code)
+            if row is None:
+                raise LookupError(f"No metric history for SKU '{sku_code}'")
+            self._zone[row] = _zone_codes(SKU_STORE.zones_of(db, [sku_code]))[0]
+            return self._describe(np.array([row]))[0]
+
+    def candidates(
+        self, db: Session, limit: int = 100, direction: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """SKUs whose smoothed zone differs from their stored zone, furthest
+        past the boundary first, with `zone_overrides` for /api/layout/moves."""
+        with self._lock:
+            self.ensure_loaded(db)
+            started = time.perf_counter()
+            self._refresh(db)
+            size = self._size
+            flagged = (self._smoothed_zone[:size] != self._zone[:size]) & (self._zone[:size] != _NO_ZONE)
+            rows = np.flatnonzero(flagged)
+            if rows.size:
+                # Stored zones may have moved since (a job apply, a re-zoned band).
+                self._zone[rows] = _zone_codes(SKU_STORE.zones_of(db, [self._codes[row] for row in rows]))
+                rows = rows[(self._smoothed_zone[rows] != self._zone[rows]) & (self._zone[rows] != _NO_ZONE)]
+            if direction is not None:
+                promote = self._smoothed_zone[rows] < self._zone[rows]
+                rows = rows[promote if direction == "promote" else ~promote]
+            total = int(rows.size)
+            codes = np.array([self._codes[row] for row in rows.tolist()], dtype=object)
+            rows = rows[np.lexsort((codes, -self._margin(rows)))][:limit]
+            items = self._describe(rows)
+            return {
+                "tracked": size,
+                "total": total,
+                "hysteresis": HISTORY_HYSTERESIS,
+                "items": items,
+                "zone_overrides": {item["sku_code"]: item["smoothed_zone"] for item in items},
+                "query_ms": round((time.perf_counter() - started) * 1000, 3),
+            }
+
+    def history(self, db: Session, sku_code: str, limit: int = 100) -> Dict[str, Any]:
+        """A SKU's most recent samples, newest first (flushes the buffer)."""
+        with self._lock:
+            self.ensure_loaded(db)
+            self.flush(db)
+            table = models.SKUMetricSample.__table__
+            rows = db.execute(
+                select(table)
+                .where(table.c.sku_code == sku_code)
+                .order_by(table.c.recorded_at.desc(), table.c.id.desc())
+                .limit(limit)
+            ).all()
+            if not rows and sku_code not in self._row_by_code:
+                raise LookupError(f"No metric history for SKU '{sku_code}'")
+            return {
+                "sku_code": sku_code,
+                "samples": [
+                    {
+                        "recorded_at": row.recorded_at.isoformat() + "Z",
+                        **{field: getattr(row, field) for field in RAW_FIELDS},
+                        "priority": row.priority,
+                        "zone": row.zone,
+                    }
+                    for row in rows
+                ],
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            flushes = self._totals["flushes"]
+            return {
+                "loaded": self._loaded,
+                "tracked": self._size,
+                "buffered": len(self._buffer),
+                "samples": self._totals["samples"],
+                "crossings": self._totals["crossings"],
+                "flushed": self._totals["flushed"],
+                "flushes": flushes,
+                "failed_flushes": self._totals["failed_flushes"],
+                "mean_flush_ms": round(self._totals["flush_ms"] / flushes, 2) if flushes else 0.0,
+                "last_load_ms": round(self._load_ms, 1),
+                "memory_bytes": sum(getattr(self, name).nbytes for name in _ARRAYS),
+                "settings": {
+                    "batch_rows": HISTORY_BATCH_ROWS,
+                    "flush_s": HISTORY_FLUSH_S,
+                    "halflife_days": HISTORY_HALFLIFE_DAYS,
+                    "hysteresis": HISTORY_HYSTERESIS,
+                    "windows_days": list(WINDOW_DAYS),
+                },
+            }
+
+
+METRIC_HISTORY = MetricHistory()
@@ -0,0 +1,149 @@
+"""
+Normalization scale that follows the catalog's raw metric distribution.
+
+Each metric's scale (the raw value that maps to 1.0) is the raw value at
+quantile `SCALE_QUANTILE` over the stored SKUs that were submitted with raw
+values (rows submitted normalized have none), so a handful of outliers
+saturate at 1.0 instead of squashing everybody else towards 0. The lower
+end stays at 0: raw metrics are counts and sizes, and 0 means "none".
+
+The quantiles come from the SKU store's sorted raw values, so `check_drift`
+is a few list lookups and runs after every SKU write. When any metric's
+scale is more than `DRIFT_TOLERANCE` (relative) away from the active one, a
+new scale version is stored and made active; new rows are normalized with
+it at once, and the caller queues a ``rescore`` job whose recompute
+re-normalizes stored rows with raw values chunk by chunk (rows carry
+the scale version that normalized them, see services/scoring.py).
+"""
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.services.normalization import (
+    METRICS,
+    RAW_METRIC_SCALE,
+    metric_scale,
+    scale_version,
+    set_metric_scale,
+)
+from backend.services.sku_store import SKU_STORE
+
+SCALE_QUANTILE = float(os.environ.get("NORMALIZATION_QUANTILE", "0.99"))
+DRIFT_TOLERANCE = float(os.environ.get("NORMALIZATION_DRIFT", "0.1"))
+# Fewer SKUs than this keep the current scale.
+MIN_SCALE_SAMPLES = 100
+# Significant digits a derived scale is rounded to.
+SCALE_DIGITS = 4
+
+_lock = threading.Lock()
+
+
+def scale_values(row: models.MetricScale) -> Dict[str, float]:
+    return {metric: getattr(row, f"scale_{metric}") for metric in METRICS}
+
+
+def scale_summary(row: models.MetricScale) -> Dict[str, Any]:
+    return {
+        "version": row.id,
+        "scale": scale_values(row),
+        "quantile": row.quantile,
+        "samples": row.samples,
+        "created_at": row.created_at.isoformat() + "Z" if row.created_at else None,
+    }
+
+
+@contextmanager
+def scale_held() -> Iterator[int]:
+    """Keep `check_drift` from adopting a new scale meanwhile; yields the
+    active scale version."""
+    with _lock:
+        yield scale_version()
+
+
+def latest_scale(db: Session) -> Optional[models.MetricScale]:
+    return db.query(models.MetricScale).order_by(models.MetricScale.id.desc()).first()
+
+
+def load_active_scale(db: Session) -> models.MetricScale:
+    """Make the newest stored scale the one new rows are normalized with.
+    Stores RAW_METRIC_SCALE as version 1 on first start."""
+    row = latest_scale(db)
+    if row is None:
+        row = models.MetricScale(
+            **{f"scale_{metric}": value for metric, value in RAW_METRIC_SCALE.items()}, samples=0
+        )
+        db.add(row)
+        db.commit()
+    set_metric_scale(scale_values(row), row.id)
+    return row
+
+
+def _round(value: float) -> float:
+    return float(f"{value:.{SCALE_DIGITS}g}")
+
+
+def target_scale(db: Session) -> Dict[str, Any]:
+    """The scale the current raw distribution calls for. Metrics whose
+    quantile is 0 (nobody has any) keep their active scale."""
+    summary = SKU_STORE.raw_summary(db, SCALE_QUANTILE)
+    active = metric_scale()
+    scale = {}
+    for metric in METRICS:
+        value = summary["metrics"][metric]["quantile"]
+        scale[metric] = _round(value) if value else active[metric]
+    return {"scale": scale, "samples": summary["count"], "raw": summary["metrics"]}
+
+
+def _drift(scale: Dict[str, float]) -> Dict[str, float]:
+    active = metric_scale()
+    return {metric: abs(scale[metric] - active[metric]) / active[metric] for metric in METRICS}
+
+
+def check_drift(db: Session, force: bool = False) -> Optional[Dict[str, Any]]:
+    """Adopt a new scale version if the raw distribution drifted past
+    `DRIFT_TOLERANCE` (with `force`, if it moved at all). Returns the new
+    version's summary, or None if the active scale stays."""
+    with _lock:
+        target = target_scale(db)
+        minimum = 1 if force else MIN_SCALE_SAMPLES
+        drift = _drift(target["scale"])
+        tolerance = 0.0 if force else DRIFT_TOLERANCE
+        if target["samples"] < minimum or max(drift.values()) <= tolerance:
+            return None
+        previous = metric_scale()
+        row = models.MetricScale(
+            **{f"scale_{metric}": value for metric, value in target["scale"].items()},
+            quantile=SCALE_QUANTILE,
+            samples=target["samples"],
+        )
+        db.add(row)
+        db.commit()
+        set_metric_scale(scale_values(row), row.id)
+        print(
+            f"[NORMALIZE] Scale v{row.id}: {previous} -> {scale_values(row)} "
+            f"over {target['samples']} SKUs"
+        )
+        return scale_summary(row)
+
+
+def normalization_status(db: Session) -> Dict[str, Any]:
+    """The active scale, the one the raw distribution calls for and how far
+    apart they are, plus how many SKU rows are not stamped with the active
+    scale version yet."""
+    target = target_scale(db)
+    row = latest_scale(db)
+    table = models.SKUItem.__table__
+    version = scale_version()
+    stale = db.query(models.SKUItem).filter(table.c.norm_version.is_distinct_from(version)).count()
+    return {
+        "active": scale_summary(row) if row is not None else None,
+        "target": {"scale": target["scale"], "quantile": SCALE_QUANTILE, "samples": target["samples"]},
+        "drift": {metric: round(value, 4) for metric, value in _drift(target["scale"]).items()},
+        "tolerance": DRIFT_TOLERANCE,
+        "raw": target["raw"],
+        "stale_rows": stale,
+    }
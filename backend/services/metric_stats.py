@@ -0,0 +1,61 @@
+"""
+Order statistics over the raw SKU metrics.
+
+Each metric's raw values are kept in one ascending `SortedKeyList`, updated
+in O(log n) per write. Minimum, maximum and any quantile are positional
+reads from the list, so the normalization scale can be re-checked after
+every write without scanning the catalog. NaN (no raw value) is never kept.
+"""
+import math
+import sys
+from typing import Dict, List, Optional, Sequence
+
+from backend.services.sorted_keys import SortedKeyList
+
+
+class RawMetricStats:
+    def __init__(self, metrics: Sequence[str]) -> None:
+        self._values: Dict[str, SortedKeyList] = {metric: SortedKeyList() for metric in metrics}
+
+    def build(self, sorted_values: Dict[str, List[float]]) -> None:
+        """Replace the statistics with ascending value lists per metric (the
+        caller sorted them, e.g. with NumPy)."""
+        self._values = {metric: SortedKeyList(sorted_values[metric]) for metric in self._values}
+
+    def add(self, values: Dict[str, float]) -> None:
+        for metric, keys in self._values.items():
+            if not math.isnan(values[metric]):
+                keys.add(values[metric])
+
+    def remove(self, values: Dict[str, float]) -> None:
+        for metric, keys in self._values.items():
+            if not math.isnan(values[metric]):
+                keys.remove(values[metric])
+
+    def memory_bytes(self) -> int:
+        """Approximate: the lists plus one float per value."""
+        lists = sum(keys.memory_bytes() for keys in self._values.values())
+        return lists + sys.getsizeof(0.0) * sum(len(keys) for keys in self._values.values())
+
+    # --------------------------------------------------------------- reads
+    def size(self) -> int:
+        return min((len(keys) for keys in self._values.values()), default=0)
+
+    def minimum(self, metric: str) -> Optional[float]:
+        keys = self._values[metric]
+        return keys[0] if keys else None
+
+    def maximum(self, metric: str) -> Optional[float]:
+        keys = self._values[metric]
+        return keys[-1] if keys else None
+
+    def quantile(self, metric: str, q: float) -> Optional[float]:
+        """Value at quantile `q` (0-1) with linear interpolation, as
+        numpy.quantile would return over the same values."""
+        keys = self._values[metric]
+        if not keys:
+            return None
+        position = q * (len(keys) - 1)
+        lower = math.floor(position)
+        upper = min(lower + 1, len(keys) - 1)
+        return keys[lower] + (keys[upper] - keys[lower]) * (position - lower)
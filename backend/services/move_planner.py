@@ -0,0 +1,378 @@
+"""
+Re-slotting move planner: the physical moves that turn the current layout
+into a proposed one.
+
+Every SKU that has to relocate points at the SKU currently sitting in its
+target slot (if any). Each slot has one occupant and targets are distinct,
+so these pointers form simple chains and cycles:
+
+- a chain ends at a free slot and is executed from that end backwards,
+  one move per SKU;
+- a cycle needs one extra move through the staging slot at the gate,
+  unless one member can be sent to a free slot in its zone instead.
+
+Modes:
+
+- ``exact``: every SKU must reach its proposed position_id.
+- ``zone``: only the zone matters (what optimize decides). SKUs keeping
+  their zone stay put, and incoming SKUs take freed or free slots in their
+  new zone, highest f nearest the gate. This is far fewer moves than a naive
+  diff of two banded layouts, where one insert shifts a whole zone.
+
+With `max_moves`, chains are split into prefixes of non-increasing gain per
+move (gain = f x metres saved to the gate). Segments are then taken
+greedily by that density, and a chain's later segments are only taken after
+its earlier ones.
+"""
+import heapq
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend.services.layout_builder import (
+    band_capacity,
+    generate_layout,
+    load_warehouse,
+    position_id,
+    slot_coordinates,
+)
+from backend.services.live_layout import LIVE_LAYOUT
+from backend.services.sku_store import SKU_STORE
+from backend.services.slot_solver import gate_point, solve_layout
+
+STAGING = "STAGING"
+MOVE_MODES = ("exact", "zone")
+PROPOSALS = ("overrides", "solver_zone", "solver_global", "placements")
+
+# slot key -> (zone, x_m, y_m, rectilinear metres to the gate)
+_Slots = Dict[str, Tuple[str, float, float, float]]
+
+
+def _slot(
+    zone_id: str, x_m: float, y_m: float, gate: Tuple[float, float]
+) -> Tuple[str, float, float, float]:
+    return zone_id, x_m, y_m, abs(x_m - gate[0]) + abs(y_m - gate[1])
+
+
+def _zone_targets(
+    current: Dict[str, str],
+    target_zone: Dict[str, str],
+    slots: _Slots,
+    zone_counts: Dict[str, int],
+    warehouse: Dict[str, Any],
+    f: Dict[str, float],
+    gate: Tuple[float, float],
+) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+    """Target slot per zone-changing SKU, plus the free slots left per zone."""
+    incoming: Dict[str, List[str]] = {}
+    leaving: Dict[str, List[str]] = {}
+    for code, zone_id in target_zone.items():
+        src = current.get(code)
+        if src is None or slots[src][0] == zone_id:
+            continue
+        incoming.setdefault(zone_id, []).append(code)
+        leaving.setdefault(slots[src][0], []).append(src)
+
+    targets: Dict[str, str] = {}
+    spare: Dict[str, List[str]] = {}
+    bands = {zone["id"]: zone for zone in warehouse["zones"]}
+    for zone_id, band in bands.items():
+        arrivals = incoming.get(zone_id, [])
+        occupied = zone_counts.get(zone_id, 0)
+        capacity = band_capacity(band["from_m"], band["to_m"], warehouse["height_m"])
+        # Free in-building slots, then overflow rows if arrivals still exceed them.
+        extra = max(capacity - occupied, len(arrivals) - len(leaving.get(zone_id, [])), 0)
+        xs, ys = slot_coordinates(band["from_m"], band["to_m"], warehouse["height_m"], occupied + extra)
+        free = []
+        for idx in range(occupied, occupied + extra):
+            key = position_id(zone_id, idx)
+            slots[key] = _slot(zone_id, float(xs[idx]), float(ys[idx]), gate)
+            free.append(key)
+        available = sorted(
+            leaving.get(zone_id, []) + free, key=lambda key: (slots[key][3], key)
+        )
+        arrivals.sort(key=lambda code: (-f.get(code, 0.0), code))
+        for code, key in zip(arrivals, available):
+            targets[code] = key
+        taken = set(targets[code] for code in arrivals)
+        spare[zone_id] = [key for key in free if key not in taken]
+    return targets, spare
+
+
+def _components(
+    movers: Dict[str, Tuple[str, str]], occupant: Dict[str, str]
+) -> Tuple[List[List[str]], List[List[str]]]:
+    """Split movers into chains (blocked-first order) and cycles."""
+    blocker = {}
+    blocked_by_someone = set()
+    for code, (_, dst) in movers.items():
+        other = occupant.get(dst)
+        if other is not None and other in movers and other != code:
+            blocker[code] = other
+            blocked_by_someone.add(other)
+
+    seen = set()
+    chains: List[List[str]] = []
+    for code in movers:
+        if code in blocked_by_someone:
+            continue
+        chain = [code]
+        seen.add(code)
+        while chain[-1] in blocker:
+            chain.append(blocker[chain[-1]])
+            seen.add(chain[-1])
+        chains.append(chain)
+
+    cycles: List[List[str]] = []
+    for code in movers:
+        if code in seen:
+            continue
+        cycle = [code]
+        seen.add(code)
+        while blocker[cycle[-1]] != code:
+            cycle.append(blocker[cycle[-1]])
+            seen.add(cycle[-1])
+        cycles.append(cycle)
+    return chains, cycles
+
+
+def _segments(gains: List[float]) -> List[Tuple[int, int, float]]:
+    """Pool adjacent prefixes so gain per move is non-increasing.
+
+    Returns (start, end, gain) segments in execution order.
+    """
+    stack: List[List[float]] = []  # [start, end, gain]
+    for idx, gain in enumerate(gains):
+        segment = [idx, idx + 1, gain]
+        while stack and stack[-1][2] / (stack[-1][1] - stack[-1][0]) <= segment[2] / (
+            segment[1] - segment[0]
+        ):
+            previous = stack.pop()
+            segment = [previous[0], segment[1], previous[2] + segment[2]]
+        stack.append(segment)
+    return [(int(start), int(end), gain) for start, end, gain in stack]
+
+
+def plan_moves(
+    current: Dict[str, str],
+    proposed: Dict[str, str],
+    slots: _Slots,
+    f: Dict[str, float],
+    max_moves: Optional[int] = None,
+    spare: Optional[Dict[str, List[str]]] = None,
+) -> Dict[str, Any]:
+    """Move sequence from `current` to `proposed` (SKU code -> slot key)."""
+    occupant = {key: code for code, key in current.items()}
+    movers: Dict[str, Tuple[str, str]] = {}
+    conflicts = []
+    claimed: Dict[str, str] = {}
+    for code, dst in proposed.items():
+        src = current.get(code)
+        if src is None or src == dst:
+            continue
+        holder = occupant.get(dst)
+        if dst in claimed or (holder is not None and proposed.get(holder, current[holder]) == dst):
+            conflicts.append({"sku_code": code, "to": dst, "reason": "target slot is taken"})
+            continue
+        claimed[dst] = code
+        movers[code] = (src, dst)
+    # A skipped mover stays put, which can block whoever targeted its slot.
+    blocked = True
+    while blocked:
+        blocked = [
+            code for code, (_, dst) in movers.items()
+            if occupant.get(dst) is not None and occupant[dst] not in movers
+        ]
+        for code in blocked:
+            conflicts.append({"sku_code": code, "to": movers.pop(code)[1], "reason": "target slot is taken"})
+
+    spare = {zone_id: list(keys) for zone_id, keys in (spare or {}).items()}
+    chains, cycles = _components(movers, occupant)
+    # A cycle member with a spare slot in its zone turns the cycle into a chain.
+    still_cycles = []
+    for cycle in cycles:
+        for pos, code in enumerate(cycle):
+            zone_id = slots[movers[code][1]][0]
+            if spare.get(zone_id):
+                movers[code] = (movers[code][0], spare[zone_id].pop(0))
+                chains.append(cycle[pos + 1 :] + cycle[: pos + 1])
+                break
+        else:
+            still_cycles.append(cycle)
+
+    def gain(code: str) -> float:
+        src, dst = movers[code]
+        return f.get(code, 0.0) * (slots[src][3] - slots[dst][3])
+
+    # Units in execution order: chains run from the free end backwards.
+    units: List[Dict[str, Any]] = []
+    for chain in chains:
+        order = list(reversed(chain))
+        units.append({"order": order, "gains": [gain(code) for code in order], "cycle": False})
+    for cycle in still_cycles:
+        order = [cycle[0]] + list(reversed(cycle[1:]))
+        units.append({"order": order, "gains": [gain(code) for code in order], "cycle": True})
+
+    selected: List[Tuple[int, int]] = []  # (unit, moves taken from its order)
+    if max_moves is None:
+        selected = [(idx, len(unit["order"])) for idx, unit in enumerate(units)]
+    else:
+        heap = []
+        for idx, unit in enumerate(units):
+            if unit["cycle"]:
+                cost = len(unit["order"]) + 1
+                heapq.heappush(heap, (-sum(unit["gains"]) / cost, idx, 0, len(unit["order"]), cost))
+            else:
+                segments = _segments(unit["gains"])
+                unit["segments"] = segments
+                start, end, total = segments[0]
+                heapq.heappush(heap, (-total / (end - start), idx, 0, end, end - start))
+        budget = max_moves
+        taken: Dict[int, int] = {}
+        while heap and budget > 0:
+            density, idx, seg, end, cost = heapq.heappop(heap)
+            if density >= 0 or cost > budget:
+                continue  # no gain, or it does not fit (later segments depend on it)
+            budget -= cost
+            taken[idx] = end
+            unit = units[idx]
+            if not unit["cycle"] and seg + 1 < len(unit["segments"]):
+                start, next_end, total = unit["segments"][seg + 1]
+                heapq.heappush(
+                    heap, (-total / (next_end - start), idx, seg + 1, next_end, next_end - start)
+                )
+        selected = sorted(taken.items())
+
+    moves: List[Dict[str, Any]] = []
+
+    def emit(code: str, src: str, dst: str, kind: str) -> None:
+        moves.append(
+            {
+                "step": len(moves) + 1,
+                "sku_code": code,
+                "from": src,
+                "to": dst,
+                "kind": kind,
+            }
+        )
+
+    moved: Dict[str, str] = {}
+    for idx, count in selected:
+        unit = units[idx]
+        order = unit["order"][:count]
+        if unit["cycle"]:
+            first = order[0]
+            emit(first, movers[first][0], STAGING, "to_staging")
+            for code in order[1:]:
+                emit(code, movers[code][0], movers[code][1], "move")
+            emit(first, STAGING, movers[first][1], "from_staging")
+        else:
+            for code in order:
+                emit(code, movers[code][0], movers[code][1], "move")
+        for code in order:
+            moved[code] = movers[code][1]
+
+    before = sum(f.get(code, 0.0) * slots[key][3] for code, key in current.items())
+    after = before - sum(gain(code) for code in moved)
+    return {
+        "moves": moves,
+        "summary": {
+            "relocated_skus": len(moved),
+            "moves": len(moves),
+            "staging_moves": sum(1 for move in moves if move["kind"] == "to_staging"),
+            "chains": sum(1 for idx, _ in selected if not units[idx]["cycle"]),
+            "cycles": sum(1 for idx, _ in selected if units[idx]["cycle"]),
+            "pending_skus": len(movers) - len(moved),
+            "conflicts": len(conflicts),
+            "objective_before": round(before, 3),
+            "objective_after": round(after, 3),
+        },
+        "conflicts": conflicts,
+    }
+
+
+def plan_relocation(
+    db: Session,
+    proposal: str = "overrides",
+    zone_overrides: Optional[Dict[str, str]] = None,
+    placements: Optional[Sequence[Dict[str, Any]]] = None,
+    mode: Optional[str] = None,
+    max_moves: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Plan moves from the live layout to a proposal.
+
+    `proposal` is "overrides" (the banded layout with `zone_overrides`, as
+    optimize builds it), "solver_zone"/"solver_global", or "placements"
+    (explicit sku_code/position_id/zone/x_m/y_m entries). `mode` defaults
+    to "zone" for overrides and "exact" otherwise.
+    """
+    if proposal not in PROPOSALS:
+        raise ValueError(f"proposal must be one of {', '.join(PROPOSALS)}")
+    mode = mode or ("zone" if proposal == "overrides" else "exact")
+    if mode not in MOVE_MODES:
+        raise ValueError(f"mode must be one of {', '.join(MOVE_MODES)}")
+    if proposal == "placements" and placements is None:
+        raise ValueError("placements are required for proposal=placements")
+
+    started = time.perf_counter()
+    warehouse = load_warehouse()
+    gate = gate_point(warehouse)
+    live = LIVE_LAYOUT.full_layout(db)
+    current = {entry["sku_code"]: entry["position_id"] for entry in live["placements"]}
+    if proposal == "overrides" and mode == "zone":
+        # Only the overridden SKUs can change zone; skip rebuilding the layout.
+        target: List[Dict[str, Any]] = []
+        target_zone = {
+            code: zone_id for code, zone_id in (zone_overrides or {}).items() if code in current
+        }
+    else:
+        if proposal == "overrides":
+            target = generate_layout(db, zone_overrides=zone_overrides)["placements"]
+        elif proposal == "placements":
+            target = list(placements)
+        else:
+            target = solve_layout(db, proposal.split("_", 1)[1])["placements"]
+        target_zone = {entry["sku_code"]: entry["zone"] for entry in target}
+
+    slots: _Slots = {}
+    for entry in list(live["placements"]) + target:
+        key = entry["position_id"]
+        if key not in slots:
+            slots[key] = _slot(entry["zone"], entry["x_m"], entry["y_m"], gate)
+    slots[STAGING] = _slot("", gate[0], gate[1], gate)
+    skus = SKU_STORE.columns(db, ("f",))
+    f = dict(zip(skus["sku_code"], skus["f"].tolist()))
+
+    # What a plain diff of the two layouts would move (None when not built).
+    naive = (
+        sum(
+            1 for entry in target
+            if current.get(entry["sku_code"], entry["position_id"]) != entry["position_id"]
+        )
+        if target
+        else None
+    )
+    spare = None
+    if mode == "zone":
+        proposed, spare = _zone_targets(
+            current, target_zone, slots, live["counts"], warehouse, f, gate
+        )
+    else:
+        proposed = {entry["sku_code"]: entry["position_id"] for entry in target}
+
+    plan = plan_moves(current, proposed, slots, f, max_moves, spare)
+    plan["summary"].update(
+        {
+            "mode": mode,
+            "proposal": proposal,
+            "naive_moves": naive,
+            "max_moves": max_moves,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+    )
+    for move in plan["moves"]:
+        for end in ("from", "to"):
+            _, x_m, y_m, _ = slots[move[end]]
+            move[f"{end}_xy"] = [x_m, y_m]
+    return plan
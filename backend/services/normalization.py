@@ -0,0 +1,81 @@
+"""
+Server-side normalization of raw SKU metrics into the 0..1 range.
+
+A raw metric maps to `raw / scale`, clamped to 0..1. The scale in use is a
+numbered version: version 1 is RAW_METRIC_SCALE (the divisors the clients
+used to apply), later versions follow the catalog's raw distribution
+(services/metric_scaling.py). Rows keep their raw values next to the
+normalized ones, plus the scale version that normalized them, so a new scale
+can re-normalize them without losing anything.
+
+Rows submitted already normalized (and rows stored before raw values were
+kept) have no raw values: their raw columns stay NULL, they are left out of
+the scale's raw distribution and keep the metrics they were submitted with.
+"""
+import math
+from typing import Any, Dict, Optional
+
+# Raw value that maps to 1.0 for each metric (same rules as the frontend form).
+RAW_METRIC_SCALE: Dict[str, float] = {"f": 200.0, "w": 20.0, "s": 50000.0, "i": 20.0}
+METRICS = tuple(RAW_METRIC_SCALE)
+RAW_FIELDS = tuple(f"raw_{metric}" for metric in METRICS)
+
+# The scale new rows are normalized with. Replaced as a whole, never mutated.
+_active: Dict[str, Any] = {"scale": dict(RAW_METRIC_SCALE), "version": 1}
+
+
+def metric_scale() -> Dict[str, float]:
+    """The raw value that maps to 1.0 per metric under the active scale."""
+    return _active["scale"]
+
+
+def scale_version() -> int:
+    return _active["version"]
+
+
+def set_metric_scale(scale: Dict[str, float], version: int) -> None:
+    """Normalize with `scale` (scale version `version`) from now on."""
+    global _active
+    _active = {"scale": {metric: float(scale[metric]) for metric in METRICS}, "version": version}
+
+
+def implicit_raw(metric: str, value: Any) -> Any:
+    """Estimated raw value (or NumPy array of values) of a row without raw
+    metrics, under the divisors clients normalized with (RAW_METRIC_SCALE).
+    Only for physical estimates such as rack loads; never stored or used to
+    derive a scale."""
+    return value * RAW_METRIC_SCALE[metric]
+
+
+def normalize_value(metric: str, value: float, scale: Optional[Dict[str, float]] = None) -> float:
+    """Scale a raw metric into 0..1, clamping values above the scale."""
+    divisor = (scale or metric_scale())[metric]
+    return round(min(1.0, max(0.0, value / divisor)), 4)
+
+
+def prepare_metrics(row: Dict[str, Any], normalized: bool = False) -> Dict[str, Any]:
+    """Copy of `row` with normalized f/w/s/i, the raw values (raw_f ...) and
+    the scale version (norm_version) to store.
+
+    With `normalized` the metrics are already within 0..1 and stored as
+    given, and raw_f ... are None: there are no raw values to keep. Raises
+    ValueError on negative, non-finite or (for normalized input)
+    out-of-range metrics.
+    """
+    active = _active
+    scale, version = active["scale"], active["version"]
+    prepared = {key: value for key, value in row.items() if key != "normalized"}
+    for metric in METRICS:
+        value = float(row[metric])
+        if not math.isfinite(value) or value < 0:
+            raise ValueError(f"invalid value for '{metric}'")
+        if normalized:
+            if value > 1:
+                raise ValueError(f"'{metric}' must be within 0..1 for normalized input")
+            prepared[metric] = value
+            prepared[f"raw_{metric}"] = None
+        else:
+            prepared[metric] = normalize_value(metric, value, scale)
+            prepared[f"raw_{metric}"] = value
+    prepared["norm_version"] = version
+    return prepared
@@ -0,0 +1,328 @@
+"""
+Zone reassignment planning for /api/sku/optimize.
+
+Three engines produce the same `{"summary", "reassignments"}` plan:
+
+- ``local``: the vectorized rule engine over every SKU, no network call.
+- ``ai``: the OpenAI planner; falls back to ``local`` when it returns an error.
+- ``hybrid``: local rules for every SKU, the model only for the uncertain
+  ones left by prompt pruning; model entries win for the SKUs it covers.
+
+Operator rules are applied last in every mode. `optimize_layout` wraps the
+whole /api/sku/optimize flow (load SKUs, plan, lay out) so the endpoint and
+background jobs share it; `optimize_layout_async` is the same flow on an
+async session and the async OpenAI client, for the request path.
+"""
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.services.ai_client import (
+    SHARD_AUTO_THRESHOLD,
+    ask_ai_for_plan,
+    ask_ai_for_plan_async,
+    ask_ai_for_plan_sharded,
+    ask_ai_for_plan_sharded_async,
+)
+from backend.services.layout_builder import generate_layout, generate_layout_async
+from backend.services.prompt_pruning import prune_for_prompt
+from backend.services.rule_engine import plan_with_rules
+from backend.services.sku_store import SKU_STORE
+
+ENGINES = ("local", "ai", "hybrid")
+
+# progress(stage, fraction 0..1, partial result or None)
+Progress = Callable[[str, float, Optional[Dict[str, Any]]], None]
+
+
+def _no_progress(stage: str, fraction: float, partial: Optional[Dict[str, Any]] = None) -> None:
+    pass
+
+
+def _overlay(base: List[Dict[str, Any]], top: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    merged = {entry["sku_code"]: entry for entry in base if isinstance(entry, dict)}
+    merged.update({entry["sku_code"]: entry for entry in top if isinstance(entry, dict)})
+    return [merged[code] for code in sorted(merged)]
+
+
+def _prompt_items(
+    items: List[Dict[str, Any]], instructions: Optional[str], prune_prompt: bool
+) -> Dict[str, Any]:
+    if not prune_prompt:
+        return {"items": items, "note": None, "stats": None}
+    pruned = prune_for_prompt(items, instructions)
+    stats = pruned["stats"]
+    print(
+        f"[OPTIMIZE] Prompt pruning: {stats['sku_sent']}/{stats['sku_total']} SKUs sent, "
+        f"~{stats['est_tokens_saved']} tokens saved"
+    )
+    return pruned
+
+
+_NOTHING_TO_ASK = {
+    "summary": "All SKUs are clear of zone cut-offs and default rules; no AI call needed.",
+    "reassignments": [],
+}
+
+
+def _ask_ai(
+    items: List[Dict[str, Any]],
+    instructions: Optional[str],
+    sharded: Optional[bool],
+    max_concurrency: int,
+    prune_prompt: bool,
+    progress: Progress = _no_progress,
+) -> Dict[str, Any]:
+    prompt = _prompt_items(items, instructions, prune_prompt)
+    ai_items, context_note = prompt["items"], prompt["note"]
+
+    if sharded is None:
+        sharded = len(ai_items) > SHARD_AUTO_THRESHOLD
+    progress("ai", 0.3, {"skus_sent": len(ai_items)})
+
+    def on_shard(done: int, total: int, plan: Dict[str, Any]) -> None:
+        partial = {"shards_done": done, "shards": total, "shard_error": plan.get("error")}
+        progress("ai", 0.3 + 0.5 * done / total, partial)
+    if items and not ai_items:
+        plan = dict(_NOTHING_TO_ASK)
+    elif sharded:
+        plan = ask_ai_for_plan_sharded(
+            ai_items,
+            instructions,
+            max_concurrency=max_concurrency,
+            context_note=context_note,
+            on_shard=on_shard,
+        )
+    else:
+        plan = ask_ai_for_plan(ai_items, instructions, context_note=context_note)
+    return {"plan": plan, "prompt_stats": prompt["stats"]}
+
+
+async def _ask_ai_async(
+    items: List[Dict[str, Any]],
+    instructions: Optional[str],
+    sharded: Optional[bool],
+    max_concurrency: int,
+    prune_prompt: bool,
+) -> Dict[str, Any]:
+    prompt = await asyncio.to_thread(_prompt_items, items, instructions, prune_prompt)
+    ai_items, context_note = prompt["items"], prompt["note"]
+
+    if sharded is None:
+        sharded = len(ai_items) > SHARD_AUTO_THRESHOLD
+    if items and not ai_items:
+        plan = dict(_NOTHING_TO_ASK)
+    elif sharded:
+        plan = await ask_ai_for_plan_sharded_async(
+            ai_items, instructions, max_concurrency=max_concurrency, context_note=context_note
+        )
+    else:
+        plan = await ask_ai_for_plan_async(ai_items, instructions, context_note=context_note)
+    return {"plan": plan, "prompt_stats": prompt["stats"]}
+
+
+def build_plan(
+    items: List[Dict[str, Any]],
+    instructions: Optional[str] = None,
+    engine: str = "ai",
+    operator_rules: Optional[Sequence[Dict[str, Any]]] = None,
+    sharded: Optional[bool] = None,
+    max_concurrency: int = 4,
+    prune_prompt: bool = True,
+    progress: Progress = _no_progress,
+) -> Dict[str, Any]:
+    """Plan zone reassignments for `items` with the requested engine.
+
+    Returns the plan, the prompt pruning stats (None when the model was not
+    asked) and the engine that actually produced the plan. `progress` gets
+    the local rules plan as a partial result before the model is asked.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {', '.join(ENGINES)}")
+
+    if engine == "local":
+        plan, engine_used = plan_with_rules(items, operator_rules), "local"
+        return {"plan": plan, "prompt_stats": None, "engine_used": engine_used}
+
+    local_plan = None
+    if engine == "hybrid":
+        local_plan = plan_with_rules(items)
+        progress("rules", 0.2, {"reassignments": len(local_plan["reassignments"])})
+        # Hybrid only asks the model about SKUs the rules cannot settle.
+        prune_prompt = True
+    asked = _ask_ai(items, instructions, sharded, max_concurrency, prune_prompt, progress)
+    return _combine(items, engine, asked, local_plan, operator_rules)
+
+
+async def build_plan_async(
+    items: List[Dict[str, Any]],
+    instructions: Optional[str] = None,
+    engine: str = "ai",
+    operator_rules: Optional[Sequence[Dict[str, Any]]] = None,
+    sharded: Optional[bool] = None,
+    max_concurrency: int = 4,
+    prune_prompt: bool = True,
+) -> Dict[str, Any]:
+    """`build_plan` with the model awaited on the event loop; rule passes
+    run on worker threads."""
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {', '.join(ENGINES)}")
+
+    if engine == "local":
+        plan = await asyncio.to_thread(plan_with_rules, items, operator_rules)
+        return {"plan": plan, "prompt_stats": None, "engine_used": "local"}
+
+    local_plan = None
+    if engine == "hybrid":
+        local_plan = await asyncio.to_thread(plan_with_rules, items)
+        prune_prompt = True
+    asked = await _ask_ai_async(items, instructions, sharded, max_concurrency, prune_prompt)
+    return await asyncio.to_thread(_combine, items, engine, asked, local_plan, operator_rules)
+
+
+def _combine(
+    items: List[Dict[str, Any]],
+    engine: str,
+    asked: Dict[str, Any],
+    local_plan: Optional[Dict[str, Any]],
+    operator_rules: Optional[Sequence[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    """Fold the model's answer into the final plan: hybrid overlays it on the
+    local rules plan, and either engine falls back to local rules on error."""
+    ai_plan, prompt_stats = asked["plan"], asked["prompt_stats"]
+    if engine == "hybrid":
+        if ai_plan.get("error"):
+            plan = dict(local_plan)
+            plan["summary"] = f"AI unavailable, local rules only. {local_plan['summary']}"
+            engine_used = "local"
+        else:
+            plan = {
+                "summary": f"{ai_plan.get('summary')} {local_plan['summary']}",
+                "reassignments": _overlay(
+                    local_plan["reassignments"], ai_plan.get("reassignments", [])
+                ),
+            }
+            engine_used = "hybrid"
+    else:
+        plan = ai_plan
+        engine_used = "ai"
+        if plan.get("error"):
+            print(f"[OPTIMIZE] AI plan failed ({plan['error']}); falling back to local rules")
+            local_plan = plan_with_rules(items)
+            plan = {
+                "summary": f"AI unavailable, fell back to local rules. {local_plan['summary']}",
+                "reassignments": local_plan["reassignments"],
+            }
+            engine_used = "local"
+
+    if operator_rules:
+        # Operator rules can also pin a SKU to its current zone, cancelling
+        # whatever the engine proposed for it.
+        operator_plan = plan_with_rules(items, operator_rules, use_defaults=False, include_unchanged=True)
+        current = {item["sku_code"]: str(item.get("zone") or "").upper() for item in items}
+        plan["reassignments"] = [
+            entry
+            for entry in _overlay(plan.get("reassignments", []), operator_plan["reassignments"])
+            if entry["recommended_zone"] != current.get(entry["sku_code"])
+        ]
+    return {"plan": plan, "prompt_stats": prompt_stats, "engine_used": engine_used}
+
+
+def _payload(db: Optional[Session]) -> List[Dict[str, Any]]:
+    """Prompt/rules input for every SKU, read from the SKU store."""
+    skus = SKU_STORE.columns(db, ("priority", "f", "w", "s", "i"))
+    return [
+        {"sku_code": sku_code, "priority": priority, "zone": zone, "f": f, "w": w, "s": s, "i": i}
+        for sku_code, priority, zone, f, w, s, i in zip(
+            skus["sku_code"],
+            skus["priority"].tolist(),
+            skus["zone"].tolist(),
+            skus["f"].tolist(),
+            skus["w"].tolist(),
+            skus["s"].tolist(),
+            skus["i"].tolist(),
+        )
+    ]
+
+
+def _zone_overrides(result: Dict[str, Any]) -> Dict[str, str]:
+    plan = result["plan"]
+    print(f"[OPTIMIZE] Plan summary ({result['engine_used']}): {plan.get('summary')}")
+    print(f"[OPTIMIZE] Reassignments count: {len(plan.get('reassignments', []))}")
+    zone_overrides = {
+        entry["sku_code"]: entry["recommended_zone"]
+        for entry in plan.get("reassignments", [])
+        if isinstance(entry, dict)
+    }
+    print(f"[OPTIMIZE] Zone overrides: {len(zone_overrides)} SKUs")
+    return zone_overrides
+
+
+def _with_plan(layout: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    plan = result["plan"]
+    layout["assistant_summary"] = plan.get("summary")
+    layout["assistant_reassignments"] = plan.get("reassignments", [])
+    layout["ai_prompt_stats"] = result["prompt_stats"]
+    layout["engine_used"] = result["engine_used"]
+    return layout
+
+
+def optimize_layout(
+    db: Session,
+    instructions: Optional[str] = None,
+    engine: str = "ai",
+    operator_rules: Optional[Sequence[Dict[str, Any]]] = None,
+    sharded: Optional[bool] = None,
+    max_concurrency: int = 4,
+    prune_prompt: bool = True,
+    progress: Progress = _no_progress,
+) -> Dict[str, Any]:
+    """Plan over every SKU and return the layout with the plan applied, in
+    the shape of /api/sku/optimize."""
+    payload = _payload(db)
+    progress("loaded", 0.1, {"skus": len(payload)})
+
+    result = build_plan(
+        payload,
+        instructions,
+        engine=engine,
+        operator_rules=operator_rules,
+        sharded=sharded,
+        max_concurrency=max_concurrency,
+        prune_prompt=prune_prompt,
+        progress=progress,
+    )
+    zone_overrides = _zone_overrides(result)
+    progress(
+        "planned",
+        0.85,
+        {"engine_used": result["engine_used"], "reassignments": len(zone_overrides)},
+    )
+    return _with_plan(generate_layout(db, zone_overrides=zone_overrides), result)
+
+
+async def optimize_layout_async(
+    session: AsyncSession,
+    instructions: Optional[str] = None,
+    engine: str = "ai",
+    operator_rules: Optional[Sequence[Dict[str, Any]]] = None,
+    sharded: Optional[bool] = None,
+    max_concurrency: int = 4,
+    prune_prompt: bool = True,
+) -> Dict[str, Any]:
+    """`optimize_layout` without holding a thread while the model answers."""
+    await SKU_STORE.ensure_loaded_async(session)
+    payload = await asyncio.to_thread(_payload, None)
+    result = await build_plan_async(
+        payload,
+        instructions,
+        engine=engine,
+        operator_rules=operator_rules,
+        sharded=sharded,
+        max_concurrency=max_concurrency,
+        prune_prompt=prune_prompt,
+    )
+    zone_overrides = _zone_overrides(result)
+    return _with_plan(await generate_layout_async(session, zone_overrides=zone_overrides), result)
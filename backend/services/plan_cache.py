@@ -0,0 +1,160 @@
+"""
+TTL + LRU cache with single-flight de-duplication for expensive calls.
+
+Concurrent callers asking for the same key while a computation is running
+wait for that computation instead of starting their own.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+def payload_key(*parts: Any) -> str:
+    """Stable SHA-256 over JSON-serializable parts."""
+    encoded = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class _InFlight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _AsyncInFlight:
+    def __init__(self) -> None:
+        self.done = asyncio.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class PlanCache:
+    def __init__(self, max_entries: int = 128, ttl_s: float = 900.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._async_in_flight: Dict[str, _AsyncInFlight] = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expired": 0}
+
+    def _claim(self, key: str, in_flight: Dict[str, Any], make: Callable[[], Any]):
+        """(hit, value) for a fresh entry, else (False, (flight, leader))."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if time.monotonic() - stored_at <= self.ttl_s:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return True, copy.deepcopy(value)
+                del self._entries[key]
+                self._stats["expired"] += 1
+
+            flight = in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = in_flight[key] = make()
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+            return False, (flight, leader)
+
+    def _settle(
+        self, key: str, in_flight: Dict[str, Any], flight: Any, cacheable: Callable[[Any], bool]
+    ) -> None:
+        with self._lock:
+            in_flight.pop(key, None)
+            if flight.error is None and cacheable(flight.value):
+                self._entries[key] = (time.monotonic(), flight.value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats["evictions"] += 1
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """Return the cached value for `key`, computing it at most once at a time.
+
+        Values rejected by `cacheable` (e.g. error results) are shared with
+        callers already waiting but are not stored.
+        """
+        hit, claimed = self._claim(key, self._in_flight, _InFlight)
+        if hit:
+            return claimed
+        flight, leader = claimed
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.value)
+
+        try:
+            flight.value = compute()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            self._settle(key, self._in_flight, flight, cacheable)
+            flight.done.set()
+        return copy.deepcopy(flight.value)
+
+    async def get_or_compute_async(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """`get_or_compute` for coroutines: waiting callers await the leader
+        instead of blocking a thread. Shares entries with the sync path."""
+        hit, claimed = self._claim(key, self._async_in_flight, _AsyncInFlight)
+        if hit:
+            return claimed
+        flight, leader = claimed
+
+        if not leader:
+            await flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.value)
+
+        try:
+            flight.value = await compute()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            self._settle(key, self._async_in_flight, flight, cacheable)
+            flight.done.set()
+        return copy.deepcopy(flight.value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"] + self._stats["coalesced"]
+            return {
+                **self._stats,
+                "size": len(self._entries),
+                "in_flight": len(self._in_flight) + len(self._async_in_flight),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "hit_ratio": round(
+                    (self._stats["hits"] + self._stats["coalesced"]) / lookups, 4
+                )
+                if lookups
+                else 0.0,
+            }
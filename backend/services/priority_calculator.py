@@ -1,13 +1,56 @@
-from typing import Tuple
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Priority weights for (F, W, S, I) and the zone cut-offs, highest zone first.
+PRIORITY_WEIGHTS: Tuple[float, float, float, float] = (0.38, 0.24, 0.20, 0.18)
+ZONE_THRESHOLDS: Tuple[Tuple[float, str], ...] = ((0.7, "A"), (0.5, "B"), (0.3, "C"))
+DEFAULT_ZONE = "D"
+
+# The formula new scores use: the defaults above until a scoring profile is
+# activated (see services/scoring.py). Replaced as a whole, never mutated.
+_active: Dict[str, Any] = {
+    "weights": PRIORITY_WEIGHTS,
+    "thresholds": ZONE_THRESHOLDS,
+    "profile_id": None,
+    "profile_version": None,
+    "threshold_mode": "fixed",
+}
+
+
+def active_formula() -> Dict[str, Any]:
+    return _active
+
+
+def set_active_formula(
+    weights: Sequence[float],
+    cutoffs: Sequence[float],
+    profile_id: Optional[int] = None,
+    profile_version: Optional[int] = None,
+    threshold_mode: str = "fixed",
+) -> None:
+    """Score with `weights` (f, w, s, i) and A/B/C `cutoffs` from now on.
+    With `threshold_mode` ``capacity`` the cut-offs follow zone capacity
+    (see services/calibration.py)."""
+    global _active
+    _active = {
+        "weights": tuple(weights),
+        "thresholds": tuple(zip(cutoffs, (zone for _, zone in ZONE_THRESHOLDS))),
+        "profile_id": profile_id,
+        "profile_version": profile_version,
+        "threshold_mode": threshold_mode,
+    }
 
 
 def calculate_priority(f: float, w: float, s: float, i: float) -> float:
     """Compute Priority according to weights.
 
-    Priority = 0.38*F + 0.24*W + 0.20*S + 0.18*I
+    Priority = 0.38*F + 0.24*W + 0.20*S + 0.18*I, or the active scoring
+    profile's weights.
     Returns float in 0..1 (assuming inputs normalized).
     """
-    priority = 0.38 * f + 0.24 * w + 0.20 * s + 0.18 * i
+    wf, ww, ws, wi = _active["weights"]
+    priority = wf * f + ww * w + ws * s + wi * i
     # clamp
     if priority < 0:
         priority = 0.0
@@ -17,10 +60,37 @@ def calculate_priority(f: float, w: float, s: float, i: float) -> float:
 
 
 def priority_to_zone(priority: float) -> str:
-    if priority >= 0.7:
-        return "A"
-    if priority >= 0.5:
-        return "B"
-    if priority >= 0.3:
-        return "C"
-    return "D"
+    for cutoff, zone in _active["thresholds"]:
+        if priority >= cutoff:
+            return zone
+    return DEFAULT_ZONE
+
+
+def calculate_priority_batch(
+    f: Sequence[float],
+    w: Sequence[float],
+    s: Sequence[float],
+    i: Sequence[float],
+    weights: Optional[Sequence[float]] = None,
+) -> np.ndarray:
+    """Vectorized form of `calculate_priority` over equally sized columns."""
+    wf, ww, ws, wi = weights if weights is not None else _active["weights"]
+    priority = (
+        wf * np.asarray(f, dtype=np.float64)
+        + ww * np.asarray(w, dtype=np.float64)
+        + ws * np.asarray(s, dtype=np.float64)
+        + wi * np.asarray(i, dtype=np.float64)
+    )
+    return np.round(np.clip(priority, 0.0, 1.0), 4)
+
+
+def priority_to_zone_batch(
+    priorities: Sequence[float], cutoffs: Optional[Sequence[float]] = None
+) -> np.ndarray:
+    """Vectorized form of `priority_to_zone`; returns an array of zone letters."""
+    thresholds = _active["thresholds"]
+    if cutoffs is None:
+        cutoffs = [cut for cut, _ in thresholds]
+    ascending = np.array(list(reversed(cutoffs)))
+    labels = np.array([DEFAULT_ZONE] + [zone for _, zone in reversed(ZONE_THRESHOLDS)])
+    return labels[np.searchsorted(ascending, np.asarray(priorities), side="right")]
@@ -0,0 +1,115 @@
+"""
+Priority-ordered index over SKUs, overall and per zone.
+
+Keys are (-priority, id) tuples kept in `SortedKeyList`s, the order every
+reader uses (priority DESC, ties by id). A write is an O(log n) insert or
+delete in the overall and the zone list; top-K is a slice, a SKU's rank is a
+lookup, and a quantile is a positional read from the zone's list, so none of
+them sort or scan.
+"""
+import math
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.services.sorted_keys import SortedKeyList
+
+Key = Tuple[float, int]
+
+# Read in place of a zone that has no keys.
+_EMPTY = SortedKeyList()
+
+
+def make_key(priority: Optional[float], item_id: int) -> Key:
+    return (-(priority or 0.0), item_id)
+
+
+class PriorityIndex:
+    def __init__(self) -> None:
+        self._all = SortedKeyList()
+        self._zones: Dict[str, SortedKeyList] = {}
+
+    def build_ranked(self, keys: List[Key], zone_keys: Dict[str, List[Key]]) -> None:
+        """Replace the index with key lists already in rank order, overall
+        and per zone (the caller sorted them, e.g. with NumPy)."""
+        self._all = SortedKeyList(keys)
+        self._zones = {zone: SortedKeyList(keys) for zone, keys in zone_keys.items()}
+
+    def insert(self, priority: float, item_id: int, zone: str) -> None:
+        key = make_key(priority, item_id)
+        self._all.add(key)
+        if zone not in self._zones:
+            self._zones[zone] = SortedKeyList()
+        self._zones[zone].add(key)
+
+    def remove(self, priority: float, item_id: int, zone: str) -> None:
+        key = make_key(priority, item_id)
+        self._all.remove(key)
+        if zone in self._zones:
+            self._zones[zone].remove(key)
+
+    def memory_bytes(self) -> int:
+        """Approximate: the lists plus one shared key tuple, float and int
+        per SKU."""
+        lists = self._all.memory_bytes() + sum(keys.memory_bytes() for keys in self._zones.values())
+        if not self._all:
+            return lists
+        key = self._all[0]
+        per_key = sys.getsizeof(key) + sys.getsizeof(key[0]) + sys.getsizeof(key[1])
+        return lists + per_key * len(self._all)
+
+    # --------------------------------------------------------------- reads
+    def _keys(self, zone: Optional[str]) -> SortedKeyList:
+        return self._all if zone is None else self._zones.get(zone, _EMPTY)
+
+    def zones(self) -> List[str]:
+        return [zone for zone, keys in self._zones.items() if keys]
+
+    def zone_keys(self, zone: str) -> Iterable[Key]:
+        """The zone's keys in rank order (the live list; do not modify)."""
+        return self._keys(zone)
+
+    def size(self, zone: Optional[str] = None) -> int:
+        return len(self._keys(zone))
+
+    def top(self, k: int, zone: Optional[str] = None) -> List[Key]:
+        return list(self._keys(zone).islice(0, k))
+
+    def rank(self, priority: float, item_id: int, zone: Optional[str] = None) -> Optional[int]:
+        """1-based rank of the SKU, or None if it is not indexed there."""
+        index = self._keys(zone).index(make_key(priority, item_id))
+        return None if index is None else index + 1
+
+    def priority_at(self, rank: int, zone: Optional[str] = None) -> Optional[float]:
+        """Priority of the SKU at 1-based `rank`, or None past the end."""
+        keys = self._keys(zone)
+        if not 1 <= rank <= len(keys):
+            return None
+        return -keys[rank - 1][0]
+
+    def between(self, low: float, high: float) -> List[Key]:
+        """Keys of SKUs with low <= priority < high, in rank order."""
+        start = self._all.bisect_left((-high, math.inf))
+        end = self._all.bisect_left((-low, math.inf))
+        return list(self._all.islice(start, end))
+
+    def percentile(self, rank: int, zone: Optional[str] = None) -> float:
+        """Share of SKUs ranked below `rank`, in percent (100 for the top
+        SKU, 0 for the last)."""
+        count = self.size(zone)
+        if count <= 1:
+            return 100.0
+        return 100.0 * (count - rank) / (count - 1)
+
+    def quantile(self, q: float, zone: Optional[str] = None) -> Optional[float]:
+        """Priority at quantile `q` (0-1) with linear interpolation, as
+        numpy.quantile would return over the same priorities."""
+        keys = self._keys(zone)
+        if not keys:
+            return None
+        # Ascending position q * (n - 1); the lists run descending.
+        position = q * (len(keys) - 1)
+        lower = math.floor(position)
+        upper = min(lower + 1, len(keys) - 1)
+        low_value = -keys[len(keys) - 1 - lower][0]
+        high_value = -keys[len(keys) - 1 - upper][0]
+        return low_value + (high_value - low_value) * (position - lower)
@@ -0,0 +1,158 @@
+"""
+Pre-filter for the optimize prompt: only uncertain SKUs go to the model.
+
+A SKU is "unambiguous" when its priority is clear of every zone cut-off, no
+default rule fires against its current zone, it is not a large-volume item
+(whose zone the rules leave open), and the operator instructions do not
+touch it. Unambiguous SKUs are summarized per zone instead of listed.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from backend.services.ai_client import estimate_tokens, sku_prompt_line
+from backend.services.normalization import metric_scale
+from backend.services.slotting_rules import BORDERLINE_MARGIN, borderline_mask, rule_flags
+
+_METRIC_WORDS = {
+    "f": ("f", "freq", "frequency", "frequencies", "pick", "picks", "velocity", "inbound", "fast"),
+    "w": ("w", "weight", "weights", "heavy", "light", "kg"),
+    "s": ("s", "size", "sizes", "volume", "volumes", "large", "bulky", "big", "small"),
+    "i": ("i", "inventory", "stock"),
+    "priority": ("priority",),
+}
+_WORD_TO_METRIC = {word: metric for metric, words in _METRIC_WORDS.items() for word in words}
+_CONDITION = re.compile(
+    r"\b(" + "|".join(sorted(_WORD_TO_METRIC, key=len, reverse=True)) + r")\b\s*(>=|<=|>|<|=)\s*(\d+(?:\.\d+)?)",
+    re.IGNORECASE,
+)
+_WORD = re.compile(r"[A-Za-z0-9_\-]+")
+
+
+def _columns(items: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    return {
+        "priority": np.array([item["priority"] for item in items], dtype=np.float64),
+        "f": np.array([item["f"] for item in items], dtype=np.float64),
+        "w": np.array([item["w"] for item in items], dtype=np.float64),
+        "s": np.array([item["s"] for item in items], dtype=np.float64),
+        "i": np.array([item["i"] for item in items], dtype=np.float64),
+        "zone": np.array([str(item["zone"] or "") for item in items]),
+    }
+
+
+def instruction_mask(
+    items: List[Dict[str, Any]], columns: Dict[str, np.ndarray], instructions: Optional[str]
+) -> Optional[np.ndarray]:
+    """SKUs touched by the operator instructions.
+
+    SKU codes named in the text are touched, as are SKUs matching numeric
+    conditions such as "weight > 10" (raw values are normalized). Returns
+    None when the text mentions metrics without a condition we can evaluate,
+    meaning every SKU may be affected and nothing should be pruned.
+    """
+    touched = np.zeros(len(items), dtype=bool)
+    if not instructions or not instructions.strip():
+        return touched
+
+    words = {word.upper() for word in _WORD.findall(instructions)}
+    for idx, item in enumerate(items):
+        if item["sku_code"].upper() in words:
+            touched[idx] = True
+
+    conditions = list(_CONDITION.finditer(instructions))
+    scale = metric_scale()
+    for match in conditions:
+        metric = _WORD_TO_METRIC[match.group(1).lower()]
+        value = float(match.group(3))
+        if metric in scale and value > 1:
+            value = value / scale[metric]
+        column = columns[metric]
+        # Widen by the borderline margin so near-misses are still sent.
+        op = match.group(2)
+        if op in (">", ">="):
+            touched |= column >= value - BORDERLINE_MARGIN
+        elif op in ("<", "<="):
+            touched |= column <= value + BORDERLINE_MARGIN
+        else:
+            touched |= np.abs(column - value) <= BORDERLINE_MARGIN
+
+    condition_spans = [match.span() for match in conditions]
+    for match in re.finditer(r"[A-Za-z]+", instructions):
+        word = match.group(0).lower()
+        if word not in _WORD_TO_METRIC or len(word) == 1:
+            continue
+        if not any(start <= match.start() < end for start, end in condition_spans):
+            return None
+    return touched
+
+
+def _aggregate_note(items: List[Dict[str, Any]], columns: Dict[str, np.ndarray], mask: np.ndarray) -> str:
+    lines = [
+        f"{int(mask.sum())} further SKUs are omitted: they are clear of every zone cut-off, "
+        "no default rule applies to them, and they should keep their current zone. Per zone:"
+    ]
+    zones = columns["zone"][mask]
+    for zone in sorted(set(zones.tolist())):
+        in_zone = zones == zone
+        pr = columns["priority"][mask][in_zone]
+        lines.append(
+            f"- zone {zone}: {int(in_zone.sum())} SKUs, priority {pr.min():.3f}-{pr.max():.3f} "
+            f"(mean {pr.mean():.3f}), mean f={columns['f'][mask][in_zone].mean():.2f}, "
+            f"w={columns['w'][mask][in_zone].mean():.2f}, s={columns['s'][mask][in_zone].mean():.2f}"
+        )
+    return "\n".join(lines)
+
+
+def prune_for_prompt(
+    items: List[Dict[str, Any]], instructions: Optional[str] = None
+) -> Dict[str, Any]:
+    """Split SKUs into those sent to the model and a summary of the rest.
+
+    Returns the SKUs to send, a context note describing the omitted ones, and
+    token estimates for the full versus pruned prompt.
+    """
+    line_tokens = [estimate_tokens(sku_prompt_line(item)) for item in items]
+    full_tokens = sum(line_tokens)
+    if not items:
+        return {"items": items, "note": None, "stats": _stats(0, 0, full_tokens, full_tokens)}
+
+    columns = _columns(items)
+    touched = instruction_mask(items, columns, instructions)
+    if touched is None:
+        return {
+            "items": items,
+            "note": None,
+            "stats": _stats(len(items), len(items), full_tokens, full_tokens),
+        }
+
+    flags = rule_flags(columns)
+    uncertain = (
+        borderline_mask(columns["priority"])
+        | flags["high_priority_misplaced"]
+        | flags["heavy_misplaced"]
+        | flags["high_f_misplaced"]
+        | flags["large"]
+        | touched
+    )
+    sent = [item for item, keep in zip(items, uncertain.tolist()) if keep]
+    omitted = ~uncertain
+    note = _aggregate_note(items, columns, omitted) if omitted.any() else None
+    sent_tokens = sum(tok for tok, keep in zip(line_tokens, uncertain.tolist()) if keep)
+    if note:
+        sent_tokens += estimate_tokens(note)
+    return {
+        "items": sent,
+        "note": note,
+        "stats": _stats(len(items), len(sent), full_tokens, sent_tokens),
+    }
+
+
+def _stats(total: int, sent: int, full_tokens: int, sent_tokens: int) -> Dict[str, int]:
+    return {
+        "sku_total": total,
+        "sku_sent": sent,
+        "est_sku_tokens_full": full_tokens,
+        "est_sku_tokens_sent": sent_tokens,
+        "est_tokens_saved": max(0, full_tokens - sent_tokens),
+    }
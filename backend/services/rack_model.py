@@ -0,0 +1,313 @@
+"""
+Rack and slot model built from the `rack` section of layout.json.
+
+Each zone band is filled with aisle modules (rack, aisle, rack along x).
+Along each aisle, racks are grouped in clusters of `cluster_size`, with
+cross aisles of `aisle_m` between them. Every rack level is one addressable
+slot (zone, aisle, rack, level). It has a volume capacity of
+length x width x `level_height_m`, a load limit of `level_load_kg`, and
+room for at most `skus_per_slot` SKUs.
+Slots live in flat NumPy arrays, so 100k slots take a few MB.
+
+SKU load is derived from the raw metrics: raw_w is the unit weight (kg) and
+raw_s the unit volume (cm3), times `units_per_sku` units kept in the slot.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from backend.services.layout_builder import layout_mtime_ns, load_warehouse
+from backend.services.sku_store import SKU_STORE
+from backend.services.slot_solver import gate_distance, gate_point
+from backend.services.slotting_rules import RAW_RULE_CUTOFFS
+
+RACK_DEFAULTS = {
+    "length_m": 3.6,
+    "width_m": 3.0,
+    "levels": 7,
+    "cluster_size": 3,
+    "aisle_m": 4.0,
+    "level_height_m": 1.0,
+    "level_load_kg": 500.0,
+    # Heavy SKUs (w above the default heavy rule) only go on levels below this.
+    "heavy_max_level": 2,
+    "units_per_sku": 1,
+    # Pick faces per rack level: at most this many SKUs share one slot.
+    "skus_per_slot": 4,
+}
+
+# Slot grid for the current layout.json, rebuilt when its mtime changes.
+_grid_cache: Tuple[int, Optional[Dict[str, Any]]] = (0, None)
+
+
+def rack_config(warehouse: Dict[str, Any]) -> Dict[str, Any]:
+    return {**RACK_DEFAULTS, **(warehouse.get("rack") or {})}
+
+
+def _axis_positions(span: float, unit: float, group: int, gap: float) -> np.ndarray:
+    """Centres of `unit`-long items packed in groups of `group`, groups
+    separated by `gap`, centred in `span`."""
+    group_len = unit * group
+    groups = max(1, int((span + gap) // (group_len + gap)))
+    used = groups * group_len + (groups - 1) * gap
+    start = max(0.0, (span - used) / 2)
+    group_idx, within = np.divmod(np.arange(groups * group), group)
+    return start + group_idx * (group_len + gap) + (within + 0.5) * unit
+
+
+def build_slot_grid(warehouse: Dict[str, Any]) -> Dict[str, Any]:
+    """Expand the rack config into per-slot arrays.
+
+    Arrays are ordered zone, aisle, rack, level. Racks are numbered along
+    the aisle, alternating left (even) and right (odd) faces.
+    """
+    rack = rack_config(warehouse)
+    length, depth, aisle_w = rack["length_m"], rack["width_m"], rack["aisle_m"]
+    levels = int(rack["levels"])
+    module_w = 2 * depth + aisle_w
+    along = _axis_positions(warehouse["height_m"], length, int(rack["cluster_size"]), aisle_w)
+
+    zone_ids = [zone["id"] for zone in warehouse["zones"]]
+    parts: Dict[str, List[np.ndarray]] = {
+        name: [] for name in ("zone", "aisle", "rack", "level", "x_m", "y_m")
+    }
+    for zone_idx, zone in enumerate(warehouse["zones"]):
+        band_w = zone["to_m"] - zone["from_m"]
+        aisles = max(1, int(band_w // module_w))
+        first_centre = zone["from_m"] + (band_w - aisles * module_w) / 2 + module_w / 2
+        aisle_idx, rack_idx, level_idx = np.meshgrid(
+            np.arange(aisles), np.arange(2 * len(along)), np.arange(levels), indexing="ij"
+        )
+        aisle_idx, rack_idx, level_idx = aisle_idx.ravel(), rack_idx.ravel(), level_idx.ravel()
+        side = np.where(rack_idx % 2 == 0, -1.0, 1.0)
+        parts["zone"].append(np.full(aisle_idx.size, zone_idx, dtype=np.int8))
+        parts["aisle"].append(aisle_idx.astype(np.int16))
+        parts["rack"].append(rack_idx.astype(np.int16))
+        parts["level"].append(level_idx.astype(np.int8))
+        parts["x_m"].append(
+            (first_centre + aisle_idx * module_w + side * (aisle_w + depth) / 2).astype(np.float32)
+        )
+        parts["y_m"].append(along[rack_idx // 2].astype(np.float32))
+
+    grid: Dict[str, Any] = {name: np.concatenate(arrays) for name, arrays in parts.items()}
+    count = grid["zone"].size
+    grid["zone_ids"] = zone_ids
+    grid["volume_m3"] = np.full(count, length * depth * rack["level_height_m"], dtype=np.float32)
+    grid["max_kg"] = np.full(count, rack["level_load_kg"], dtype=np.float32)
+    grid["gate_distance_m"] = gate_distance(
+        grid["x_m"].astype(np.float64), grid["y_m"].astype(np.float64), gate_point(warehouse)
+    ).astype(np.float32)
+    grid["config"] = rack
+    return grid
+
+
+def slot_grid() -> Dict[str, Any]:
+    """Slot grid for the current layout.json (cached by mtime)."""
+    global _grid_cache
+    mtime = layout_mtime_ns()
+    cached_mtime, cached = _grid_cache
+    if cached is None or cached_mtime != mtime:
+        cached = build_slot_grid(load_warehouse())
+        _grid_cache = (mtime, cached)
+    return cached
+
+
+def slot_address(grid: Dict[str, Any], slot: int) -> str:
+    zone_id = grid["zone_ids"][grid["zone"][slot]]
+    return (
+        f"{zone_id}-A{grid['aisle'][slot] + 1}-R{grid['rack'][slot] + 1:02d}"
+        f"-L{grid['level'][slot] + 1}"
+    )
+
+
+def grid_summary(grid: Dict[str, Any]) -> Dict[str, Any]:
+    per_zone = {}
+    for zone_idx, zone_id in enumerate(grid["zone_ids"]):
+        members = grid["zone"] == zone_idx
+        per_zone[zone_id] = {
+            "slots": int(members.sum()),
+            "aisles": int(grid["aisle"][members].max() + 1) if members.any() else 0,
+            "volume_m3": round(float(grid["volume_m3"][members].sum()), 1),
+            "max_kg": round(float(grid["max_kg"][members].sum()), 1),
+        }
+    return {
+        "slots": int(grid["zone"].size),
+        "bytes": int(
+            sum(grid[name].nbytes for name in grid if isinstance(grid[name], np.ndarray))
+        ),
+        "rack": grid["config"],
+        "zones": per_zone,
+    }
+
+
+def sku_loads(
+    raw_w: np.ndarray, raw_s: np.ndarray, units_per_sku: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(volume m3, weight kg) a SKU needs, from raw w (kg) and s (cm3)."""
+    weight_kg = raw_w * units_per_sku
+    volume_m3 = raw_s / 1e6 * units_per_sku
+    return volume_m3, weight_kg
+
+
+def _next_fit(
+    order: List[int],
+    slots: List[int],
+    volume: List[float],
+    weight: List[float],
+    volume_left: List[float],
+    kg_left: List[float],
+    faces_left: List[int],
+    assigned: List[int],
+    full_volume: float,
+    full_kg: float,
+) -> None:
+    # Plain lists: this loop is sequential by nature and numpy scalar
+    # indexing would dominate it.
+    cursor = 0
+    for sku in order:
+        need_v, need_kg = volume[sku], weight[sku]
+        if need_v > full_volume or need_kg > full_kg:
+            continue  # oversize: no empty slot could take it either
+        while cursor < len(slots):
+            slot = slots[cursor]
+            if faces_left[slot] and volume_left[slot] >= need_v and kg_left[slot] >= need_kg:
+                volume_left[slot] -= need_v
+                kg_left[slot] -= need_kg
+                faces_left[slot] -= 1
+                assigned[sku] = slot
+                break
+            cursor += 1
+
+
+def place_in_slots(
+    grid: Dict[str, Any], skus: Dict[str, np.ndarray]
+) -> Dict[str, Any]:
+    """Pack SKUs into the slots of their zone with next-fit.
+
+    `skus` holds equal-length arrays for zone (zone id strings), raw_w and raw_s, in
+    placement order (priority desc, id). Within a zone, slots are visited
+    nearest-to-gate first, lower levels first. Heavy SKUs are packed before
+    the rest and only onto levels below `heavy_max_level`.
+
+    Returns `slot` (index per SKU, -1 when it did not fit), the overflow
+    `reason` per SKU, SKU loads and the capacity left per slot.
+    """
+    config = grid["config"]
+    volume, weight = sku_loads(skus["raw_w"], skus["raw_s"], config["units_per_sku"])
+    volume_list, weight_list = volume.tolist(), weight.tolist()
+    volume_left = grid["volume_m3"].astype(np.float64).tolist()
+    kg_left = grid["max_kg"].astype(np.float64).tolist()
+    faces_left = [int(config["skus_per_slot"])] * len(volume_left)
+    assigned = [-1] * len(volume_list)
+    heavy = skus["raw_w"] > RAW_RULE_CUTOFFS["w"]
+    slot_order = np.lexsort((grid["level"], grid["gate_distance_m"]))
+    low = grid["level"][slot_order] < config["heavy_max_level"]
+
+    for zone_idx, zone_id in enumerate(grid["zone_ids"]):
+        in_zone = grid["zone"][slot_order] == zone_idx
+        members = skus["zone"] == zone_id
+        for sku_mask, slots in (
+            (members & heavy, slot_order[in_zone & low]),
+            (members & ~heavy, slot_order[in_zone]),
+        ):
+            if not slots.size:
+                continue
+            _next_fit(
+                np.flatnonzero(sku_mask).tolist(),
+                slots.tolist(),
+                volume_list,
+                weight_list,
+                volume_left,
+                kg_left,
+                faces_left,
+                assigned,
+                float(grid["volume_m3"][slots].max()),
+                float(grid["max_kg"][slots].max()),
+            )
+
+    assigned = np.array(assigned, dtype=np.int64)
+    reason = np.full(len(volume), "", dtype="<U16")
+    unplaced = assigned < 0
+    known_zone = np.isin(skus["zone"], grid["zone_ids"])
+    oversize = (volume > float(grid["volume_m3"].max())) | (weight > float(grid["max_kg"].max()))
+    reason[unplaced & ~known_zone] = "unknown_zone"
+    reason[unplaced & known_zone & oversize] = "oversize"
+    reason[unplaced & known_zone & ~oversize] = "zone_full"
+    return {
+        "slot": assigned,
+        "reason": reason,
+        "volume_m3": volume,
+        "weight_kg": weight,
+        "volume_left": np.array(volume_left),
+        "kg_left": np.array(kg_left),
+    }
+
+
+def slot_layout(
+    db: Session,
+    zone_overrides: Optional[Dict[str, str]] = None,
+    include_placements: bool = True,
+) -> Dict[str, Any]:
+    """Place every SKU into a rack slot and report utilization and overflow."""
+    grid = slot_grid()
+    skus = SKU_STORE.columns(db, ("priority", "raw_w", "raw_s"), zone_overrides)
+    placed = place_in_slots(grid, skus)
+    slot = placed["slot"]
+
+    utilization = {}
+    for zone_idx, zone_id in enumerate(grid["zone_ids"]):
+        in_zone = grid["zone"] == zone_idx
+        used = np.unique(slot[(slot >= 0)])
+        used = used[grid["zone"][used] == zone_idx]
+        volume_total = float(grid["volume_m3"][in_zone].sum())
+        kg_total = float(grid["max_kg"][in_zone].sum())
+        utilization[zone_id] = {
+            "skus": int(((slot >= 0) & (skus["zone"] == zone_id)).sum()),
+            "slots_used": int(used.size),
+            "slots": int(in_zone.sum()),
+            "volume_pct": round(
+                100 * (volume_total - placed["volume_left"][in_zone].sum()) / volume_total, 2
+            )
+            if volume_total
+            else 0.0,
+            "weight_pct": round(100 * (kg_total - placed["kg_left"][in_zone].sum()) / kg_total, 2)
+            if kg_total
+            else 0.0,
+        }
+
+    overflow = [
+        {
+            "sku_code": skus["sku_code"][idx],
+            "zone": skus["zone"][idx],
+            "reason": placed["reason"][idx],
+            "volume_m3": round(float(placed["volume_m3"][idx]), 4),
+            "weight_kg": round(float(placed["weight_kg"][idx]), 2),
+        }
+        for idx in np.flatnonzero(slot < 0).tolist()
+    ]
+    result: Dict[str, Any] = {
+        "grid": grid_summary(grid),
+        "utilization": utilization,
+        "placed": int((slot >= 0).sum()),
+        "overflow_count": len(overflow),
+        "overflow": overflow,
+    }
+    if include_placements:
+        result["placements"] = [
+            {
+                "sku_code": skus["sku_code"][idx],
+                "product_name": skus["product_name"][idx],
+                "priority": float(skus["priority"][idx]),
+                "zone": skus["zone"][idx],
+                "slot_id": slot_address(grid, target),
+                "aisle": int(grid["aisle"][target]) + 1,
+                "rack": int(grid["rack"][target]) + 1,
+                "level": int(grid["level"][target]) + 1,
+                "x_m": round(float(grid["x_m"][target]), 2),
+                "y_m": round(float(grid["y_m"][target]), 2),
+            }
+            for idx, target in enumerate(slot.tolist())
+            if target >= 0
+        ]
+    return result
@@ -0,0 +1,233 @@
+"""
+What-if scoring: alternative priority weights and zone cut-offs evaluated
+against every SKU at once.
+
+Each scenario is a weight vector for (f, w, s, i) and descending A/B/C
+cut-offs. The SKU metrics are an (n, 4) matrix and the scenarios a (4, m)
+one, so one matrix product scores every SKU under every scenario; zones
+follow from comparing the (n, m) priorities with each scenario's cut-offs.
+SKUs are processed in row chunks sized so the (rows, m) blocks stay around
+`CHUNK_CELLS` cells, which keeps memory flat for 100k SKUs x 1000
+scenarios.
+
+Optionally each scenario's banded layout (zones filled in priority order,
+as `generate_layout` does) is run through the travel model against one
+order stream, next to the stored layout as the baseline.
+"""
+import itertools
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from backend.services.layout_builder import load_warehouse, slot_coordinates
+from backend.services.priority_calculator import DEFAULT_ZONE, ZONE_THRESHOLDS, active_formula
+from backend.services.sku_store import SKU_STORE
+from backend.services.slot_solver import gate_point
+from backend.services.travel_sim import SYNTHETIC_SEED, evaluate, generate_orders, order_lines, placed_lines
+
+MAX_SCENARIOS = 10000
+# Travel simulation builds and walks one layout per scenario.
+MAX_TRAVEL_SCENARIOS = 100
+CHUNK_CELLS = 1 << 22
+
+ZONE_LABELS = [zone for _, zone in ZONE_THRESHOLDS] + [DEFAULT_ZONE]
+
+
+def current_formula() -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+    """(weights, cut-offs) new scores use: the active scoring profile's."""
+    formula = active_formula()
+    return tuple(formula["weights"]), tuple(cut for cut, _ in formula["thresholds"])
+
+
+def expand_scenarios(
+    scenarios: Sequence[Dict[str, Any]], grid: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """Explicit scenarios followed by the cartesian product of `grid`
+    weights x thresholds; missing parts default to the current formula.
+    Raises ValueError on invalid weights or cut-offs."""
+    current_weights, current_thresholds = current_formula()
+    expanded = []
+    for scenario in scenarios:
+        expanded.append(
+            {
+                "name": scenario.get("name"),
+                "weights": tuple(scenario.get("weights") or current_weights),
+                "thresholds": tuple(scenario.get("thresholds") or current_thresholds),
+            }
+        )
+    if grid:
+        weight_sets = grid.get("weights") or [current_weights]
+        threshold_sets = grid.get("thresholds") or [current_thresholds]
+        count = len(weight_sets) * len(threshold_sets)
+        if len(expanded) + count > MAX_SCENARIOS:
+            raise ValueError(f"At most {MAX_SCENARIOS} scenarios per request")
+        expanded.extend(
+            {"name": None, "weights": tuple(weights), "thresholds": tuple(thresholds)}
+            for weights, thresholds in itertools.product(weight_sets, threshold_sets)
+        )
+    if not expanded:
+        raise ValueError("Give at least one scenario or a grid")
+    if len(expanded) > MAX_SCENARIOS:
+        raise ValueError(f"At most {MAX_SCENARIOS} scenarios per request")
+
+    for number, scenario in enumerate(expanded):
+        weights, thresholds = scenario["weights"], scenario["thresholds"]
+        if len(weights) != 4 or any(weight < 0 for weight in weights):
+            raise ValueError(f"Scenario {number}: weights must be 4 non-negative numbers (f, w, s, i)")
+        if len(thresholds) != len(ZONE_THRESHOLDS) or any(
+            not 0.0 <= cut <= 1.0 for cut in thresholds
+        ):
+            raise ValueError(f"Scenario {number}: thresholds must be 3 numbers between 0 and 1")
+        if any(high < low for high, low in zip(thresholds, thresholds[1:])):
+            raise ValueError(f"Scenario {number}: thresholds must be descending (A, B, C)")
+        if scenario["name"] is None:
+            scenario["name"] = f"scenario-{number}"
+    return expanded
+
+
+def score_zones(metrics: np.ndarray, weights: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """Zone index (0 = A ... 3 = D) of each SKU row under each scenario
+    column, with the rounding and clipping of `calculate_priority_batch`."""
+    priority = metrics @ weights.T
+    np.clip(priority, 0.0, 1.0, out=priority)
+    np.round(priority, 4, out=priority)
+    # Cut-offs descend, so a SKU's zone is the number of cut-offs above it.
+    zones = (priority < thresholds[:, 0]).astype(np.int8)
+    for column in range(1, thresholds.shape[1]):
+        zones += priority < thresholds[:, column]
+    return zones
+
+
+def _banded_coordinates(
+    warehouse: Dict[str, Any], zone_idx: np.ndarray, priority: np.ndarray, ids: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-SKU (x, y) when each zone's SKUs fill its band in (priority DESC,
+    id) order; NaN for SKUs whose zone has no band."""
+    bands = {zone["id"]: zone for zone in warehouse["zones"]}
+    x_m = np.full(zone_idx.size, np.nan)
+    y_m = np.full(zone_idx.size, np.nan)
+    order = np.lexsort((ids, -priority, zone_idx))
+    sorted_zones = zone_idx[order]
+    for code, label in enumerate(ZONE_LABELS):
+        band = bands.get(label)
+        if band is None:
+            continue
+        start, end = np.searchsorted(sorted_zones, [code, code + 1])
+        rows = order[start:end]
+        x_m[rows], y_m[rows] = slot_coordinates(
+            band["from_m"], band["to_m"], warehouse["height_m"], rows.size
+        )
+    return x_m, y_m
+
+
+def evaluate_scenarios(
+    db: Session,
+    scenarios: Sequence[Dict[str, Any]] = (),
+    grid: Optional[Dict[str, Any]] = None,
+    travel: bool = False,
+    orders: Optional[Sequence[Sequence[str]]] = None,
+    synthetic_orders: int = 10000,
+    mean_lines: float = 3.0,
+    seed: int = SYNTHETIC_SEED,
+) -> Dict[str, Any]:
+    """Zone counts and SKUs changing zone (against the stored zones) for
+    every scenario, plus simulated travel per scenario when `travel` is set."""
+    started = time.perf_counter()
+    expanded = expand_scenarios(scenarios, grid)
+    if travel and len(expanded) > MAX_TRAVEL_SCENARIOS:
+        raise ValueError(f"Travel is simulated for at most {MAX_TRAVEL_SCENARIOS} scenarios")
+
+    skus = SKU_STORE.columns(db, ("id", "priority", "f", "w", "s", "i"))
+    count = len(skus["sku_code"])
+    metrics = np.column_stack([skus[name] for name in ("f", "w", "s", "i")])
+    weights = np.array([scenario["weights"] for scenario in expanded], dtype=np.float64)
+    thresholds = np.array([scenario["thresholds"] for scenario in expanded], dtype=np.float64)
+    label_index = {label: code for code, label in enumerate(ZONE_LABELS)}
+    # Stored zones outside A-D never match a scenario zone.
+    current = np.array([label_index.get(zone, -1) for zone in skus["zone"].tolist()], dtype=np.int8)
+
+    zone_counts = np.zeros((len(ZONE_LABELS), len(expanded)), dtype=np.int64)
+    changed = np.zeros(len(expanded), dtype=np.int64)
+    chunk_rows = max(1, CHUNK_CELLS // len(expanded))
+    for start in range(0, count, chunk_rows):
+        zones = score_zones(metrics[start : start + chunk_rows], weights, thresholds)
+        for code in range(len(ZONE_LABELS)):
+            zone_counts[code] += (zones == code).sum(axis=0)
+        changed += (zones != current[start : start + chunk_rows, None]).sum(axis=0)
+    scoring_ms = (time.perf_counter() - started) * 1000
+
+    results = [
+        {
+            "name": scenario["name"],
+            "weights": list(scenario["weights"]),
+            "thresholds": list(scenario["thresholds"]),
+            "zone_counts": {label: int(zone_counts[code, column]) for code, label in enumerate(ZONE_LABELS)},
+            "changed": int(changed[column]),
+            "changed_pct": round(100.0 * changed[column] / count, 2) if count else 0.0,
+        }
+        for column, scenario in enumerate(expanded)
+    ]
+    stored_counts = {label: int((current == code).sum()) for code, label in enumerate(ZONE_LABELS)}
+    current_weights, current_thresholds = current_formula()
+    baseline: Dict[str, Any] = {
+        "weights": list(current_weights),
+        "thresholds": list(current_thresholds),
+        "zone_counts": stored_counts,
+    }
+    response: Dict[str, Any] = {"skus": count, "scenarios": len(expanded)}
+
+    if travel:
+        codes = skus["sku_code"]
+        unknown = 0
+        if orders is not None:
+            order_idx, sku_idx, unknown = order_lines(
+                orders, {code: idx for idx, code in enumerate(codes)}
+            )
+            order_count = len(orders)
+        elif count:
+            order_idx, sku_idx = generate_orders(skus["f"], synthetic_orders, mean_lines, seed)
+            order_count = synthetic_orders
+        else:
+            order_idx = sku_idx = np.zeros(0, dtype=np.int64)
+            order_count = 0
+        warehouse = load_warehouse()
+        gate = gate_point(warehouse)
+        ids = skus["id"]
+
+        base_x, base_y = _banded_coordinates(warehouse, current, skus["priority"], ids)
+        base_lines = placed_lines(sku_idx, base_x)
+        baseline["travel"] = evaluate(order_idx, sku_idx, base_x, base_y, gate, order_count)
+        for column, result in enumerate(results):
+            priority = np.round(np.clip(metrics @ weights[column], 0.0, 1.0), 4)
+            zone_idx = score_zones(metrics, weights[column : column + 1], thresholds[column : column + 1])[:, 0]
+            x_m, y_m = _banded_coordinates(warehouse, zone_idx, priority, ids)
+            # Compared with the baseline on the lines both layouts placed.
+            scenario_lines = placed_lines(sku_idx, x_m)
+            lines = base_lines & scenario_lines
+            like_for_like = bool((scenario_lines == base_lines).all())
+            result["travel"] = evaluate(order_idx, sku_idx, x_m, y_m, gate, order_count, lines=lines)
+            base_m = (
+                baseline["travel"]["total_m"]
+                if like_for_like
+                else evaluate(order_idx, sku_idx, base_x, base_y, gate, order_count, lines=lines)["total_m"]
+            )
+            result["travel_vs_baseline_pct"] = (
+                round(100.0 * (result["travel"]["total_m"] / base_m - 1.0), 2) if base_m else 0.0
+            )
+            result["travel_like_for_like"] = like_for_like
+        response.update(
+            {"orders": order_count, "lines": int(order_idx.size), "unknown_lines": unknown,
+             "synthetic": orders is None}
+        )
+
+    response.update(
+        {
+            "baseline": baseline,
+            "results": results,
+            "scoring_ms": round(scoring_ms, 1),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+    )
+    return response
@@ -0,0 +1,448 @@
+"""
+Versioned scoring profiles and the re-scoring of stored SKUs.
+
+A profile holds the priority weights (f, w, s, i) and the A/B/C cut-offs.
+Exactly one profile is active; its formula is what `priority_calculator`
+scores new and updated SKUs with, and every SKU row records the profile id
+and version that computed its priority and zone. Editing a profile bumps its
+version.
+
+Activating a profile (or editing the active one) queues a ``rescore`` job
+that walks `sku_items` in id order, `RECOMPUTE_CHUNK_SIZE` rows per
+transaction, and only considers rows not yet stamped with the active
+(profile_id, version). Per chunk the new scores are computed with NumPy;
+rows whose priority or zone changed are rewritten with one executemany
+UPDATE, and the rest of the chunk only gets the stamp in one range UPDATE.
+Short per-chunk transactions keep readers unblocked (SQLite runs in WAL
+mode), and an interrupted recompute resumes where it stopped because
+stamped rows are skipped.
+
+The same recompute re-normalizes rows whose metrics were normalized with an
+older metric scale version (services/metric_scaling.py): f/w/s/i are
+recomputed from the stored raw values and the row is stamped with the
+active scale version too. Rows without raw values (submitted normalized)
+keep their metrics and are only re-scored and stamped.
+
+A profile's `threshold_mode` is ``fixed`` (its stored cut-offs) or
+``capacity``: the cut-offs are derived from zone capacity when it is
+activated or edited and then follow every SKU write (services/calibration.py)
+without a version bump.
+"""
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import and_, bindparam, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.services.calibration import CALIBRATOR, cutoffs_for_weights
+from backend.services.live_layout import LIVE_LAYOUT
+from backend.services.metric_scaling import scale_held
+from backend.services.normalization import (
+    METRICS,
+    RAW_FIELDS,
+    metric_scale,
+    scale_version,
+)
+from backend.services.priority_calculator import (
+    PRIORITY_WEIGHTS,
+    ZONE_THRESHOLDS,
+    calculate_priority_batch,
+    priority_to_zone_batch,
+    set_active_formula,
+)
+
+RECOMPUTE_CHUNK_SIZE = int(os.environ.get("RESCORE_CHUNK_SIZE", "5000"))
+DEFAULT_PROFILE_NAME = "default"
+THRESHOLD_MODES = ("fixed", "capacity")
+
+Progress = Callable[[str, float, Optional[Dict[str, Any]]], None]
+
+
+def _no_progress(stage: str, fraction: float, partial: Optional[Dict[str, Any]] = None) -> None:
+    pass
+
+
+def profile_weights(profile: models.ScoringProfile) -> List[float]:
+    return [profile.weight_f, profile.weight_w, profile.weight_s, profile.weight_i]
+
+
+def profile_thresholds(profile: models.ScoringProfile) -> List[float]:
+    return [profile.threshold_a, profile.threshold_b, profile.threshold_c]
+
+
+def threshold_mode(profile: models.ScoringProfile) -> str:
+    return profile.threshold_mode or "fixed"
+
+
+def _use_formula(profile: models.ScoringProfile) -> None:
+    set_active_formula(
+        profile_weights(profile),
+        profile_thresholds(profile),
+        profile.id,
+        profile.version,
+        threshold_mode(profile),
+    )
+
+
+def _calibrate(db: Session, profile: models.ScoringProfile) -> None:
+    """Capacity-mode profiles: cut-offs for the catalog scored with the
+    profile's weights."""
+    if threshold_mode(profile) != "capacity":
+        return
+    cutoffs = cutoffs_for_weights(db, profile_weights(profile))
+    if cutoffs is not None:
+        profile.threshold_a, profile.threshold_b, profile.threshold_c = cutoffs
+
+
+def profile_summary(profile: models.ScoringProfile) -> Dict[str, Any]:
+    def timestamp(value: Optional[datetime]) -> Optional[str]:
+        return value.isoformat() + "Z" if value else None
+
+    return {
+        "id": profile.id,
+        "name": profile.name,
+        "version": profile.version,
+        "weights": profile_weights(profile),
+        "thresholds": profile_thresholds(profile),
+        "threshold_mode": threshold_mode(profile),
+        "is_active": profile.is_active,
+        "recompute_status": profile.recompute_status,
+        "recompute_job_id": profile.recompute_job_id,
+        "created_at": timestamp(profile.created_at),
+        "updated_at": timestamp(profile.updated_at),
+        "activated_at": timestamp(profile.activated_at),
+        "recomputed_at": timestamp(profile.recomputed_at),
+    }
+
+
+def validate_formula(weights: Sequence[float], thresholds: Sequence[float]) -> None:
+    if len(weights) != 4 or any(weight < 0 for weight in weights):
+        raise ValueError("weights must be 4 non-negative numbers (f, w, s, i)")
+    if len(thresholds) != len(ZONE_THRESHOLDS) or any(not 0.0 <= cut <= 1.0 for cut in thresholds):
+        raise ValueError("thresholds must be 3 numbers between 0 and 1")
+    if any(high < low for high, low in zip(thresholds, thresholds[1:])):
+        raise ValueError("thresholds must be descending (A, B, C)")
+
+
+def _set_formula(profile: models.ScoringProfile, weights: Sequence[float], thresholds: Sequence[float]) -> None:
+    validate_formula(weights, thresholds)
+    profile.weight_f, profile.weight_w, profile.weight_s, profile.weight_i = weights
+    profile.threshold_a, profile.threshold_b, profile.threshold_c = thresholds
+
+
+def get_profile(db: Session, profile_id: int) -> models.ScoringProfile:
+    profile = db.query(models.ScoringProfile).filter(models.ScoringProfile.id == profile_id).first()
+    if profile is None:
+        raise LookupError(f"scoring profile {profile_id} not found")
+    return profile
+
+
+def active_profile(db: Session) -> Optional[models.ScoringProfile]:
+    return db.query(models.ScoringProfile).filter(models.ScoringProfile.is_active.is_(True)).first()
+
+
+def load_active_profile(db: Session) -> models.ScoringProfile:
+    """Make the active profile's formula the one new scores use. Creates the
+    ``default`` profile (the built-in formula) on first start."""
+    profile = active_profile(db)
+    if profile is None:
+        profile = models.ScoringProfile(name=DEFAULT_PROFILE_NAME, version=1, is_active=True)
+        _set_formula(profile, PRIORITY_WEIGHTS, [cut for cut, _ in ZONE_THRESHOLDS])
+        profile.activated_at = datetime.utcnow()
+        db.add(profile)
+        db.commit()
+    _use_formula(profile)
+    return profile
+
+
+def list_profiles(db: Session) -> List[Dict[str, Any]]:
+    profiles = db.query(models.ScoringProfile).order_by(models.ScoringProfile.id).all()
+    return [profile_summary(profile) for profile in profiles]
+
+
+def _check_mode(mode: str) -> None:
+    if mode not in THRESHOLD_MODES:
+        raise ValueError(f"threshold_mode must be one of {', '.join(THRESHOLD_MODES)}")
+
+
+def create_profile(
+    db: Session,
+    name: str,
+    weights: Sequence[float],
+    thresholds: Optional[Sequence[float]] = None,
+    mode: str = "fixed",
+) -> models.ScoringProfile:
+    """Thresholds default to the built-in cut-offs (capacity-mode profiles
+    replace them when activated)."""
+    _check_mode(mode)
+    if db.query(models.ScoringProfile).filter(models.ScoringProfile.name == name).first():
+        raise ValueError(f"scoring profile '{name}' already exists")
+    profile = models.ScoringProfile(name=name, version=1, is_active=False, threshold_mode=mode)
+    _set_formula(profile, weights, thresholds or [cut for cut, _ in ZONE_THRESHOLDS])
+    db.add(profile)
+    db.commit()
+    return profile
+
+
+def update_profile(
+    db: Session,
+    profile_id: int,
+    weights: Optional[Sequence[float]] = None,
+    thresholds: Optional[Sequence[float]] = None,
+    mode: Optional[str] = None,
+) -> models.ScoringProfile:
+    """Change a profile's formula; the version goes up by one."""
+    profile = get_profile(db, profile_id)
+    if mode is not None:
+        _check_mode(mode)
+        profile.threshold_mode = mode
+    _set_formula(
+        profile,
+        weights if weights is not None else profile_weights(profile),
+        thresholds if thresholds is not None else profile_thresholds(profile),
+    )
+    if profile.is_active:
+        _calibrate(db, profile)
+    profile.version += 1
+    profile.updated_at = datetime.utcnow()
+    db.commit()
+    if profile.is_active:
+        _use_formula(profile)
+    return profile
+
+
+def activate_profile(db: Session, profile_id: int) -> models.ScoringProfile:
+    """Make a profile the active one. The caller queues the recompute."""
+    profile = get_profile(db, profile_id)
+    db.query(models.ScoringProfile).filter(models.ScoringProfile.id != profile_id).update(
+        {models.ScoringProfile.is_active: False}, synchronize_session=False
+    )
+    profile.is_active = True
+    profile.activated_at = datetime.utcnow()
+    _calibrate(db, profile)
+    db.commit()
+    _use_formula(profile)
+    return profile
+
+
+def queue_recompute(
+    db: Session, profile_id: int, submit: Callable[[Dict[str, Any]], Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Mark the profile's recompute running and queue it with `submit`
+    (the job runner's, for a ``rescore`` job); returns the job summary."""
+    profile = get_profile(db, profile_id)
+    profile.recompute_status = "running"
+    db.commit()
+    try:
+        job = submit({"profile_id": profile_id})
+    except Exception:
+        profile.recompute_status = "failed"
+        db.commit()
+        raise
+    # Only the job id: a fast job may already have marked the profile done.
+    db.query(models.ScoringProfile).filter(models.ScoringProfile.id == profile_id).update(
+        {models.ScoringProfile.recompute_job_id: job["id"]}, synchronize_session=False
+    )
+    db.commit()
+    return job
+
+
+def _unstamped(table, profile_id: int, version: int, norm_version: int):
+    return or_(
+        table.c.profile_id.is_distinct_from(profile_id),
+        table.c.profile_version.is_distinct_from(version),
+        table.c.norm_version.is_distinct_from(norm_version),
+    )
+
+
+def scoring_status(db: Session) -> Dict[str, Any]:
+    """The active profile and how many SKU rows it (or the active metric
+    scale) has not scored yet."""
+    profile = active_profile(db)
+    if profile is None:
+        return {"active": None, "skus": 0, "pending": 0}
+    table = models.SKUItem.__table__
+    total = db.execute(select(func.count()).select_from(table)).scalar()
+    pending = db.execute(
+        select(func.count())
+        .select_from(table)
+        .where(_unstamped(table, profile.id, profile.version, scale_version()))
+    ).scalar()
+    return {"active": profile_summary(profile), "skus": total, "pending": pending}
+
+
+def recompute_profile(db: Session, profile_id: int, progress: Progress = _no_progress) -> Dict[str, Any]:
+    """Re-score every SKU row not yet stamped with the profile's current
+    version and the active metric scale version, re-normalizing rows of an
+    older scale that have raw values. Stops early if the profile is edited
+    or deactivated, or a new scale is adopted, meanwhile (the job queued by
+    that change takes over)."""
+    started = time.perf_counter()
+    profile = get_profile(db, profile_id)
+    profile_version = profile.version
+    weights, thresholds = profile_weights(profile), profile_thresholds(profile)
+    norm_version, scale = scale_version(), metric_scale()
+    table = models.SKUItem.__table__
+    unstamped = _unstamped(table, profile_id, profile_version, norm_version)
+    total = db.execute(select(func.count()).select_from(table).where(unstamped)).scalar()
+    db.commit()
+
+    # Rewrites only apply to rows nobody re-scored since they were read.
+    rewrite = (
+        update(table)
+        .where(and_(table.c.id == bindparam("row_id"), unstamped))
+        .values(
+            priority=bindparam("new_priority"),
+            zone=bindparam("new_zone"),
+            profile_id=profile_id,
+            profile_version=profile_version,
+            norm_version=norm_version,
+            **{name: bindparam(f"new_{name}") for name in METRICS},
+        )
+    )
+    counts = {
+        "processed": 0, "zone_changed": 0, "priority_changed": 0, "renormalized": 0,
+        "kept_normalized": 0, "rewritten": 0, "stamped_only": 0,
+    }
+    after_id = 0
+    superseded = False
+    # Calibration would move cut-offs under the chunks; it catches up at the end.
+    with CALIBRATOR.paused():
+        progress("rescoring", 0.0, {"total": total, **counts})
+        while True:
+            rows = db.execute(
+                select(
+                    table.c.id, table.c.sku_code, table.c.priority, table.c.zone, table.c.norm_version,
+                    *[table.c[name] for name in METRICS + RAW_FIELDS],
+                )
+                .where(table.c.id > after_id, unstamped)
+                .order_by(table.c.id)
+                .limit(RECOMPUTE_CHUNK_SIZE)
+            ).all()
+            if not rows:
+                break
+            ids, codes, old_priority, old_zone, row_versions, *values = zip(*rows)
+            stored = [np.nan_to_num(np.array(column, dtype=np.float64)) for column in values[:4]]
+            # Rows of another scale version are normalized again from raw;
+            # rows stored before versions were kept used version 1. Rows
+            # without raw values keep the metrics they were submitted with.
+            stale = np.array([(version or 1) != norm_version for version in row_versions])
+            raw = np.array(values[4:], dtype=np.float64)
+            kept = stale & np.isnan(raw).any(axis=0)
+            metrics = []
+            for metric, current, column in zip(METRICS, stored, raw):
+                renormalized = np.round(np.clip(column / scale[metric], 0.0, 1.0), 4)
+                metrics.append(np.where(stale & ~kept, renormalized, current))
+            metrics_changed = np.zeros(len(rows), dtype=bool)
+            for current, new in zip(stored, metrics):
+                metrics_changed |= current != new
+
+            priority = calculate_priority_batch(*metrics, weights=weights)
+            zones = priority_to_zone_batch(priority, cutoffs=thresholds)
+            old_priority = np.nan_to_num(np.array(old_priority, dtype=np.float64))
+            zone_changed = zones != np.array([(zone or "").upper() for zone in old_zone])
+            priority_changed = priority != old_priority
+            changed = zone_changed | priority_changed | metrics_changed
+
+            changed_rows = np.flatnonzero(changed).tolist()
+            priority_list, zone_list = priority.tolist(), zones.tolist()
+            columns = dict(zip(METRICS, [column.tolist() for column in metrics]))
+            written = [
+                {
+                    "sku_code": codes[row],
+                    "priority": priority_list[row],
+                    "zone": zone_list[row],
+                    **{name: column[row] for name, column in columns.items()},
+                }
+                for row in changed_rows
+            ]
+            # A newer scale's job may already have stamped these rows, which
+            # `unstamped` would match again; no scale is adopted while this
+            # chunk is checked and written.
+            with scale_held() as active_version:
+                if active_version != norm_version:
+                    superseded = True
+                    break
+                if written:
+                    db.execute(
+                        rewrite,
+                        [
+                            {
+                                "row_id": ids[row],
+                                **{f"new_{name}": value for name, value in entry.items() if name != "sku_code"},
+                            }
+                            for row, entry in zip(changed_rows, written)
+                        ],
+                    )
+                db.execute(
+                    update(table)
+                    .where(table.c.id >= ids[0], table.c.id <= ids[-1], unstamped)
+                    .values(profile_id=profile_id, profile_version=profile_version, norm_version=norm_version)
+                )
+                db.commit()
+            if written:
+                LIVE_LAYOUT.record_bulk_write(db, written)
+
+            counts["processed"] += len(rows)
+            counts["zone_changed"] += int(zone_changed.sum())
+            counts["priority_changed"] += int((priority_changed & ~zone_changed).sum())
+            counts["renormalized"] += int(metrics_changed.sum())
+            counts["kept_normalized"] += int(kept.sum())
+            counts["rewritten"] += len(changed_rows)
+            counts["stamped_only"] += len(rows) - len(changed_rows)
+            after_id = ids[-1]
+            progress("rescoring", min(counts["processed"] / max(total, 1), 1.0), {"total": total, **counts})
+
+            db.expire_all()
+            current = get_profile(db, profile_id)
+            if (
+                not current.is_active
+                or current.version != profile_version
+                or scale_version() != norm_version
+            ):
+                superseded = True
+                break
+
+    profile = get_profile(db, profile_id)
+    if not superseded:
+        profile.recompute_status = "done"
+        profile.recomputed_at = datetime.utcnow()
+        db.commit()
+        CALIBRATOR.recalibrate(db, previous=thresholds)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(
+        f"[SCORING] Profile {profile_id} v{profile_version} (scale v{norm_version}): "
+        f"{counts['processed']} rows, {counts['zone_changed']} zone changes, "
+        f"{counts['renormalized']} re-normalized in {elapsed_ms:.0f} ms"
+        + (" (superseded)" if superseded else "")
+    )
+    return {
+        "profile_id": profile_id,
+        "profile_version": profile_version,
+        "norm_version": norm_version,
+        "total": total,
+        **counts,
+        "superseded": superseded,
+        "elapsed_ms": round(elapsed_ms, 1),
+    }
+
+
+def mark_recompute_failed(db: Session, profile_id: int) -> None:
+    db.rollback()
+    profile = db.query(models.ScoringProfile).filter(models.ScoringProfile.id == profile_id).first()
+    if profile is not None and profile.recompute_status == "running":
+        profile.recompute_status = "failed"
+        db.commit()
+
+
+def interrupted_recompute(db: Session) -> Optional[int]:
+    """Id of the active profile if a previous process left its recompute
+    running; its job was failed by `recover_interrupted`, so it needs a new one."""
+    profile = active_profile(db)
+    if profile is not None and profile.recompute_status == "running":
+        return profile.id
+    return None
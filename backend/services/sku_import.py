@@ -0,0 +1,157 @@
+"""
+Streaming CSV / NDJSON catalog import.
+
+Rows are parsed one at a time from a binary stream, normalized, and written in
+fixed-size chunks through `upsert_skus`, so memory stays bounded by the chunk
+size rather than the file size. Written rows are recorded in the metric
+history, which is flushed when the import ends.
+"""
+import csv
+import io
+import json
+import time
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy.orm import Session
+
+from backend.services.metric_history import METRIC_HISTORY
+from backend.services.normalization import METRICS, prepare_metrics
+from backend.services.sku_ingest import upsert_skus
+
+IMPORT_CHUNK_SIZE = 1000
+SUPPORTED_FORMATS = ("csv", "ndjson")
+MAX_REPORTED_ERRORS = 50
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+def detect_format(filename: Optional[str]) -> str:
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    return "csv"
+
+
+def iter_records(stream: BinaryIO, fmt: str) -> Iterator[Any]:
+    """Yield raw records from a binary stream without reading it fully."""
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported import format '{fmt}'")
+
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            yield from csv.DictReader(text)
+        else:
+            # Lines are decoded in `_parse_record` so one bad line is just invalid.
+            for line in text:
+                line = line.strip()
+                if line:
+                    yield line
+    finally:
+        # Leave the underlying stream open for the caller.
+        text.detach()
+
+
+def _parse_record(record: Any, normalized: bool) -> Dict[str, Any]:
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError("record is not an object")
+
+    sku_code = str(record.get("sku_code") or "").strip()
+    if not sku_code:
+        raise ValueError("missing sku_code")
+
+    raw: Dict[str, Any] = {
+        "sku_code": sku_code,
+        "product_name": (str(record.get("product_name") or "").strip() or None),
+    }
+    for metric in METRICS:
+        raw[metric] = float(record.get(metric))
+    return prepare_metrics(raw, normalized)
+
+
+def import_stream(
+    db: Session,
+    stream: BinaryIO,
+    fmt: str,
+    offset: int = 0,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    on_conflict: str = "update",
+    normalized: bool = False,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """Import records from `stream`, committing every `chunk_size` rows.
+
+    Metrics are treated as raw values and normalized server-side unless
+    `normalized` is set. `offset` is the number of records to skip, so an
+    interrupted import can be resumed with the `next_offset` of its last
+    reported progress.
+    """
+    stats: Dict[str, Any] = {
+        "start_offset": offset,
+        "next_offset": offset,
+        "created": 0,
+        "updated": 0,
+        "skipped": 0,
+        "invalid": 0,
+        "failed": 0,
+        "chunks": 0,
+        "errors": [],
+    }
+    started = time.perf_counter()
+    chunk: List[Dict[str, Any]] = []
+    chunk_records = 0
+
+    def flush() -> bool:
+        nonlocal chunk, chunk_records
+        results = upsert_skus(db, chunk, on_conflict=on_conflict, chunk_size=len(chunk) or 1)
+        failures = [entry for entry in results if entry["status"] == "error"]
+        if failures:
+            # Keep next_offset at the start of the failed chunk so it is retried.
+            stats["failed"] += len(failures)
+            _record_error(stats, stats["next_offset"], failures[0].get("detail"))
+            return False
+        for entry in results:
+            if entry["status"] in ("created", "updated", "skipped"):
+                stats[entry["status"]] += 1
+        METRIC_HISTORY.record_rows(
+            db, [row for row, entry in zip(chunk, results) if entry["status"] in ("created", "updated")]
+        )
+        stats["next_offset"] += chunk_records
+        stats["chunks"] += 1
+        chunk, chunk_records = [], 0
+        if progress:
+            progress(_with_rate(stats, started))
+        return True
+
+    for index, record in enumerate(iter_records(stream, fmt)):
+        if index < offset:
+            continue
+        chunk_records += 1
+        try:
+            chunk.append(_parse_record(record, normalized))
+        except (TypeError, ValueError) as exc:
+            stats["invalid"] += 1
+            _record_error(stats, index, str(exc))
+        if chunk_records >= chunk_size and not flush():
+            METRIC_HISTORY.flush(db)
+            return _with_rate(stats, started)
+
+    if chunk_records:
+        flush()
+    METRIC_HISTORY.flush(db)
+    return _with_rate(stats, started)
+
+
+def _record_error(stats: Dict[str, Any], index: int, detail: Optional[str]) -> None:
+    if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+        stats["errors"].append({"offset": index, "detail": detail})
+
+
+def _with_rate(stats: Dict[str, Any], started: float) -> Dict[str, Any]:
+    elapsed = time.perf_counter() - started
+    processed = stats["next_offset"] - stats["start_offset"]
+    stats["elapsed_s"] = round(elapsed, 3)
+    stats["rows_per_s"] = round(processed / elapsed, 1) if elapsed > 0 else 0.0
+    return stats
@@ -0,0 +1,152 @@
+"""
+Batched SKU ingest: vectorized scoring plus chunked multi-row upserts.
+"""
+from typing import Any, Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.services.priority_calculator import (
+    active_formula,
+    calculate_priority_batch,
+    priority_to_zone_batch,
+)
+
+BULK_CHUNK_SIZE = 1000
+
+_UPSERT_COLUMNS = (
+    "product_name", "f", "w", "s", "i", "priority", "zone", "profile_id", "profile_version",
+    "raw_f", "raw_w", "raw_s", "raw_i", "norm_version",
+)
+
+
+def _dialect_insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"Bulk upsert is not supported for dialect '{dialect}'")
+    return insert
+
+
+def _upsert_statement(db: Session, on_conflict: str):
+    insert = _dialect_insert(db)
+    stmt = insert(models.SKUItem.__table__)
+    if on_conflict == "skip":
+        return stmt.on_conflict_do_nothing(index_elements=["sku_code"])
+    return stmt.on_conflict_do_update(
+        index_elements=["sku_code"],
+        set_={c: stmt.excluded[c] for c in _UPSERT_COLUMNS},
+    )
+
+
+def score_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Attach `priority` and `zone` to every row in a single vectorized pass,
+    stamped with the scoring profile that computed them."""
+    if not rows:
+        return rows
+    formula = active_formula()
+
+    priorities = calculate_priority_batch(
+        [row["f"] for row in rows],
+        [row["w"] for row in rows],
+        [row["s"] for row in rows],
+        [row["i"] for row in rows],
+    )
+    zones = priority_to_zone_batch(
+        priorities, cutoffs=[cut for cut, _ in formula["thresholds"]]
+    )
+    for row, pr, zone in zip(rows, priorities.tolist(), zones.tolist()):
+        row["priority"] = pr
+        row["zone"] = zone
+        row["profile_id"] = formula["profile_id"]
+        row["profile_version"] = formula["profile_version"]
+    return rows
+
+
+def _upsert_chunk(
+    db: Session, rows: List[Dict[str, Any]], on_conflict: str
+) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = [{} for _ in rows]
+
+    # Within one statement a key may only appear once; the last row wins.
+    last_index: Dict[str, int] = {}
+    for idx, row in enumerate(rows):
+        last_index[row["sku_code"]] = idx
+    for idx, row in enumerate(rows):
+        if last_index[row["sku_code"]] != idx:
+            results[idx] = {
+                "sku_code": row["sku_code"],
+                "status": "duplicate",
+                "detail": "Superseded by a later row with the same sku_code",
+            }
+
+    unique_rows = [rows[idx] for idx in sorted(last_index.values())]
+    codes = [row["sku_code"] for row in unique_rows]
+    table = models.SKUItem.__table__
+
+    try:
+        existing = set(
+            db.execute(
+                select(table.c.sku_code).where(table.c.sku_code.in_(codes))
+            ).scalars()
+        )
+
+        # One cached upsert statement per chunk, sent with executemany; a
+        # literal multi-row VALUES clause costs more to compile than to run.
+        db.execute(
+            _upsert_statement(db, on_conflict),
+            [
+                {"sku_code": row["sku_code"], **{c: row.get(c) for c in _UPSERT_COLUMNS}}
+                for row in unique_rows
+            ],
+        )
+        db.commit()
+    except SQLAlchemyError as exc:
+        db.rollback()
+        for idx in last_index.values():
+            results[idx] = {
+                "sku_code": rows[idx]["sku_code"],
+                "status": "error",
+                "detail": str(exc.__cause__ or exc),
+            }
+        return results
+
+    for idx in last_index.values():
+        row = rows[idx]
+        if row["sku_code"] not in existing:
+            status = "created"
+        elif on_conflict == "skip":
+            results[idx] = {"sku_code": row["sku_code"], "status": "skipped"}
+            continue
+        else:
+            status = "updated"
+        results[idx] = {
+            "sku_code": row["sku_code"],
+            "status": status,
+            "priority": row["priority"],
+            "zone": row["zone"],
+        }
+    return results
+
+
+def upsert_skus(
+    db: Session,
+    rows: List[Dict[str, Any]],
+    on_conflict: str = "update",
+    chunk_size: int = BULK_CHUNK_SIZE,
+) -> List[Dict[str, Any]]:
+    """Score and upsert rows by `sku_code`, one batched statement per chunk.
+
+    Each chunk is committed on its own, so a failing chunk only marks its own
+    rows as errors. Returns one outcome dict per input row, in input order.
+    """
+    score_rows(rows)
+    results: List[Dict[str, Any]] = []
+    for start in range(0, len(rows), chunk_size):
+        results.extend(_upsert_chunk(db, rows[start : start + chunk_size], on_conflict))
+    return results
@@ -0,0 +1,154 @@
+"""
+Keyset-paginated, filtered and projected SKU listing using Core selects,
+plus a columnar (NumPy) read for the vectorized planners.
+"""
+import base64
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.services.normalization import RAW_FIELDS
+
+LISTABLE_FIELDS = (
+    "id", "sku_code", "product_name", "f", "w", "s", "i", "priority", "zone",
+) + RAW_FIELDS
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(priority: float, item_id: int) -> str:
+    raw = f"{priority!r}:{item_id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Inverse of `encode_cursor`; raises ValueError on malformed input."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii")
+        priority, item_id = raw.split(":")
+        return float(priority), int(item_id)
+    except (UnicodeError, ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def parse_fields(fields: Optional[str]) -> Sequence[str]:
+    if not fields:
+        return LISTABLE_FIELDS
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in LISTABLE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+
+def _list_statement(
+    fields: Sequence[str],
+    limit: Optional[int],
+    cursor: Optional[str],
+    zones: Optional[Sequence[str]],
+    min_priority: Optional[float],
+    max_priority: Optional[float],
+    code_prefix: Optional[str],
+):
+    table = models.SKUItem.__table__
+    # priority/id are always fetched because the next cursor is built from them.
+    selected = list(dict.fromkeys(list(fields) + ["priority", "id"]))
+    stmt = select(*[table.c[name] for name in selected])
+
+    if zones:
+        stmt = stmt.where(table.c.zone.in_([zone.upper() for zone in zones]))
+    if min_priority is not None:
+        stmt = stmt.where(table.c.priority >= min_priority)
+    if max_priority is not None:
+        stmt = stmt.where(table.c.priority <= max_priority)
+    if code_prefix:
+        # A range on the unique sku_code index instead of LIKE, which SQLite
+        # does not serve from an index by default.
+        stmt = stmt.where(
+            table.c.sku_code >= code_prefix, table.c.sku_code < code_prefix + "\U0010ffff"
+        )
+    if cursor:
+        after_priority, after_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            table.c.priority <= after_priority,
+            or_(
+                table.c.priority < after_priority,
+                and_(table.c.priority == after_priority, table.c.id > after_id),
+            ),
+        )
+
+    stmt = stmt.order_by(table.c.priority.desc(), table.c.id)
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    return stmt, selected
+
+
+def _page(
+    rows: List[Any], fields: Sequence[str], selected: List[str], limit: Optional[int]
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.priority, last.id)
+
+    positions = [selected.index(name) for name in fields]
+    items = [{name: row[pos] for name, pos in zip(fields, positions)} for row in rows]
+    return items, next_cursor
+
+
+def list_sku_rows(
+    db: Session,
+    fields: Sequence[str] = LISTABLE_FIELDS,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    zones: Optional[Sequence[str]] = None,
+    min_priority: Optional[float] = None,
+    max_priority: Optional[float] = None,
+    code_prefix: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Return one page of SKU rows ordered by (priority DESC, id) and the
+    cursor for the next page (None on the last page or without `limit`)."""
+    stmt, selected = _list_statement(
+        fields, limit, cursor, zones, min_priority, max_priority, code_prefix
+    )
+    return _page(db.execute(stmt).all(), fields, selected, limit)
+
+
+_NUMERIC_FIELDS = ("priority", "f", "w", "s", "i")
+
+
+def sku_columns(
+    db: Session,
+    fields: Sequence[str] = ("priority", "f", "w", "s", "i"),
+    zone_overrides: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """All SKUs in (priority DESC, id) order as columns.
+
+    sku_code and product_name are lists, zone is an upper-cased string
+    array with `zone_overrides` applied, and numeric fields are float64
+    arrays (NULL as 0).
+    """
+    table = models.SKUItem.__table__
+    numeric = [name for name in fields if name in _NUMERIC_FIELDS]
+    rows = db.execute(
+        select(
+            table.c.sku_code,
+            table.c.product_name,
+            table.c.zone,
+            *[table.c[name] for name in numeric],
+        ).order_by(table.c.priority.desc(), table.c.id)
+    ).all()
+    overrides = {code: zone.upper() for code, zone in (zone_overrides or {}).items() if zone}
+    columns: Dict[str, Any] = {
+        "sku_code": [row[0] for row in rows],
+        "product_name": [row[1] for row in rows],
+        "zone": np.array(
+            [overrides.get(row[0], (row[2] or "").upper()) for row in rows], dtype="<U16"
+        ),
+    }
+    for pos, name in enumerate(numeric, start=3):
+        columns[name] = np.array([row[pos] or 0.0 for row in rows], dtype=np.float64)
+    return columns
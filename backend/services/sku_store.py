@@ -0,0 +1,781 @@
+"""
+Process-local columnar copy of the SKU table.
+
+One NumPy array per numeric column (id, priority, f, w, s, i and the raw
+metrics), zones as small integer codes into an interned name table, and sku_code /
+product_name as plain lists, plus code -> row and id -> row dicts. Rows are
+in no particular order; the (priority DESC, id) order every reader uses is
+an index array, re-sorted only after a write that can move a row, and
+listing filters run over columns gathered into that order once per write.
+
+The store loads with one query on first use and is then kept current
+write-through: `LiveLayout.record_saved`, `record_deleted` and
+`record_bulk_write` (which every SKU mutation already calls) forward to
+`record_saved`, `record_deleted` and `record_rows`. A bulk write without
+its rows (the streamed import) invalidates the store instead. Reads
+(listing, columns for the planners, layout input) slice the arrays and
+only build Python objects for the rows they return.
+
+Writes from other processes (a second server, `import_skus.py`) are caught
+by the SKU data version (`models.SKUDataVersion`), which every commit that
+writes sku_items through SQLAlchemy bumps. The versions this process's own
+commits produce are noted as they happen; `ensure_loaded` reads the stored
+version at most every `SKU_STORE_RECHECK_S` seconds and reloads when it
+passed versions this process did not write. Such reloads are counted in
+`foreign_reloads`, which `LiveLayout` follows to rebuild itself and bump the
+layout cache version. Writers that bypass SQLAlchemy (the sqlite3 shell) are
+not seen until a restart.
+
+Raw metrics of rows without them (submitted normalized) are NaN: listed as
+None, left out of the sorted raw values per metric (`RawMetricStats`) kept
+alongside the priority index for the normalization scale, and only
+estimated (`normalization.implicit_raw`) in `columns` for the planners'
+physical loads.
+"""
+import heapq
+import math
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.services.metric_stats import RawMetricStats
+from backend.services.normalization import METRICS, RAW_FIELDS, implicit_raw
+from backend.services.priority_index import PriorityIndex
+from backend.services.sku_query import LISTABLE_FIELDS, decode_cursor, encode_cursor
+
+NUMERIC_FIELDS = ("priority", "f", "w", "s", "i") + RAW_FIELDS
+LOOKUP_CHUNK_SIZE = 500
+# Bulk writes touching more than this share of the rows rebuild the priority
+# index from one NumPy sort instead of moving keys one at a time (at 100k
+# SKUs a rebuild costs about as much as 1,400 single moves).
+REINDEX_FRACTION = 1 / 64
+# How often a read checks the stored SKU data version for foreign writes.
+SKU_STORE_RECHECK_S = float(os.environ.get("SKU_STORE_RECHECK_S", "0.5"))
+_MIN_CAPACITY = 1024
+
+
+def _bind_key(bind) -> Tuple[Any, ...]:
+    # Sync and async engines on one database share a key.
+    url = bind.url
+    return (url.get_backend_name(), url.host, url.port, url.database)
+
+
+def _version_statement():
+    table = models.SKUDataVersion.__table__
+    return select(table.c.version).where(table.c.id == 1)
+
+
+def _load_statement():
+    table = models.SKUItem.__table__
+    return select(
+        table.c.id,
+        table.c.sku_code,
+        table.c.product_name,
+        table.c.zone,
+        *[table.c[name] for name in NUMERIC_FIELDS],
+    )
+
+
+def _same_raw(after: Dict[str, float], before: Optional[Dict[str, float]]) -> bool:
+    # NaN (no raw value) compares equal to NaN here.
+    return before is not None and all(
+        after[metric] == before[metric] or (math.isnan(after[metric]) and math.isnan(before[metric]))
+        for metric in METRICS
+    )
+
+
+class SKUStore:
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._bind: Optional[Tuple[Any, ...]] = None
+        self._size = 0
+        self._id = np.zeros(0, dtype=np.int64)
+        self._zone = np.zeros(0, dtype=np.uint8)
+        self._numeric: Dict[str, np.ndarray] = {
+            name: np.zeros(0, dtype=np.float64) for name in NUMERIC_FIELDS
+        }
+        self._codes: List[str] = []
+        self._names: List[Optional[str]] = []
+        self._row_by_code: Dict[str, int] = {}
+        self._row_by_id: Dict[int, int] = {}
+        self._zone_names: List[str] = []
+        self._zone_codes: Dict[str, int] = {}
+        self._order: Optional[np.ndarray] = None
+        self._view: Optional[Dict[str, np.ndarray]] = None
+        self._index = PriorityIndex()
+        self._metric_stats = RawMetricStats(METRICS)
+        self._id_order: Optional[np.ndarray] = None
+        self._sorted_ids = np.zeros(0, dtype=np.int64)
+        self._loads = 0
+        self._load_ms = 0.0
+        # SKU data version the arrays reflect, versions committed by this
+        # process since, and when the stored version was last read.
+        self._version = 0
+        self._own_versions: set = set()
+        self._checked_at = 0.0
+        self._foreign_reloads = 0
+
+    # ------------------------------------------------------------------ load
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded = False
+
+    def _current(self, bind) -> bool:
+        return self._loaded and self._bind == _bind_key(bind)
+
+    def recheck_due(self) -> bool:
+        """Whether the next `ensure_loaded` reads the stored data version."""
+        return time.monotonic() - self._checked_at >= SKU_STORE_RECHECK_S
+
+    @property
+    def foreign_reloads(self) -> int:
+        """Reloads for writes by other processes; readers that derive state
+        from the store rebuild it when this changes."""
+        return self._foreign_reloads
+
+    def _caught_up(self, version: int) -> bool:
+        """Whether the arrays reflect stored data version `version`: every
+        version since the loaded one was committed by this process. An older
+        version is a reader whose transaction started before our last write."""
+        self._checked_at = time.monotonic()
+        if version <= self._version:
+            return True
+        passed = range(self._version + 1, version + 1)
+        if not all(seen in self._own_versions for seen in passed):
+            return False
+        self._own_versions.difference_update(passed)
+        self._version = version
+        return True
+
+    def note_version(self, bind, version: int) -> None:
+        """Record a data version committed by this process, whose write the
+        store applies (or already applied) write-through."""
+        with self._lock:
+            if self._current(bind) and version > self._version:
+                self._own_versions.add(version)
+
+    def ensure_loaded(self, db: Optional[Session]) -> None:
+        """Load from `db` unless the store already mirrors its database, and
+        reload if another process wrote to it. Callers that loaded through
+        `ensure_loaded_async` pass None."""
+        with self._lock:
+            if db is None:
+                if self._bind is None:
+                    raise RuntimeError("SKU store is not loaded")
+                return
+            bind = db.get_bind()
+            if self._current(bind) and not self.recheck_due():
+                return
+            started = time.perf_counter()
+            # Version and rows come from the same transaction.
+            version = db.execute(_version_statement()).scalar() or 0
+            if self._current(bind):
+                if self._caught_up(version):
+                    return
+                self._foreign_reloads += 1
+                print(f"[STORE] SKU data version {self._version} -> {version} from another writer; reloading")
+            self._build(db.execute(_load_statement()).all(), bind, started, version)
+
+    async def ensure_loaded_async(self, session: AsyncSession) -> None:
+        bind = session.bind
+        if self._current(bind) and not self.recheck_due():
+            return
+        started = time.perf_counter()
+        version = (await session.execute(_version_statement())).scalar() or 0
+        with self._lock:
+            if self._current(bind):
+                if self._caught_up(version):
+                    return
+                self._foreign_reloads += 1
+                print(f"[STORE] SKU data version {self._version} -> {version} from another writer; reloading")
+        rows = (await session.execute(_load_statement())).all()
+        with self._lock:
+            # Unless another reader loaded the same or a newer version meanwhile.
+            if not (self._current(bind) and self._version >= version):
+                self._build(rows, bind, started, version)
+
+    def _intern_zone(self, zone: Optional[str]) -> int:
+        name = (zone or "").upper()
+        code = self._zone_codes.get(name)
+        if code is None:
+            if len(self._zone_names) > np.iinfo(self._zone.dtype).max:
+                self._zone = self._zone.astype(np.uint16)
+            code = self._zone_codes[name] = len(self._zone_names)
+            self._zone_names.append(name)
+        return code
+
+    def _build(self, rows: Sequence[Any], bind, started: float, version: int) -> None:
+        count = len(rows)
+        capacity = max(_MIN_CAPACITY, count)
+        columns = list(zip(*rows)) if rows else [()] * (4 + len(NUMERIC_FIELDS))
+        self._id = np.zeros(capacity, dtype=np.int64)
+        self._id[:count] = np.fromiter(columns[0], dtype=np.int64, count=count)
+        self._codes = list(columns[1])
+        self._names = list(columns[2])
+        self._zone_names, self._zone_codes = [], {}
+        self._zone = np.zeros(capacity, dtype=np.uint8)
+        zone_codes = [self._intern_zone(zone) for zone in columns[3]]
+        self._zone[:count] = np.asarray(zone_codes, dtype=self._zone.dtype)
+        for pos, name in enumerate(NUMERIC_FIELDS, start=4):
+            array = np.zeros(capacity, dtype=np.float64)
+            values = np.array(columns[pos], dtype=np.float64)
+            # NULL -> NaN -> 0, as the ORM defaults would have it; NULL raw
+            # metrics stay NaN.
+            array[:count] = values if name in RAW_FIELDS else np.nan_to_num(values, nan=0.0)
+            self._numeric[name] = array
+        self._row_by_code = {code: row for row, code in enumerate(self._codes)}
+        self._row_by_id = {item_id: row for row, item_id in enumerate(self._id[:count].tolist())}
+        self._size = count
+        self._order = None
+        self._view = None
+        self._id_order = None
+        self._reindex()
+        self._restat()
+        self._bind = _bind_key(bind)
+        self._version = version
+        self._own_versions = set()
+        self._checked_at = time.monotonic()
+        self._loaded = True
+        self._loads += 1
+        self._load_ms = (time.perf_counter() - started) * 1000
+        print(f"[STORE] Loaded {count} SKUs in {self._load_ms:.0f} ms")
+
+    # ---------------------------------------------------------- maintenance
+    def _index_entry(self, row: int) -> Tuple[float, int, str]:
+        return (
+            float(self._numeric["priority"][row]),
+            int(self._id[row]),
+            self._zone_names[self._zone[row]],
+        )
+
+    def _reindex(self) -> None:
+        # The cached (priority DESC, id) order is already the index order.
+        order = self._sorted()
+        negated = -self._numeric["priority"][order]
+        ids = self._id[order]
+        zones = self._zone[order]
+        zone_keys = {}
+        for code, name in enumerate(self._zone_names):
+            rows = np.flatnonzero(zones == code)
+            if rows.size:
+                zone_keys[name] = list(zip(negated[rows].tolist(), ids[rows].tolist()))
+        self._index.build_ranked(list(zip(negated.tolist(), ids.tolist())), zone_keys)
+
+    def _raw_entry(self, row: int) -> Dict[str, float]:
+        return {metric: float(self._numeric[f"raw_{metric}"][row]) for metric in METRICS}
+
+    def _restat(self) -> None:
+        raw = {metric: self._numeric[f"raw_{metric}"][: self._size] for metric in METRICS}
+        self._metric_stats.build(
+            {metric: np.sort(values[~np.isnan(values)]).tolist() for metric, values in raw.items()}
+        )
+
+    def _grow(self) -> None:
+        capacity = max(_MIN_CAPACITY, 2 * len(self._id))
+        for name in ("_id", "_zone"):
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[: self._size] = array[: self._size]
+            setattr(self, name, grown)
+        for name, array in self._numeric.items():
+            grown = np.zeros(capacity, dtype=np.float64)
+            grown[: self._size] = array[: self._size]
+            self._numeric[name] = grown
+
+    def _append(self, item_id: int, sku_code: str) -> int:
+        if self._size == len(self._id):
+            self._grow()
+        row = self._size
+        self._size += 1
+        self._id[row] = item_id
+        self._codes.append(sku_code)
+        self._names.append(None)
+        self._row_by_id[item_id] = row
+        self._row_by_code[sku_code] = row
+        self._view = None
+        self._id_order = None
+        return row
+
+    def _set(self, row: int, values: Dict[str, Any], new: bool = False, reindex: bool = True) -> None:
+        """Write `values` into `row`. `new` rows are not in the priority
+        index or the raw statistics yet; `reindex=False` leaves both to a
+        rebuild."""
+        self._view = None
+        before = None if new or not reindex else self._index_entry(row)
+        raw_changed = any(name in values for name in RAW_FIELDS)
+        raw_before = self._raw_entry(row) if raw_changed and reindex and not new else None
+        if "sku_code" in values and values["sku_code"] != self._codes[row]:
+            self._row_by_code.pop(self._codes[row], None)
+            self._codes[row] = values["sku_code"]
+            self._row_by_code[values["sku_code"]] = row
+        if "product_name" in values:
+            self._names[row] = values["product_name"]
+        if "zone" in values:
+            self._zone[row] = self._intern_zone(values["zone"])
+        for name in NUMERIC_FIELDS:
+            if name in values:
+                value = values[name]
+                if value is None and name in RAW_FIELDS:
+                    value = np.nan
+                self._numeric[name][row] = value or 0.0
+        if "priority" in values:
+            self._order = None
+        if reindex:
+            after = self._index_entry(row)
+            if after != before:
+                if before is not None:
+                    self._index.remove(*before)
+                self._index.insert(*after)
+            if raw_changed:
+                raw_after = self._raw_entry(row)
+                if not _same_raw(raw_after, raw_before):
+                    if raw_before is not None:
+                        self._metric_stats.remove(raw_before)
+                    self._metric_stats.add(raw_after)
+
+    def record_saved(self, obj: models.SKUItem) -> None:
+        """Apply one added or updated SKU."""
+        with self._lock:
+            if not self._loaded:
+                return
+            row = self._row_by_id.get(obj.id)
+            new = row is None
+            if new:
+                row = self._append(obj.id, obj.sku_code)
+                self._order = None
+            self._set(
+                row,
+                {
+                    "sku_code": obj.sku_code,
+                    "product_name": obj.product_name,
+                    "zone": obj.zone,
+                    **{name: getattr(obj, name) for name in NUMERIC_FIELDS},
+                },
+                new=new,
+            )
+
+    def record_deleted(self, item_id: int) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            row = self._row_by_id.pop(item_id, None)
+            if row is None:
+                return
+            self._index.remove(*self._index_entry(row))
+            self._metric_stats.remove(self._raw_entry(row))
+            self._row_by_code.pop(self._codes[row], None)
+            last = self._size - 1
+            if row != last:
+                # Move the last row into the hole.
+                self._id[row] = self._id[last]
+                self._zone[row] = self._zone[last]
+                for array in self._numeric.values():
+                    array[row] = array[last]
+                self._codes[row] = self._codes[last]
+                self._names[row] = self._names[last]
+                self._row_by_id[int(self._id[row])] = row
+                self._row_by_code[self._codes[row]] = row
+            self._codes.pop()
+            self._names.pop()
+            self._size = last
+            self._order = None
+            self._view = None
+            self._id_order = None
+
+    def record_rows(self, db: Session, rows: Sequence[Dict[str, Any]]) -> None:
+        """Apply rows written by a bulk upsert or update, keyed by sku_code.
+
+        Rows may carry any subset of the columns. Codes the store has not
+        seen are new SKUs; their ids are read back in chunks.
+        """
+        with self._lock:
+            if not self._loaded:
+                return
+            reindex = len(rows) <= max(LOOKUP_CHUNK_SIZE, self._size * REINDEX_FRACTION)
+            new_rows = set()
+            new_codes = [row["sku_code"] for row in rows if row["sku_code"] not in self._row_by_code]
+            if new_codes:
+                table = models.SKUItem.__table__
+                for start in range(0, len(new_codes), LOOKUP_CHUNK_SIZE):
+                    chunk = new_codes[start : start + LOOKUP_CHUNK_SIZE]
+                    for item_id, sku_code in db.execute(
+                        select(table.c.id, table.c.sku_code).where(table.c.sku_code.in_(chunk))
+                    ):
+                        if sku_code not in self._row_by_code:
+                            new_rows.add(self._append(item_id, sku_code))
+                self._order = None
+            for values in rows:
+                row = self._row_by_code.get(values["sku_code"])
+                if row is not None:
+                    new = row in new_rows
+                    self._set(row, values, new=new, reindex=reindex)
+                    new_rows.discard(row)
+            if not reindex:
+                self._reindex()
+                self._restat()
+
+    # --------------------------------------------------------------- reads
+    def _sorted(self) -> np.ndarray:
+        """Rows in (priority DESC, id) order."""
+        if self._order is None:
+            count = self._size
+            self._order = np.lexsort((self._id[:count], -self._numeric["priority"][:count]))
+        return self._order
+
+    def columns(
+        self,
+        db: Optional[Session],
+        fields: Sequence[str] = NUMERIC_FIELDS,
+        zone_overrides: Optional[Dict[str, str]] = None,
+        override_zones: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """All SKUs in (priority DESC, id) order as columns, in the shape of
+        `sku_query.sku_columns` ("id" is also available).
+
+        `zone_overrides` replace zones by sku_code (upper-cased); with
+        `override_zones`, overrides naming any other zone are ignored.
+        """
+        with self._lock:
+            self.ensure_loaded(db)
+            order = self._sorted()
+            zone = self._zone[order]
+            names = list(self._zone_names)
+            if zone_overrides:
+                allowed = set(override_zones) if override_zones is not None else None
+                zone = zone.astype(np.int64)
+                position = np.empty(self._size, dtype=np.int64)
+                position[order] = np.arange(self._size)
+                extra: Dict[str, int] = {}
+                for sku_code, target in zone_overrides.items():
+                    row = self._row_by_code.get(sku_code)
+                    target = (target or "").upper()
+                    if row is None or not target or (allowed is not None and target not in allowed):
+                        continue
+                    code = self._zone_codes.get(target)
+                    if code is None:
+                        # A zone no stored SKU is in yet; not interned until written.
+                        code = extra.setdefault(target, len(names) + len(extra))
+                    zone[position[row]] = code
+                names.extend(extra)
+            rows = order.tolist()
+            columns: Dict[str, Any] = {
+                "sku_code": [self._codes[row] for row in rows],
+                "product_name": [self._names[row] for row in rows],
+                "zone": np.array(names, dtype="<U16")[zone] if names else np.zeros(0, dtype="<U16"),
+            }
+            if "id" in fields:
+                columns["id"] = self._id[order]
+            for name in fields:
+                if name in RAW_FIELDS:
+                    # Rows without raw metrics: the estimate from the normalized one.
+                    values = self._numeric[name][order]
+                    metric = name[len("raw_"):]
+                    missing = np.isnan(values)
+                    values[missing] = implicit_raw(metric, self._numeric[metric][order][missing])
+                    columns[name] = values
+                elif name in self._numeric:
+                    columns[name] = self._numeric[name][order]
+            return columns
+
+    def _sorted_view(self) -> Dict[str, np.ndarray]:
+        """Order, priority, id and zone code in (priority DESC, id) order;
+        rebuilt on the first read after any write."""
+        if self._view is None:
+            order = self._sorted()
+            self._view = {
+                "order": order,
+                "priority": self._numeric["priority"][order],
+                "id": self._id[order],
+                "zone": self._zone[order],
+            }
+        return self._view
+
+    def list_rows(
+        self,
+        db: Optional[Session],
+        fields: Sequence[str] = LISTABLE_FIELDS,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        zones: Optional[Sequence[str]] = None,
+        min_priority: Optional[float] = None,
+        max_priority: Optional[float] = None,
+        code_prefix: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """`sku_query.list_sku_rows` served from memory: same filters, order,
+        page size and cursors."""
+        with self._lock:
+            self.ensure_loaded(db)
+            view = self._sorted_view()
+            priority = view["priority"]
+            mask = np.ones(priority.size, dtype=bool)
+            if zones:
+                wanted = [self._zone_codes[z.upper()] for z in zones if z.upper() in self._zone_codes]
+                mask &= np.isin(view["zone"], wanted)
+            if min_priority is not None:
+                mask &= priority >= min_priority
+            if max_priority is not None:
+                mask &= priority <= max_priority
+            if cursor:
+                after_priority, after_id = decode_cursor(cursor)
+                mask &= (priority < after_priority) | (
+                    (priority == after_priority) & (view["id"] > after_id)
+                )
+            positions = np.flatnonzero(mask)
+            wanted_rows = None if limit is None else limit + 1
+            if code_prefix:
+                matched = []
+                for position in positions.tolist():
+                    if self._codes[view["order"][position]].startswith(code_prefix):
+                        matched.append(position)
+                        if wanted_rows is not None and len(matched) == wanted_rows:
+                            break
+                positions = np.asarray(matched, dtype=np.int64)
+            elif wanted_rows is not None:
+                positions = positions[:wanted_rows]
+
+            next_cursor = None
+            if limit is not None and positions.size > limit:
+                positions = positions[:limit]
+                last = positions[-1]
+                next_cursor = encode_cursor(float(priority[last]), int(view["id"][last]))
+            return self._records(view["order"][positions], fields), next_cursor
+
+    def _records(self, rows: np.ndarray, fields: Sequence[str]) -> List[Dict[str, Any]]:
+        """Row dicts for `rows`, built a column at a time."""
+        values: List[List[Any]] = []
+        for name in fields:
+            if name == "id":
+                values.append(self._id[rows].tolist())
+            elif name == "sku_code":
+                values.append([self._codes[row] for row in rows.tolist()])
+            elif name == "product_name":
+                values.append([self._names[row] for row in rows.tolist()])
+            elif name == "zone":
+                values.append([self._zone_names[code] for code in self._zone[rows].tolist()])
+            elif name in RAW_FIELDS:
+                raw = self._numeric[name][rows].tolist()
+                values.append([None if math.isnan(value) else value for value in raw])
+            else:
+                values.append(self._numeric[name][rows].tolist())
+        return [dict(zip(fields, record)) for record in zip(*values)] if values else [{} for _ in rows]
+
+    # ------------------------------------------------------- priority index
+    def _rows_of(self, ids: List[int]) -> np.ndarray:
+        """Rows of many ids at once: a binary search over the ids sorted
+        once per insert or delete, instead of a dict lookup per id."""
+        if self._id_order is None:
+            self._id_order = np.argsort(self._id[: self._size], kind="stable")
+            self._sorted_ids = self._id[self._id_order]
+        wanted = np.fromiter(ids, dtype=np.int64, count=len(ids))
+        return self._id_order[np.searchsorted(self._sorted_ids, wanted)]
+
+    def _ranked(self, key: Tuple[float, int]) -> Dict[str, Any]:
+        row = self._row_by_id[key[1]]
+        return {
+            "sku_code": self._codes[row],
+            "product_name": self._names[row],
+            "priority": -key[0],
+            "zone": self._zone_names[self._zone[row]],
+        }
+
+    def top(self, db: Optional[Session], k: int, zone: Optional[str] = None) -> Dict[str, Any]:
+        """The `k` highest-priority SKUs, overall or in one zone."""
+        with self._lock:
+            self.ensure_loaded(db)
+            zone = zone.upper() if zone else None
+            items = [
+                {"rank": rank, **self._ranked(key)}
+                for rank, key in enumerate(self._index.top(k, zone), start=1)
+            ]
+            return {"zone": zone, "total": self._index.size(zone), "items": items}
+
+    def rank(self, db: Optional[Session], sku_code: str) -> Dict[str, Any]:
+        """A SKU's rank and percentile overall and within its zone."""
+        with self._lock:
+            self.ensure_loaded(db)
+            row = self._row_by_code.get(sku_code)
+            if row is None:
+                raise LookupError(f"SKU '{sku_code}' not found")
+            priority, item_id, zone = self._index_entry(row)
+            rank = self._index.rank(priority, item_id)
+            zone_rank = self._index.rank(priority, item_id, zone)
+            return {
+                **self._ranked((-priority, item_id)),
+                "rank": rank,
+                "total": self._index.size(),
+                "percentile": round(self._index.percentile(rank), 3),
+                "zone_rank": zone_rank,
+                "zone_total": self._index.size(zone),
+                "zone_percentile": round(self._index.percentile(zone_rank, zone), 3),
+            }
+
+    def quantiles(
+        self, db: Optional[Session], qs: Sequence[float], zones: Optional[Sequence[str]] = None
+    ) -> Dict[str, Any]:
+        """Priority at each quantile in `qs`, overall and per zone."""
+        with self._lock:
+            self.ensure_loaded(db)
+            wanted = [zone.upper() for zone in zones] if zones else sorted(self._index.zones())
+
+            def summary(zone: Optional[str]) -> Dict[str, Any]:
+                return {
+                    "count": self._index.size(zone),
+                    "quantiles": {str(q): self._index.quantile(q, zone) for q in qs},
+                }
+
+            return {"all": summary(None), "zones": {zone: summary(zone) for zone in wanted}}
+
+    def count(self, db: Optional[Session]) -> int:
+        with self._lock:
+            self.ensure_loaded(db)
+            return self._size
+
+    def zone_counts(self, db: Optional[Session]) -> Dict[str, int]:
+        with self._lock:
+            self.ensure_loaded(db)
+            return {zone: self._index.size(zone) for zone in sorted(self._index.zones())}
+
+    def priorities_at(self, db: Optional[Session], ranks: Sequence[int]) -> List[Optional[float]]:
+        """Priority at each 1-based overall rank (None past the end)."""
+        with self._lock:
+            self.ensure_loaded(db)
+            return [self._index.priority_at(rank) for rank in ranks]
+
+    def priority_band(self, db: Optional[Session], low: float, high: float) -> Dict[str, List[Any]]:
+        """"id", "sku_code", "zone" and "priority" lists of the SKUs with
+        low <= priority < high, in rank order."""
+        with self._lock:
+            self.ensure_loaded(db)
+            keys = self._index.between(low, high)
+            rows = [self._row_by_id[item_id] for _, item_id in keys]
+            return {
+                "id": [item_id for _, item_id in keys],
+                "sku_code": [self._codes[row] for row in rows],
+                "zone": [self._zone_names[self._zone[row]] for row in rows],
+                "priority": [-negated for negated, _ in keys],
+            }
+
+    def zones_of(self, db: Optional[Session], sku_codes: Sequence[str]) -> List[Optional[str]]:
+        """Stored zone of each SKU code; None for codes not in the store."""
+        with self._lock:
+            self.ensure_loaded(db)
+            rows = [self._row_by_code.get(code) for code in sku_codes]
+            return [None if row is None else self._zone_names[self._zone[row]] for row in rows]
+
+    def raw_summary(self, db: Optional[Session], q: float) -> Dict[str, Any]:
+        """Per metric the raw minimum, maximum and value at quantile `q`,
+        read off the sorted raw values."""
+        with self._lock:
+            self.ensure_loaded(db)
+            stats = self._metric_stats
+            return {
+                "count": stats.size(),
+                "metrics": {
+                    metric: {
+                        "min": stats.minimum(metric),
+                        "max": stats.maximum(metric),
+                        "quantile": stats.quantile(metric, q),
+                    }
+                    for metric in METRICS
+                },
+            }
+
+    def ranked_by_zone(
+        self,
+        db: Optional[Session],
+        zone_overrides: Optional[Dict[str, str]] = None,
+        override_zones: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Dict[str, List[Any]]]:
+        """Per zone, "sku_code", "product_name" and "priority" lists in
+        (priority DESC, id) order, read off the priority index without
+        sorting.
+
+        `zone_overrides` move SKUs by sku_code (upper-cased zone); the moved
+        keys are merged into their target zone's order. With
+        `override_zones`, overrides naming any other zone are ignored.
+        """
+        with self._lock:
+            self.ensure_loaded(db)
+            allowed = set(override_zones) if override_zones is not None else None
+            moved: Dict[int, str] = {}
+            incoming: Dict[str, List[Tuple[float, int]]] = {}
+            for sku_code, target in (zone_overrides or {}).items():
+                row = self._row_by_code.get(sku_code)
+                target = (target or "").upper()
+                if row is None or not target or (allowed is not None and target not in allowed):
+                    continue
+                priority, item_id, zone = self._index_entry(row)
+                if target != zone:
+                    moved[item_id] = target
+                    incoming.setdefault(target, []).append((-priority, item_id))
+
+            ranked = {}
+            for zone in dict.fromkeys(self._index.zones() + list(incoming)):
+                keys = self._index.zone_keys(zone)
+                if moved:
+                    keys = [key for key in keys if key[1] not in moved]
+                if zone in incoming:
+                    keys = list(heapq.merge(keys, sorted(incoming[zone])))
+                rows = self._rows_of([key[1] for key in keys]).tolist()
+                ranked[zone] = {
+                    "sku_code": [self._codes[row] for row in rows],
+                    "product_name": [self._names[row] for row in rows],
+                    "priority": [-key[0] for key in keys],
+                }
+            return ranked
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            array_bytes = self._id.nbytes + self._zone.nbytes + sum(
+                array.nbytes for array in self._numeric.values()
+            )
+            # Strings, the two lists and the two lookup dicts.
+            object_bytes = (
+                sum(sys.getsizeof(code) for code in self._codes)
+                + sum(sys.getsizeof(name) for name in self._names if name is not None)
+                + sys.getsizeof(self._codes)
+                + sys.getsizeof(self._names)
+                + sys.getsizeof(self._row_by_code)
+                + sys.getsizeof(self._row_by_id)
+            )
+            index_bytes = self._index.memory_bytes() + self._metric_stats.memory_bytes()
+            total = array_bytes + object_bytes + index_bytes
+            # Per SKU: array bytes of the used rows (capacity slack excluded).
+            row_bytes = self._id.itemsize + self._zone.itemsize + 8 * len(self._numeric)
+            used = row_bytes * self._size + object_bytes + index_bytes
+            return {
+                "loaded": self._loaded,
+                "rows": self._size,
+                "capacity": len(self._id),
+                "zones": list(self._zone_names),
+                "loads": self._loads,
+                "last_load_ms": round(self._load_ms, 1),
+                "data_version": self._version,
+                "foreign_reloads": self._foreign_reloads,
+                "memory": {
+                    "array_bytes": array_bytes,
+                    "object_bytes": object_bytes,
+                    "index_bytes": index_bytes,
+                    "total_bytes": total,
+                    "bytes_per_100k_skus": round(used / self._size * 100000) if self._size else 0,
+                },
+            }
+
+
+SKU_STORE = SKUStore()
+
+
+@event.listens_for(Session, "after_commit")
+def _note_committed_version(session):
+    version = session.info.pop(models.SKU_VERSION_KEY, None)
+    if version is not None:
+        SKU_STORE.note_version(session.get_bind(), version)
@@ -0,0 +1,64 @@
+"""
+Default slotting rules from `build_ai_prompt`, in normalized (0..1) units.
+
+The prompt states the rules in raw units (weight > 10, f > 150, s > 30000);
+stored metrics are normalized with the active metric scale, so `rule_cutoffs`
+converts the same cut-offs with it for the pre-filter and the local rule
+engine.
+"""
+from typing import Dict
+
+import numpy as np
+
+from backend.services.normalization import metric_scale
+from backend.services.priority_calculator import active_formula
+
+HIGH_PRIORITY = 0.7
+# Raw cut-offs: heavy (kg), high frequency (picks) and large (cm3) SKUs.
+RAW_RULE_CUTOFFS = {"w": 10.0, "f": 150.0, "s": 30000.0}
+
+FAST_ZONES = ("A", "B")
+HEAVY_ZONE = "D"
+
+# Priorities closer than this to a zone cut-off are treated as borderline.
+BORDERLINE_MARGIN = 0.03
+
+
+def rule_cutoffs() -> Dict[str, float]:
+    """RAW_RULE_CUTOFFS in normalized units under the active metric scale."""
+    scale = metric_scale()
+    return {metric: value / scale[metric] for metric, value in RAW_RULE_CUTOFFS.items()}
+
+
+def zone_cutoffs() -> np.ndarray:
+    return np.array([cut for cut, _ in active_formula()["thresholds"]])
+
+
+def rule_flags(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Boolean masks for each default rule over columnar SKU data.
+
+    `columns` holds equally sized arrays for priority, f, w, s and zone.
+    """
+    zone = columns["zone"]
+    cutoffs = rule_cutoffs()
+    in_fast = np.isin(zone, FAST_ZONES)
+    high_priority = columns["priority"] > HIGH_PRIORITY
+    heavy = columns["w"] > cutoffs["w"]
+    high_f = columns["f"] > cutoffs["f"]
+    large = columns["s"] > cutoffs["s"]
+    return {
+        "high_priority": high_priority,
+        "heavy": heavy,
+        "high_f": high_f,
+        "large": large,
+        # Rule fires but the SKU is not where the rule wants it.
+        "high_priority_misplaced": high_priority & ~in_fast,
+        "heavy_misplaced": heavy & (zone != HEAVY_ZONE),
+        "high_f_misplaced": high_f & ~in_fast,
+    }
+
+
+def borderline_mask(priority: np.ndarray, margin: float = BORDERLINE_MARGIN) -> np.ndarray:
+    """SKUs whose priority sits within `margin` of any zone cut-off."""
+    distance = np.min(np.abs(priority[:, None] - zone_cutoffs()[None, :]), axis=1)
+    return distance < margin
@@ -0,0 +1,180 @@
+"""
+Sorted list of keys with O(log n) inserts, deletes and positional access.
+Keys are any totally ordered values: (-priority, id) tuples, raw floats.
+
+Keys live in sublists of about `SORTED_KEYS_LOAD` keys, with the last key of
+each sublist in `_maxes` and a Fenwick tree over the sublist lengths. A key
+is found by a bisect over `_maxes` and one inside its sublist, and its
+position is the tree's prefix sum plus the offset in the sublist. An insert
+or delete only moves at most 2 x load keys; a sublist that grows past that
+is split, and one that shrinks under half the load is merged into a
+neighbour, rebuilding the tree (O(number of sublists)) once per roughly
+`load` writes.
+"""
+import bisect
+import sys
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+SORTED_KEYS_LOAD = 1000
+
+Key = Any
+
+
+class SortedKeyList:
+    def __init__(self, keys: Sequence[Key] = (), load: int = SORTED_KEYS_LOAD) -> None:
+        """`keys` must already be sorted."""
+        self._load = load
+        self._lists: List[List[Key]] = [list(keys[start : start + load]) for start in range(0, len(keys), load)]
+        self._maxes: List[Key] = [chunk[-1] for chunk in self._lists]
+        self._size = len(keys)
+        self._rebuild()
+
+    # ------------------------------------------------------------ the tree
+    def _rebuild(self) -> None:
+        tree = [0] * (len(self._lists) + 1)
+        for position, keys in enumerate(self._lists, start=1):
+            tree[position] += len(keys)
+            parent = position + (position & -position)
+            if parent < len(tree):
+                tree[parent] += tree[position]
+        self._tree = tree
+
+    def _grow(self, sub: int, delta: int) -> None:
+        position = sub + 1
+        while position < len(self._tree):
+            self._tree[position] += delta
+            position += position & -position
+
+    def _before(self, sub: int) -> int:
+        """Keys in the sublists ahead of `sub`."""
+        total, position = 0, sub
+        while position:
+            total += self._tree[position]
+            position -= position & -position
+        return total
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """(sublist, offset) of position `index`."""
+        sub, step = 0, 1 << (len(self._tree).bit_length() - 1)
+        while step:
+            following = sub + step
+            if following < len(self._tree) and self._tree[following] <= index:
+                sub = following
+                index -= self._tree[following]
+            step >>= 1
+        return sub, index
+
+    def _reshape(self, sub: int) -> None:
+        """Split sublist `sub` if it grew past 2 x load, merge it into a
+        neighbour if it shrank under load / 2, then rebuild the tree."""
+        keys = self._lists[sub]
+        if len(keys) > 2 * self._load:
+            self._lists[sub : sub + 1] = [keys[: self._load], keys[self._load :]]
+            self._maxes[sub : sub + 1] = [keys[self._load - 1], keys[-1]]
+        elif len(keys) < self._load // 2 and len(self._lists) > 1:
+            first = sub if sub + 1 < len(self._lists) else sub - 1
+            merged = self._lists[first] + self._lists[first + 1]
+            self._lists[first : first + 2] = [merged]
+            self._maxes[first : first + 2] = [merged[-1]]
+            if len(merged) > 2 * self._load:
+                self._reshape(first)
+                return
+        self._rebuild()
+
+    # --------------------------------------------------------------- writes
+    def add(self, key: Key) -> int:
+        """Insert `key`; returns its position."""
+        if not self._lists:
+            self._lists, self._maxes, self._size = [[key]], [key], 1
+            self._rebuild()
+            return 0
+        sub = min(bisect.bisect_left(self._maxes, key), len(self._maxes) - 1)
+        keys = self._lists[sub]
+        offset = bisect.bisect_left(keys, key)
+        keys.insert(offset, key)
+        self._maxes[sub] = keys[-1]
+        self._size += 1
+        index = self._before(sub) + offset
+        if len(keys) > 2 * self._load:
+            self._reshape(sub)
+        else:
+            self._grow(sub, 1)
+        return index
+
+    def remove(self, key: Key) -> Optional[int]:
+        """Delete `key`; returns the position it had, or None if absent."""
+        sub = bisect.bisect_left(self._maxes, key)
+        if sub == len(self._maxes):
+            return None
+        keys = self._lists[sub]
+        offset = bisect.bisect_left(keys, key)
+        if keys[offset] != key:
+            return None
+        index = self._before(sub) + offset
+        del keys[offset]
+        self._size -= 1
+        if not keys:
+            del self._lists[sub]
+            del self._maxes[sub]
+            self._rebuild()
+            return index
+        self._maxes[sub] = keys[-1]
+        if len(keys) < self._load // 2 and len(self._lists) > 1:
+            self._reshape(sub)
+        else:
+            self._grow(sub, -1)
+        return index
+
+    # --------------------------------------------------------------- reads
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> Key:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("SortedKeyList index out of range")
+        sub, offset = self._locate(index)
+        return self._lists[sub][offset]
+
+    def __iter__(self) -> Iterator[Key]:
+        for keys in self._lists:
+            yield from keys
+
+    def index(self, key: Key) -> Optional[int]:
+        """Position of `key`, or None if absent."""
+        sub = bisect.bisect_left(self._maxes, key)
+        if sub == len(self._maxes):
+            return None
+        offset = bisect.bisect_left(self._lists[sub], key)
+        if self._lists[sub][offset] != key:
+            return None
+        return self._before(sub) + offset
+
+    def bisect_left(self, key: Key) -> int:
+        sub = bisect.bisect_left(self._maxes, key)
+        if sub == len(self._maxes):
+            return self._size
+        return self._before(sub) + bisect.bisect_left(self._lists[sub], key)
+
+    def islice(self, start: int = 0, end: Optional[int] = None) -> Iterator[Key]:
+        """Keys at positions start..end-1."""
+        end = self._size if end is None else min(end, self._size)
+        if start >= end:
+            return
+        sub, offset = self._locate(start)
+        remaining = end - start
+        while remaining:
+            chunk = self._lists[sub][offset : offset + remaining]
+            yield from chunk
+            remaining -= len(chunk)
+            sub, offset = sub + 1, 0
+
+    def memory_bytes(self) -> int:
+        """Approximate: the sublists, maxes and tree, not the keys."""
+        return (
+            sum(sys.getsizeof(keys) for keys in self._lists)
+            + sys.getsizeof(self._lists)
+            + sys.getsizeof(self._maxes)
+            + sys.getsizeof(self._tree)
+        )
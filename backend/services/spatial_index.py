@@ -0,0 +1,158 @@
+"""
+Uniform-grid spatial index over the slots of the banded layout.
+
+Slot coordinates never move: slot `idx` of a zone is always at
+`position_for(zone, ..., idx)`. Only occupancy changes, and the live layout
+already knows it (slot idx of a zone is occupied iff idx < zone size). So
+the index stores static points bucketed into square cells, and queries take
+an occupancy predicate from the caller.
+"""
+import heapq
+import math
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from backend.services.layout_builder import band_capacity, slot_coordinates
+
+CELL_SIZE_M = 4.0
+
+# (zone, slot index) -> keep?
+SlotFilter = Callable[[str, int], bool]
+
+
+class SlotIndex:
+    def __init__(self, warehouse: Dict, cell_size: float = CELL_SIZE_M) -> None:
+        self.cell_size = cell_size
+        self._height = warehouse["height_m"]
+        self._bands = {zone["id"]: (zone["from_m"], zone["to_m"]) for zone in warehouse["zones"]}
+        self.capacity = {
+            zone_id: band_capacity(band_from, band_to, self._height)
+            for zone_id, (band_from, band_to) in self._bands.items()
+        }
+        self._x: Dict[str, List[float]] = {zone_id: [] for zone_id in self._bands}
+        self._y: Dict[str, List[float]] = {zone_id: [] for zone_id in self._bands}
+        # Per zone: cell -> slot indexes, and the (min, max) cell bounds.
+        self._cells: Dict[str, Dict[Tuple[int, int], List[int]]] = {
+            zone_id: {} for zone_id in self._bands
+        }
+        self._bounds: Dict[str, Tuple[int, int, int, int]] = {}
+        for zone_id, capacity in self.capacity.items():
+            self.ensure(zone_id, capacity)
+
+    def ensure(self, zone_id: str, count: int) -> None:
+        """Index at least `count` slots of a zone (overflow rows included)."""
+        indexed = len(self._x[zone_id])
+        if count <= indexed:
+            return
+        count = max(count, 2 * indexed)
+        band_from, band_to = self._bands[zone_id]
+        xs, ys = slot_coordinates(band_from, band_to, self._height, count)
+        xs, ys = xs[indexed:].tolist(), ys[indexed:].tolist()
+        self._x[zone_id].extend(xs)
+        self._y[zone_id].extend(ys)
+        cells = self._cells[zone_id]
+        for idx, (x_m, y_m) in enumerate(zip(xs, ys), start=indexed):
+            cells.setdefault(self._cell(x_m, y_m), []).append(idx)
+        cxs = [cell[0] for cell in cells]
+        cys = [cell[1] for cell in cells]
+        self._bounds[zone_id] = (min(cxs), max(cxs), min(cys), max(cys))
+
+    def coordinates(self, zone_id: str, idx: int) -> Tuple[float, float]:
+        self.ensure(zone_id, idx + 1)
+        return self._x[zone_id][idx], self._y[zone_id][idx]
+
+    def _cell(self, x_m: float, y_m: float) -> Tuple[int, int]:
+        return int(math.floor(x_m / self.cell_size)), int(math.floor(y_m / self.cell_size))
+
+    @staticmethod
+    def _ring_cells(center: Tuple[int, int], radius: int) -> Iterator[Tuple[int, int]]:
+        cx, cy = center
+        if radius == 0:
+            yield center
+            return
+        for dx in range(-radius, radius + 1):
+            yield cx + dx, cy - radius
+            yield cx + dx, cy + radius
+        for dy in range(-radius + 1, radius):
+            yield cx - radius, cy + dy
+            yield cx + radius, cy + dy
+
+    def _ring_span(self, zone_id: str, center: Tuple[int, int]) -> Tuple[int, int]:
+        """Nearest and farthest ring (Chebyshev cell distance) holding this zone."""
+        min_cx, max_cx, min_cy, max_cy = self._bounds[zone_id]
+        near_x = max(min_cx - center[0], 0, center[0] - max_cx)
+        near_y = max(min_cy - center[1], 0, center[1] - max_cy)
+        far = max(abs(center[0] - min_cx), abs(center[0] - max_cx),
+                  abs(center[1] - min_cy), abs(center[1] - max_cy))
+        return max(near_x, near_y), far
+
+    def nearest(
+        self,
+        x_m: float,
+        y_m: float,
+        keep: SlotFilter,
+        k: int = 1,
+        zones: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[float, str, int]]:
+        """Up to `k` (distance, zone, idx) closest to (x, y) passing `keep`.
+
+        Rings of cells are visited outwards and the search stops once the
+        next ring cannot hold anything closer than the k-th hit.
+        """
+        center = self._cell(x_m, y_m)
+        spans = {
+            zone_id: self._ring_span(zone_id, center)
+            for zone_id in (zones or self._bands)
+            if zone_id in self._bounds
+        }
+        if not spans:
+            return []
+        best: List[Tuple[float, str, int]] = []  # max-heap via negated distance
+        first = min(near for near, _ in spans.values())
+        last = max(far for _, far in spans.values())
+        for radius in range(first, last + 1):
+            if len(best) == k and -best[0][0] <= (radius - 1) * self.cell_size:
+                break
+            active = [
+                zone_id for zone_id, (near, far) in spans.items() if near <= radius <= far
+            ]
+            for cell in self._ring_cells(center, radius):
+                for zone_id in active:
+                    for idx in self._cells[zone_id].get(cell, ()):
+                        if not keep(zone_id, idx):
+                            continue
+                        distance = math.hypot(
+                            self._x[zone_id][idx] - x_m, self._y[zone_id][idx] - y_m
+                        )
+                        entry = (-distance, zone_id, idx)
+                        if len(best) < k:
+                            heapq.heappush(best, entry)
+                        elif entry > best[0]:
+                            heapq.heapreplace(best, entry)
+        return sorted((-neg, zone_id, idx) for neg, zone_id, idx in best)
+
+    def within(
+        self,
+        x_m: float,
+        y_m: float,
+        radius_m: float,
+        keep: SlotFilter,
+        zones: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[float, str, int]]:
+        """All (distance, zone, idx) within `radius_m` of (x, y), nearest first."""
+        low = self._cell(x_m - radius_m, y_m - radius_m)
+        high = self._cell(x_m + radius_m, y_m + radius_m)
+        hits: List[Tuple[float, str, int]] = []
+        for zone_id in zones or self._bands:
+            if zone_id not in self._bounds:
+                continue
+            min_cx, max_cx, min_cy, max_cy = self._bounds[zone_id]
+            cells = self._cells[zone_id]
+            xs, ys = self._x[zone_id], self._y[zone_id]
+            for cx in range(max(low[0], min_cx), min(high[0], max_cx) + 1):
+                for cy in range(max(low[1], min_cy), min(high[1], max_cy) + 1):
+                    for idx in cells.get((cx, cy), ()):
+                        distance = math.hypot(xs[idx] - x_m, ys[idx] - y_m)
+                        if distance <= radius_m and keep(zone_id, idx):
+                            hits.append((distance, zone_id, idx))
+        hits.sort()
+        return hits
@@ -0,0 +1,40 @@
+"""
+Shared fixtures: the app against a throwaway SQLite database.
+
+DATABASE_URL is set before `backend` is imported, since the engines are
+created at import time. Tests share one database per session, so each test
+uses its own sku_code prefix.
+"""
+import os
+import tempfile
+import time
+
+import pytest
+
+_tmpdir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir.name, 'test.sqlite3')}"
+# Check for writes from other processes on every read.
+os.environ["SKU_STORE_RECHECK_S"] = "0"
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def wait_for_job(client, job_id, timeout_s=30.0):
+    """Poll a job until it has finished; returns its summary."""
+    from backend.services.jobs import TERMINAL_STATUSES
+
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        job = client.get(f"/api/jobs/{job_id}").json()
+        if job["status"] in TERMINAL_STATUSES:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
@@ -0,0 +1,28 @@
+from backend.services.calibration import boundary_ranks, zone_capacities
+from backend.services.rack_model import build_slot_grid, grid_summary
+
+
+def test_zone_capacity_matches_the_rack_grid(client):
+    grid = client.get("/api/slots/grid").json()
+    per_slot = grid["rack"]["skus_per_slot"]
+    calibration = client.get("/api/scoring/calibration").json()
+    for zone, info in calibration["zones"].items():
+        slots = grid["zones"].get(zone, {}).get("slots", 0)
+        assert info["capacity"] == slots * per_slot
+
+
+def test_zone_capacity_follows_rack_settings():
+    warehouse = {
+        "width_m": 40.0,
+        "height_m": 30.0,
+        "zones": [
+            {"id": "A", "from_m": 0.0, "to_m": 20.0},
+            {"id": "B", "from_m": 20.0, "to_m": 40.0},
+        ],
+        "rack": {"skus_per_slot": 2},
+    }
+    grid = build_slot_grid(warehouse)
+    slots = {zone: info["slots"] for zone, info in grid_summary(grid)["zones"].items()}
+    capacities = zone_capacities(grid)
+    assert capacities == {"A": 2 * slots["A"], "B": 2 * slots["B"], "C": 0, "D": 0}
+    assert boundary_ranks(list(capacities.values()), 10) == [10, 10, 10]
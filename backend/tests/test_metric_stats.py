@@ -0,0 +1,26 @@
+import math
+import random
+
+import numpy as np
+
+from backend.services.metric_stats import RawMetricStats
+
+
+def test_matches_numpy_after_writes():
+    rng = random.Random(5)
+    rows = [{"f": rng.uniform(0, 500), "w": rng.choice([math.nan, rng.uniform(0, 30)])} for _ in range(400)]
+    stats = RawMetricStats(("f", "w"))
+    stats.build({metric: sorted(v for row in rows if not math.isnan(v := row[metric])) for metric in ("f", "w")})
+    for _ in range(1500):
+        if rng.random() < 0.5:
+            stats.remove(rows.pop(rng.randrange(len(rows))))
+        row = {"f": rng.uniform(0, 500), "w": rng.choice([math.nan, rng.uniform(0, 30)])}
+        rows.append(row)
+        stats.add(row)
+
+    for metric in ("f", "w"):
+        values = np.array([row[metric] for row in rows])
+        values = values[~np.isnan(values)]
+        assert stats.minimum(metric) == values.min() and stats.maximum(metric) == values.max()
+        assert np.isclose(stats.quantile(metric, 0.95), np.quantile(values, 0.95))
+    assert stats.size() == min(len(rows), int((~np.isnan([row["w"] for row in rows])).sum()))
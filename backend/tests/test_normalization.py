@@ -0,0 +1,69 @@
+from backend.services.normalization import RAW_METRIC_SCALE, prepare_metrics
+from backend.tests.conftest import wait_for_job
+
+METRIC_FIELDS = ("f", "w", "s", "i", "raw_f", "raw_w", "raw_s", "raw_i", "zone")
+
+
+def _rows(client, prefix):
+    rows = client.get(f"/api/sku/list?code_prefix={prefix}").json()
+    return {row["sku_code"]: {name: row[name] for name in METRIC_FIELDS} for row in rows}
+
+
+def _finish_rescore(client, job):
+    if job is not None:
+        assert wait_for_job(client, job["id"])["status"] == "succeeded"
+
+
+def test_prepare_metrics_keeps_no_raw_values_for_normalized_input():
+    prepared = prepare_metrics({"sku_code": "N", "f": 0.5, "w": 0.3, "s": 0.2, "i": 0.5}, normalized=True)
+    assert (prepared["f"], prepared["w"], prepared["s"], prepared["i"]) == (0.5, 0.3, 0.2, 0.5)
+    assert [prepared[f"raw_{metric}"] for metric in "fwsi"] == [None] * 4
+
+    prepared = prepare_metrics({"sku_code": "R", "f": 100, "w": 6, "s": 10000, "i": 10})
+    assert prepared["raw_f"] == 100 and prepared["f"] == round(100 / RAW_METRIC_SCALE["f"], 4)
+
+
+def test_normalized_input_does_not_drive_or_follow_the_scale(client):
+    before = client.get("/api/scoring/normalization").json()
+    items = [
+        {"sku_code": f"NRM{idx:03d}", "f": round(idx / 200, 4), "w": 0.3, "s": 0.2, "i": 0.5}
+        for idx in range(200)
+    ]
+    response = client.post("/api/sku/bulk", json={"items": items})
+    assert response.status_code == 200 and response.json()["created"] == 200
+    submitted = _rows(client, "NRM")
+    assert all(row["raw_f"] is None and row["raw_s"] is None for row in submitted.values())
+    trend = client.get("/api/sku/NRM100/trend").json()
+    assert trend["smoothed_priority"] == trend["windows"]["7d"]["mean_priority"]
+
+    status = client.get("/api/scoring/normalization").json()
+    assert status["active"]["version"] == before["active"]["version"]
+    assert status["target"]["samples"] == before["target"]["samples"]
+
+    # Forcing a new scale re-scores the rows but leaves their metrics alone.
+    adopted = client.post("/api/scoring/normalization").json()
+    _finish_rescore(client, adopted["job"])
+    assert _rows(client, "NRM") == submitted
+
+
+def test_rescore_renormalizes_only_rows_with_raw_values(client):
+    client.post(
+        "/api/sku/bulk",
+        json={"items": [{"sku_code": f"KEEP{idx:02d}", "f": 0.9, "w": 0.3, "s": 0.2, "i": 0.5} for idx in range(10)]},
+    )
+    kept = _rows(client, "KEEP")
+    items = [
+        {"sku_code": f"RAW{idx:03d}", "f": 400 + idx, "w": 5, "s": 20000, "i": 3, "normalized": False}
+        for idx in range(150)
+    ]
+    client.post("/api/sku/bulk", json={"items": items})
+    adopted = client.post("/api/scoring/normalization").json()
+    _finish_rescore(client, adopted["job"])
+
+    status = client.get("/api/scoring/normalization").json()
+    scale = status["active"]["scale"]
+    assert scale["f"] > RAW_METRIC_SCALE["f"]
+    assert status["stale_rows"] == 0
+    for row in _rows(client, "RAW").values():
+        assert row["f"] == round(min(1.0, row["raw_f"] / scale["f"]), 4)
+    assert _rows(client, "KEEP") == kept
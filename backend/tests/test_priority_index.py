@@ -0,0 +1,35 @@
+import random
+
+import numpy as np
+
+from backend.services.priority_index import PriorityIndex, make_key
+
+
+def test_matches_a_sorted_copy_after_writes():
+    rng = random.Random(11)
+    entries = {item_id: (round(rng.random(), 3), rng.choice("ABCD")) for item_id in range(500)}
+    index = PriorityIndex()
+    keys = sorted(make_key(priority, item_id) for item_id, (priority, _) in entries.items())
+    index.build_ranked(
+        keys, {zone: [key for key in keys if entries[key[1]][1] == zone] for zone in "ABCD"}
+    )
+    for item_id in range(500, 1500):
+        if rng.random() < 0.4:
+            victim = rng.choice(list(entries))
+            index.remove(entries[victim][0], victim, entries.pop(victim)[1])
+        entries[item_id] = (round(rng.random(), 3), rng.choice("ABCDE"))
+        index.insert(entries[item_id][0], item_id, entries[item_id][1])
+
+    expected = sorted(make_key(priority, item_id) for item_id, (priority, _) in entries.items())
+    assert index.size() == len(expected) and index.top(25) == expected[:25]
+    assert sorted(index.zones()) == sorted({zone for _, zone in entries.values()})
+    for item_id in rng.sample(list(entries), 50):
+        priority, zone = entries[item_id]
+        zone_keys = [key for key in expected if entries[key[1]][1] == zone]
+        assert index.rank(priority, item_id) == expected.index(make_key(priority, item_id)) + 1
+        assert index.rank(priority, item_id, zone) == zone_keys.index(make_key(priority, item_id)) + 1
+    assert index.rank(2.0, -1) is None
+    zone_b = [entries[key[1]][0] for key in expected if entries[key[1]][1] == "B"]
+    assert np.isclose(index.quantile(0.9, "B"), np.quantile(zone_b, 0.9))
+    assert index.between(0.25, 0.5) == [key for key in expected if 0.25 <= -key[0] < 0.5]
+    assert index.priority_at(1) == -expected[0][0] and index.priority_at(len(expected) + 1) is None
@@ -0,0 +1,68 @@
+import pytest
+
+from backend.services.rule_engine import columns_from_items, run_rules, validate_rules
+
+ZONES = ["A", "B", "C", "D"]
+ITEMS = [
+    {"sku_code": "0A1", "zone": "A", "priority": 0.8, "f": 0.9, "w": 0.2, "s": 0.1, "i": 0.5},
+    {"sku_code": "1B2", "zone": "B", "priority": 0.4, "f": 0.3, "w": 0.7, "s": 0.4, "i": 0.2},
+    {"sku_code": "0C3", "zone": "C", "priority": 0.2, "f": 0.1, "w": 0.1, "s": 0.9, "i": 0.1},
+]
+
+
+def _moved(rule):
+    result = run_rules(columns_from_items(ITEMS), [rule], use_defaults=False)
+    return sorted(entry["sku_code"] for entry in result["reassignments"])
+
+
+@pytest.mark.parametrize(
+    "when",
+    [
+        {"sku_code": {"gt": 5}},
+        {"zone": {"lt": "B"}},
+        {"f": {"prefix": "0"}},
+        {"f": {"in": ["x"]}},
+        {"f": {"in": 0.5}},
+        {"f": {"gt": "0.5"}},
+        {"f": {"gt": True}},
+        {"priority": {"eq": float("nan")}},
+        {"zone": {"in": [1, 2]}},
+        {"sku_code": {"prefix": 0}},
+        {"f": {"between": [0, 1]}},
+        {"weight": {"gt": 0.5}},
+        {"f": {}},
+    ],
+)
+def test_malformed_conditions_are_rejected(when):
+    with pytest.raises(ValueError):
+        validate_rules([{"when": when, "zone": "A"}], ZONES)
+
+
+def test_unknown_target_zone_is_rejected():
+    with pytest.raises(ValueError):
+        validate_rules([{"when": {}, "zone": "Z"}], ZONES)
+
+
+def test_valid_conditions_pass_and_match():
+    rules = [
+        {"when": {"f": {"gte": 0.3, "lt": 1}}, "zone": "D"},
+        {"when": {"priority": {"in": [0.2, 0.4]}}, "zone": "D"},
+        {"when": {"zone": {"in": ["a", "B"]}}, "zone": "D"},
+        {"when": {"sku_code": {"prefix": "0", "in": ["0A1", "0C3"]}}, "zone": "D"},
+        {"when": {"sku_code": {"eq": "1B2"}}, "zone": "D"},
+    ]
+    validate_rules(rules, ZONES)
+    assert _moved(rules[0]) == ["0A1", "1B2"]
+    assert _moved(rules[1]) == ["0C3", "1B2"]
+    assert _moved(rules[2]) == ["0A1", "1B2"]
+    assert _moved(rules[3]) == ["0A1", "0C3"]
+    assert _moved(rules[4]) == ["1B2"]
+
+
+def test_optimize_rejects_type_mismatch_with_400(client):
+    response = client.post(
+        "/api/sku/optimize",
+        json={"engine": "local", "rules": [{"when": {"sku_code": {"gt": 5}}, "zone": "A"}]},
+    )
+    assert response.status_code == 400
+    assert "sku_code" in response.json()["detail"]
@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Another process writing through the backend's session, like import_skus.py.
+FOREIGN_WRITE = """
+from backend.database import SessionLocal
+from backend import models
+with SessionLocal() as db:
+    item = db.query(models.SKUItem).filter(models.SKUItem.sku_code == "XPROC1").one()
+    item.priority, item.zone = 0.9876, "A"
+    db.add(models.SKUItem(sku_code="XPROC2", f=0.1, w=0.1, s=0.1, i=0.1, priority=0.1, zone="D"))
+    db.commit()
+"""
+
+
+def _store_stats(client):
+    return client.get("/api/sku/store/stats").json()
+
+
+def _listed(client, prefix):
+    return {row["sku_code"]: row for row in client.get(f"/api/sku/list?code_prefix={prefix}").json()}
+
+
+def test_own_writes_do_not_reload_the_store(client):
+    client.get("/api/sku/list?limit=1")
+    loads = _store_stats(client)["loads"]
+    client.post("/api/sku/add", json={"sku_code": "OWN1", "f": 0.2, "w": 0.2, "s": 0.2, "i": 0.2})
+    client.post("/api/sku/bulk", json={"items": [{"sku_code": "OWN2", "f": 0.3, "w": 0.3, "s": 0.3, "i": 0.3}]})
+    assert set(_listed(client, "OWN")) == {"OWN1", "OWN2"}
+    stats = _store_stats(client)
+    assert stats["loads"] == loads and stats["data_version"] > 0
+
+
+def test_writes_from_another_process_reload_the_store(client):
+    client.post("/api/sku/add", json={"sku_code": "XPROC1", "f": 0.2, "w": 0.2, "s": 0.2, "i": 0.2})
+    assert _listed(client, "XPROC")["XPROC1"]["zone"] != "A"
+    reloads = _store_stats(client)["foreign_reloads"]
+    etag = client.get("/api/sku/visualize").headers["etag"]
+    since = client.get("/api/sku/layout/changes").json()["version"]
+
+    subprocess.run(
+        [sys.executable, "-c", FOREIGN_WRITE],
+        cwd=REPO_ROOT,
+        env={**os.environ, "PYTHONPATH": REPO_ROOT},
+        check=True,
+        capture_output=True,
+    )
+
+    # The layout readers notice the write before anything lists SKUs.
+    response = client.get("/api/sku/visualize", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["etag"] != etag
+    placed = {row["sku_code"]: row for row in response.json()["placements"]}
+    assert placed["XPROC1"]["zone"] == "A" and "XPROC2" in placed
+    changes = client.get(f"/api/sku/layout/changes?since={since}").json()
+    assert changes["version"] > since
+    assert {"XPROC1", "XPROC2"} <= {row["sku_code"] for row in changes["placements"]}
+    nearest = client.get("/api/slots/nearest?sku_code=XPROC2&state=occupied").json()
+    assert nearest["results"][0]["sku_code"] == "XPROC2"
+
+    listed = _listed(client, "XPROC")
+    assert listed["XPROC1"]["priority"] == 0.9876 and listed["XPROC1"]["zone"] == "A"
+    assert "XPROC2" in listed
+    assert _store_stats(client)["foreign_reloads"] == reloads + 1
@@ -0,0 +1,41 @@
+import bisect
+import random
+
+from backend.services.sorted_keys import SortedKeyList
+
+
+def test_matches_a_plain_sorted_list():
+    rng = random.Random(4)
+    expected = sorted((-rng.random(), idx) for idx in range(300))
+    keys = SortedKeyList(expected, load=8)
+    next_id = len(expected)
+    for _ in range(3000):
+        if expected and rng.random() < 0.5:
+            key = rng.choice(expected)
+            index = bisect.bisect_left(expected, key)
+            del expected[index]
+            assert keys.remove(key) == index
+        else:
+            key = (-rng.random(), next_id)
+            next_id += 1
+            index = bisect.bisect_left(expected, key)
+            expected.insert(index, key)
+            assert keys.add(key) == index
+        assert len(keys) == len(expected)
+    assert list(keys) == expected
+    assert [keys[idx] for idx in range(len(expected))] == expected
+    assert list(keys.islice(17, 90)) == expected[17:90]
+    assert list(keys.islice(len(expected) - 5)) == expected[-5:]
+    probe = (-0.5, 0)
+    assert keys.bisect_left(probe) == bisect.bisect_left(expected, probe)
+    assert keys.remove((1.0, -1)) is None
+
+
+def test_drains_and_refills():
+    keys = SortedKeyList(load=4)
+    for idx in range(50):
+        assert keys.add((0.0, idx)) == idx
+    for idx in range(50):
+        assert keys.remove((0.0, idx)) == 0
+    assert len(keys) == 0 and list(keys.islice(0)) == []
+    assert keys.add((0.0, 1)) == 0
@@ -0,0 +1,38 @@
+import numpy as np
+
+from backend.services.travel_sim import evaluate, placed_lines
+
+GATE = (40.0, 15.0)
+
+
+def test_layouts_are_compared_on_lines_both_placed():
+    order_idx = np.array([0, 1, 1])
+    sku_idx = np.array([0, 1, 0])
+    full_x, full_y = np.array([30.0, 0.0]), np.array([15.0, 15.0])
+    # Leaves the far SKU unplaced, which must not make it look shorter.
+    partial_x, partial_y = np.array([30.0, np.nan]), np.array([15.0, np.nan])
+
+    alone = evaluate(order_idx, sku_idx, partial_x, partial_y, GATE, 2)
+    assert alone["missing_lines"] == 1 and alone["evaluated_lines"] == 2
+
+    common = placed_lines(sku_idx, full_x, partial_x)
+    full = evaluate(order_idx, sku_idx, full_x, full_y, GATE, 2, lines=common)
+    partial = evaluate(order_idx, sku_idx, partial_x, partial_y, GATE, 2, lines=common)
+    assert full["evaluated_lines"] == partial["evaluated_lines"] == 2
+    assert full["total_m"] == partial["total_m"] == 40.0
+    assert full["missing_lines"] == 0 and partial["missing_lines"] == 1
+
+
+def test_evaluate_flags_layouts_that_drop_skus(client):
+    for code in ("TRAVEL1", "TRAVEL2"):
+        client.post("/api/sku/add", json={"sku_code": code, "f": 0.9, "w": 0.1, "s": 0.1, "i": 0.1})
+    current = client.post("/api/layout/evaluate", json={"orders": [["TRAVEL1", "TRAVEL2"]]}).json()
+    assert current["like_for_like"] and current["evaluated_lines"] == 2
+
+    placed = [p for p in client.get("/api/sku/visualize").json()["placements"] if p["sku_code"] == "TRAVEL1"]
+    result = client.post(
+        "/api/layout/evaluate", json={"orders": [["TRAVEL1", "TRAVEL2"]], "placements": placed}
+    ).json()
+    assert not result["like_for_like"] and result["evaluated_lines"] == 1
+    assert result["results"]["custom"]["missing_lines"] == 1
+    assert result["results"]["current"]["total_m"] == result["results"]["custom"]["total_m"]
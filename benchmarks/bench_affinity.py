@@ -0,0 +1,142 @@
+"""
+Benchmark: order co-occurrence ingestion and the affinity layout.
+
+Builds a synthetic catalog in a throwaway SQLite file. Orders are drawn by
+pick frequency f, and with some probability an order also picks the other
+members of its seed SKU's "family" (three consecutive SKU codes), so there
+are real co-picked pairs to find. The benchmark reports:
+
+- ingestion throughput and stored pairs against the top-K memory bound;
+- how many family partners show up among each SKU's top-K neighbours;
+- travel for the banded and affinity layouts on a fresh order stream.
+
+    python benchmarks/bench_affinity.py --rows 20000 --orders 333000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import init_db
+from backend.services.affinity import AffinityMatrix, affinity_layout
+from backend.services.layout_builder import generate_layout, load_warehouse
+from backend.services.sku_ingest import upsert_skus
+from backend.services.sku_query import sku_columns
+from backend.services.slot_solver import gate_point
+from backend.services.travel_sim import evaluate, layout_coordinates, order_lines
+
+FAMILY = 3
+
+
+def make_rows(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "sku_code": f"BENCH{idx:06d}",
+            "product_name": f"Bench item {idx}",
+            "f": round(rng.random(), 4),
+            "w": round(rng.random(), 4),
+            "s": round(rng.random(), 4),
+            "i": round(rng.random(), 4),
+        }
+        for idx in range(count)
+    ]
+
+
+def make_orders(codes, weights, orders, mean_lines, together, seed):
+    rng = np.random.default_rng(seed)
+    p = np.asarray(weights) + 1e-6
+    p = p / p.sum()
+    lines = 1 + rng.poisson(max(mean_lines - 1.0, 0.0), size=orders)
+    picks = rng.choice(len(codes), size=int(lines.sum()), p=p)
+    family = rng.random(orders) < together
+    result, cursor = [], 0
+    for number in range(orders):
+        chosen = picks[cursor : cursor + lines[number]].tolist()
+        cursor += lines[number]
+        if family[number]:
+            base = chosen[0] - chosen[0] % FAMILY
+            chosen.extend(idx for idx in range(base, min(base + FAMILY, len(codes))) if idx != chosen[0])
+        result.append([codes[idx] for idx in chosen])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--orders", type=int, default=333000)
+    parser.add_argument("--mean-lines", type=float, default=3.0)
+    parser.add_argument("--together", type=float, default=0.4, help="share of orders that pick a family")
+    parser.add_argument("--top-k", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmpdir, 'affinity.sqlite3')}",
+            connect_args={"check_same_thread": False},
+        )
+        init_db(engine)
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        upsert_skus(db, make_rows(args.rows))
+        skus = sku_columns(db, ("f",))
+        # Families follow catalog order, not priority order.
+        codes = sorted(skus["sku_code"])
+        weight = dict(zip(skus["sku_code"], skus["f"].tolist()))
+        weights = [weight[code] for code in codes]
+
+        history = make_orders(codes, weights, args.orders, args.mean_lines, args.together, seed=1)
+        matrix = AffinityMatrix(top_k=args.top_k)
+        stats = matrix.ingest(history)
+        summary = matrix.stats()
+
+        found = total = 0
+        for idx in range(0, len(codes), 97):
+            base = idx - idx % FAMILY
+            family = {codes[other] for other in range(base, min(base + FAMILY, len(codes))) if other != idx}
+            neighbors = {entry["sku_code"] for entry in matrix.neighbors(codes[idx])}
+            found += len(family & neighbors)
+            total += len(family)
+
+        start = time.perf_counter()
+        layout = affinity_layout(db, matrix=matrix)
+        layout_s = time.perf_counter() - start
+        banded = generate_layout(db)["placements"]
+        db.close()
+        engine.dispose()
+
+    fresh = make_orders(codes, weights, args.orders, args.mean_lines, args.together, seed=2)
+    order_idx, sku_idx, _ = order_lines(fresh, {code: idx for idx, code in enumerate(codes)})
+    gate = gate_point(load_warehouse())
+
+    print("=" * 80)
+    print(
+        f"Ingest: {stats['orders']} orders / {stats['lines']} lines in {stats['elapsed_s']:.2f}s "
+        f"({stats['lines_per_s']:,.0f} lines/s)"
+    )
+    print(
+        f"Stored pairs: {summary['stored_pairs']:,} (bound {summary['max_stored_pairs']:,}, "
+        f"evictions {summary['evictions']:,})"
+    )
+    print(f"Family partners in top-{args.top_k}: {found}/{total} ({100 * found / max(total, 1):.1f}%)")
+    print(
+        f"Affinity layout in {layout_s:.2f}s: adjacent pairs {layout['affinity']['before']['adjacent_pairs']}"
+        f" -> {layout['affinity']['after']['adjacent_pairs']}, repositioned {layout['affinity']['repositioned']}"
+    )
+    print(f"{'layout':<12}{'total km':>12}{'mean m':>10}{'p95 m':>10}")
+    for name, placements in (("banded", banded), ("affinity", layout["placements"])):
+        sku_x, sku_y = layout_coordinates(placements, codes)
+        result = evaluate(order_idx, sku_idx, sku_x, sku_y, gate, len(fresh))
+        print(f"{name:<12}{result['total_m'] / 1000:>12,.1f}{result['mean_m']:>10.1f}{result['p95_m']:>10.1f}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
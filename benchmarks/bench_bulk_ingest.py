@@ -0,0 +1,99 @@
+"""
+Benchmark: per-row POST /api/sku/add versus batched POST /api/sku/bulk.
+
+Runs both paths in-process against throwaway SQLite files, so no server or
+existing database is touched.
+
+    python benchmarks/bench_bulk_ingest.py --rows 5000 --batch 2000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import init_db
+from backend.main import app, get_db
+
+
+def make_rows(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "sku_code": f"BENCH{idx:06d}",
+            "product_name": f"Bench item {idx}",
+            "f": round(rng.random(), 4),
+            "w": round(rng.random(), 4),
+            "s": round(rng.random(), 4),
+            "i": round(rng.random(), 4),
+        }
+        for idx in range(count)
+    ]
+
+
+def fresh_client(tmpdir, name):
+    engine = create_engine(
+        f"sqlite:///{os.path.join(tmpdir, name)}",
+        connect_args={"check_same_thread": False},
+    )
+    init_db(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
+
+
+def run_per_row(client, rows):
+    start = time.perf_counter()
+    for row in rows:
+        response = client.post("/api/sku/add", json=row)
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def run_bulk(client, rows, batch):
+    start = time.perf_counter()
+    for offset in range(0, len(rows), batch):
+        response = client.post(
+            "/api/sku/bulk", json={"items": rows[offset : offset + batch]}
+        )
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        per_row = run_per_row(fresh_client(tmpdir, "per_row.sqlite3"), rows)
+        bulk = run_bulk(fresh_client(tmpdir, "bulk.sqlite3"), rows, args.batch)
+        app.dependency_overrides.clear()
+
+    print("=" * 60)
+    print(f"Rows: {args.rows}, bulk batch size: {args.batch}")
+    print(f"Per-row /api/sku/add : {per_row:8.3f}s  ({args.rows / per_row:10.0f} rows/s)")
+    print(f"Bulk /api/sku/bulk   : {bulk:8.3f}s  ({args.rows / bulk:10.0f} rows/s)")
+    print(f"Speed-up             : {per_row / bulk:8.1f}x")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
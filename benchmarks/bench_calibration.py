@@ -0,0 +1,131 @@
+"""
+Benchmark: zone cut-offs calibrated to zone capacity.
+
+Loads a catalog skewed towards fast movers into a throwaway SQLite file and
+compares zone counts under the fixed cut-offs with a ``capacity`` profile
+(zone capacity from the rack slot grid). Then updates single SKUs the way
+PUT /api/sku/{id} does and times each incremental recalibration (index
+lookups plus re-zoning the SKUs between old and new cut-offs) against a
+full rescan that re-sorts every priority and compares every zone.
+
+    python benchmarks/bench_calibration.py --rows 100000 --updates 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.database import init_db, make_engine
+from backend.services.calibration import CALIBRATOR, cutoffs_for_weights
+from backend.services.live_layout import LIVE_LAYOUT
+from backend.services.priority_calculator import (
+    ZONE_THRESHOLDS,
+    active_formula,
+    calculate_priority,
+    priority_to_zone,
+    priority_to_zone_batch,
+)
+from backend.services.scoring import activate_profile, create_profile, load_active_profile, recompute_profile
+from backend.services.sku_ingest import upsert_skus
+from backend.services.sku_store import SKU_STORE
+
+
+def make_rows(count, seed=7):
+    """Metrics drawn from Beta(3, 1.5): most SKUs score like fast movers."""
+    rng = random.Random(seed)
+    return [
+        {
+            "sku_code": f"BENCH{idx:06d}",
+            "product_name": f"Bench item {idx}",
+            "f": round(rng.betavariate(3, 1.5), 4),
+            "w": round(rng.betavariate(3, 1.5), 4),
+            "s": round(rng.betavariate(3, 1.5), 4),
+            "i": round(rng.betavariate(3, 1.5), 4),
+        }
+        for idx in range(count)
+    ]
+
+
+def full_rescan(db):
+    """The alternative: cut-offs from all priorities, then every zone checked."""
+    formula = active_formula()
+    cutoffs = cutoffs_for_weights(db, formula["weights"])
+    columns = SKU_STORE.columns(db, ("priority",))
+    zones = priority_to_zone_batch(columns["priority"], cutoffs=cutoffs)
+    return int((zones != columns["zone"]).sum())
+
+
+def update_one(db, rng, rows):
+    item = db.query(models.SKUItem).filter(models.SKUItem.sku_code == rng.choice(rows)["sku_code"]).first()
+    item.f, item.w, item.s, item.i = (round(rng.random(), 4) for _ in range(4))
+    item.priority = calculate_priority(item.f, item.w, item.s, item.i)
+    item.zone = priority_to_zone(item.priority)
+    db.commit()
+    db.refresh(item)
+    LIVE_LAYOUT.record_saved(item)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--updates", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    rows = make_rows(args.rows)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = make_engine(f"sqlite:///{os.path.join(tmpdir, 'calibration.sqlite3')}")
+        init_db(engine)
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        load_active_profile(db)
+        upsert_skus(db, [dict(row) for row in rows])
+        SKU_STORE.ensure_loaded(db)
+        fixed_counts = SKU_STORE.zone_counts(None)
+
+        profile = create_profile(db, "capacity", active_formula()["weights"], mode="capacity")
+        activate_profile(db, profile.id)
+        result = recompute_profile(db, profile.id)
+        status = CALIBRATOR.status(db)
+
+        recalibrate_ms, rezoned = [], 0
+        for _ in range(args.updates):
+            update_one(db, rng, rows)
+            start = time.perf_counter()
+            summary = CALIBRATOR.recalibrate(db)
+            recalibrate_ms.append((time.perf_counter() - start) * 1000)
+            rezoned += summary["rezoned"] if summary else 0
+        start = time.perf_counter()
+        mismatched = full_rescan(db)
+        rescan_ms = (time.perf_counter() - start) * 1000
+        db.close()
+        engine.dispose()
+
+    recalibrate_ms = np.array(recalibrate_ms)
+    print("=" * 72)
+    print(f"SKUs: {args.rows}")
+    print(f"fixed cut-offs {[cut for cut, _ in ZONE_THRESHOLDS]}: {fixed_counts}")
+    print(
+        f"capacity cut-offs {status['thresholds']} (activation re-zoned {result['zone_changed']}): "
+        + ", ".join(
+            f"{zone} {info['count']}/{info['target']} (capacity {info['capacity']})"
+            for zone, info in status["zones"].items()
+        )
+    )
+    print(
+        f"{args.updates} single-SKU updates: recalibration p50 {np.percentile(recalibrate_ms, 50):.2f} ms, "
+        f"p99 {np.percentile(recalibrate_ms, 99):.2f} ms, {rezoned} SKUs re-zoned in total"
+    )
+    print(f"full rescan: {rescan_ms:.1f} ms; zones off after incremental updates: {mismatched}")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Benchmark: metric history, incremental trends and the zone-crossing watcher.
+
+Loads a catalog into a throwaway SQLite file, then replays `--days` days of
+SKU updates through the bulk write path, one simulated day at a time.
+`--trending` SKUs drift steadily up or down, `--spiking` SKUs have one
+day at five times their usual pick frequency, and every day `--updates`
+other SKUs get a noisy sample. Reports:
+
+- Ingest cost per sample: updating the trends plus batched history
+  inserts, against inserting and committing samples one at a time.
+- Zone changes of the stored (latest-sample) zone against crossings of the
+  smoothed zone with hysteresis.
+- How many trending SKUs end in the zone their noise-free trend calls for,
+  by stored and by smoothed zone, and how many spikes moved either.
+- Time to list the re-slotting candidates from the trend arrays, against
+  7/30-day means grouped over the history table.
+
+    python benchmarks/bench_metric_history.py --rows 100000 --days 30 --updates 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.database import init_db, make_engine
+from backend.services.live_layout import LIVE_LAYOUT
+from backend.services.metric_history import DAY_S, METRIC_HISTORY
+from backend.services.normalization import METRICS, prepare_metrics
+from backend.services.priority_calculator import calculate_priority_batch, priority_to_zone_batch
+from backend.services.scoring import load_active_profile
+from backend.services.sku_ingest import upsert_skus
+from backend.services.sku_store import SKU_STORE
+
+
+def raw_rows(codes, f, w, s, i):
+    return [
+        prepare_metrics({"sku_code": code, "f": float(fv), "w": float(wv), "s": float(sv), "i": float(iv)})
+        for code, fv, wv, sv, iv in zip(codes, np.round(f, 1), np.round(w, 2), np.round(s, 0), np.round(i, 1))
+    ]
+
+
+def true_zones(f, w, s, i):
+    """Zones of noise-free metrics under the active formula and scale."""
+    rows = raw_rows([""] * len(f), f, w, s, i)
+    priority = calculate_priority_batch(*[[row[metric] for row in rows] for metric in METRICS])
+    return priority_to_zone_batch(priority)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--updates", type=int, default=20000, help="Random SKUs sampled per day")
+    parser.add_argument("--trending", type=int, default=1000)
+    parser.add_argument("--spiking", type=int, default=1000)
+    parser.add_argument("--single", type=int, default=2000, help="Samples inserted one commit at a time")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    codes = [f"BENCH{idx:06d}" for idx in range(args.rows)]
+    base = {
+        "f": rng.lognormal(4.3, 0.6, args.rows),
+        "w": rng.uniform(0.1, 20.0, args.rows),
+        "s": rng.lognormal(9.5, 0.7, args.rows),
+        "i": rng.uniform(0.0, 20.0, args.rows),
+    }
+    special = rng.choice(args.rows, args.trending + args.spiking, replace=False)
+    trending, spiking = special[: args.trending], special[args.trending :]
+    # Trending SKUs end at 3x or 1/3 of their starting pick frequency.
+    growth = np.where(rng.random(args.trending) < 0.5, 3.0, 1 / 3)
+    spike_day = rng.integers(args.days // 2, args.days, args.spiking)
+    start = time.time() - args.days * DAY_S
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = make_engine(f"sqlite:///{os.path.join(tmpdir, 'history.sqlite3')}")
+        init_db(engine)
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        load_active_profile(db)
+        upsert_skus(db, raw_rows(codes, base["f"], base["w"], base["s"], base["i"]))
+        SKU_STORE.ensure_loaded(db)
+        METRIC_HISTORY.ensure_loaded(db)
+
+        record_s, samples, stored_changes, spike_stored, spike_smoothed = 0.0, 0, 0, 0, 0
+        for day in range(args.days):
+            picked = np.unique(np.concatenate([rng.choice(args.rows, args.updates, replace=False), special]))
+            position = {row: index for index, row in enumerate(picked.tolist())}
+            ramp = 1 + (growth - 1) * (day + 1) / args.days
+            f = base["f"][picked].copy()
+            f[[position[row] for row in trending.tolist()]] *= ramp
+            spiked = spiking[spike_day == day].tolist()
+            spike_rows = [position[row] for row in spiked]
+            f *= rng.lognormal(0.0, 0.25, picked.size)
+            f[spike_rows] = base["f"][spiked] * 5
+            rows = raw_rows(
+                [codes[row] for row in picked.tolist()], f, base["w"][picked], base["s"][picked], base["i"][picked]
+            )
+            before = SKU_STORE.zones_of(db, [row["sku_code"] for row in rows])
+            upsert_skus(db, rows)
+            LIVE_LAYOUT.record_bulk_write(db, rows)
+            stored_changes += sum(old != row["zone"] for old, row in zip(before, rows))
+            spike_stored += sum(before[index] != rows[index]["zone"] for index in spike_rows)
+            smoothed_before = [METRIC_HISTORY.trend(db, codes[row])["smoothed_zone"] for row in spiked]
+            started = time.perf_counter()
+            METRIC_HISTORY.record_rows(db, rows, at=start + (day + 1) * DAY_S)
+            record_s += time.perf_counter() - started
+            samples += len(rows)
+            spike_smoothed += sum(
+                old != METRIC_HISTORY.trend(db, codes[row])["smoothed_zone"]
+                for old, row in zip(smoothed_before, spiked)
+            )
+        started = time.perf_counter()
+        METRIC_HISTORY.flush(db)
+        record_s += time.perf_counter() - started
+        history = METRIC_HISTORY.stats()
+
+        table = models.SKUMetricSample.__table__
+        single = [
+            {"sku_code": codes[idx % args.rows], "recorded_at": datetime.utcnow(), "day": 0, "priority": 0.5}
+            for idx in range(args.single)
+        ]
+        started = time.perf_counter()
+        for sample in single:
+            db.execute(insert(table), [sample])
+            db.commit()
+        single_s = time.perf_counter() - started
+
+        trend_codes = [codes[row] for row in trending.tolist()]
+        ended = true_zones(base["f"][trending] * growth, base["w"][trending], base["s"][trending], base["i"][trending])
+        stored = SKU_STORE.zones_of(db, trend_codes)
+        smoothed = [METRIC_HISTORY.trend(db, code)["smoothed_zone"] for code in trend_codes]
+        stored_right = int(sum(zone == want for zone, want in zip(stored, ended)))
+        smoothed_right = int(sum(zone == want for zone, want in zip(smoothed, ended)))
+
+        candidate_ms = []
+        for _ in range(20):
+            started = time.perf_counter()
+            candidates = METRIC_HISTORY.candidates(db, limit=100)
+            candidate_ms.append((time.perf_counter() - started) * 1000)
+        today = int(time.time() // DAY_S)
+        started = time.perf_counter()
+        for days in (7, 30):
+            db.execute(
+                select(table.c.sku_code, func.avg(table.c.priority), func.count())
+                .where(table.c.day > today - days)
+                .group_by(table.c.sku_code)
+            ).all()
+        scan_ms = (time.perf_counter() - started) * 1000
+        history_rows = db.execute(select(func.count()).select_from(table)).scalar()
+        db.close()
+        engine.dispose()
+
+    print("=" * 72)
+    print(f"SKUs: {args.rows}, {args.days} days, {samples} samples ({history_rows} history rows)")
+    print(
+        f"ingest: {record_s / samples * 1e6:.1f} us/sample for trends + batched history "
+        f"({history['flushes']} flushes, {history['mean_flush_ms']:.1f} ms each); one insert+commit per "
+        f"sample {single_s / args.single * 1e6:.1f} us/sample"
+    )
+    print(
+        f"stored zone changes {stored_changes}, smoothed zone crossings {history['crossings']} "
+        f"(hysteresis {history['settings']['hysteresis']}, half-life {history['settings']['halflife_days']} days)"
+    )
+    print(
+        f"{args.trending} trending SKUs in the zone their trend ends in: stored {stored_right}, "
+        f"smoothed {smoothed_right}; {args.spiking} one-day spikes that moved the stored zone "
+        f"{spike_stored}, the smoothed zone {spike_smoothed}"
+    )
+    print(
+        f"re-slotting candidates: {candidates['total']} of {candidates['tracked']} tracked, listed in "
+        f"p50 {np.percentile(candidate_ms, 50):.2f} ms; 7/30-day GROUP BY over the history {scan_ms:.0f} ms"
+    )
+    print(f"trend state memory: {history['memory_bytes'] / 1e6:.1f} MB")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark: server-side normalization with a scale that follows the raw data.
+
+Loads a catalog of raw metrics (log-normal pick frequencies well above the
+old fixed /200 divisor) into a throwaway SQLite file through the bulk path
+and reports how many SKUs saturate at 1.0 under the fixed RAW_METRIC_SCALE
+versus the p99 scale the drift check adopts. Then times the drift check
+after single-SKU updates (a few lookups into the store's sorted raw values)
+against recomputing the quantiles with NumPy over every raw column, and
+finally ingests a batch of much busier SKUs so the distribution drifts:
+one new scale version and a chunked recompute that re-normalizes stored
+rows from their raw values.
+
+    python benchmarks/bench_normalization.py --rows 100000 --updates 500
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.database import init_db, make_engine
+from backend.services.live_layout import LIVE_LAYOUT
+from backend.services.metric_scaling import SCALE_QUANTILE, check_drift, load_active_scale
+from backend.services.normalization import METRICS, RAW_METRIC_SCALE, metric_scale, prepare_metrics
+from backend.services.priority_calculator import calculate_priority, priority_to_zone
+from backend.services.scoring import active_profile, load_active_profile, recompute_profile
+from backend.services.sku_ingest import upsert_skus
+from backend.services.sku_store import SKU_STORE
+
+
+def raw_row(rng, code, busy=1.0):
+    return {
+        "sku_code": code,
+        "product_name": f"Bench item {code}",
+        "f": round(rng.lognormvariate(5.0, 0.8) * busy, 1),
+        "w": round(rng.uniform(0.1, 25.0), 2),
+        "s": round(rng.lognormvariate(9.5, 0.9), 0),
+        "i": round(rng.uniform(0.0, 20.0), 1),
+    }
+
+
+def saturated(scale):
+    """Share of stored SKUs per metric whose raw value is at or above `scale`."""
+    columns = SKU_STORE.columns(None, tuple(f"raw_{metric}" for metric in METRICS))
+    return {
+        metric: round(100.0 * float((columns[f"raw_{metric}"] >= scale[metric]).mean()), 1)
+        for metric in METRICS
+    }
+
+
+def full_quantiles():
+    """The alternative: quantiles recomputed from every raw value."""
+    columns = SKU_STORE.columns(None, tuple(f"raw_{metric}" for metric in METRICS))
+    return {metric: float(np.quantile(columns[f"raw_{metric}"], SCALE_QUANTILE)) for metric in METRICS}
+
+
+def update_one(db, rng, count):
+    code = f"BENCH{rng.randrange(count):06d}"
+    item = db.query(models.SKUItem).filter(models.SKUItem.sku_code == code).first()
+    for name, value in prepare_metrics(raw_row(rng, code)).items():
+        setattr(item, name, value)
+    item.priority = calculate_priority(item.f, item.w, item.s, item.i)
+    item.zone = priority_to_zone(item.priority)
+    db.commit()
+    db.refresh(item)
+    LIVE_LAYOUT.record_saved(item)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--busy", type=int, default=20000, help="SKUs ingested with 3x the pick frequency")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = make_engine(f"sqlite:///{os.path.join(tmpdir, 'normalization.sqlite3')}")
+        init_db(engine)
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        load_active_profile(db)
+        load_active_scale(db)
+        rows = [prepare_metrics(raw_row(rng, f"BENCH{idx:06d}")) for idx in range(args.rows)]
+        upsert_skus(db, rows)
+        SKU_STORE.ensure_loaded(db)
+        fixed = saturated(RAW_METRIC_SCALE)
+        adopted = check_drift(db)
+        recompute = recompute_profile(db, active_profile(db).id)
+        adaptive = saturated(metric_scale())
+
+        check_ms, full_ms = [], []
+        for _ in range(args.updates):
+            update_one(db, rng, args.rows)
+            start = time.perf_counter()
+            check_drift(db)
+            check_ms.append((time.perf_counter() - start) * 1000)
+        for _ in range(20):
+            start = time.perf_counter()
+            full_quantiles()
+            full_ms.append((time.perf_counter() - start) * 1000)
+
+        busy = [prepare_metrics(raw_row(rng, f"BUSY{idx:06d}", busy=3.0)) for idx in range(args.busy)]
+        upsert_skus(db, busy)
+        LIVE_LAYOUT.record_bulk_write(db, busy)
+        start = time.perf_counter()
+        drifted = check_drift(db)
+        drift_ms = (time.perf_counter() - start) * 1000
+        renormalize = recompute_profile(db, active_profile(db).id)
+        store = SKU_STORE.stats()
+        db.close()
+        engine.dispose()
+
+    check_ms, full_ms = np.array(check_ms), np.array(full_ms)
+    print("=" * 72)
+    print(f"SKUs: {args.rows}, scale quantile p{SCALE_QUANTILE * 100:g}")
+    print(f"fixed scale {RAW_METRIC_SCALE}: % of SKUs saturated at 1.0 {fixed}")
+    print(
+        f"adopted scale v{adopted['version']} {adopted['scale']}: saturated {adaptive}; "
+        f"recompute {recompute['renormalized']} rows re-normalized in {recompute['elapsed_ms'] / 1000:.2f}s"
+    )
+    print(
+        f"drift check after {args.updates} updates: p50 {np.percentile(check_ms, 50):.3f} ms, "
+        f"p99 {np.percentile(check_ms, 99):.3f} ms; NumPy quantiles over all rows p50 "
+        f"{np.percentile(full_ms, 50):.2f} ms"
+    )
+    print(
+        f"{args.busy} busier SKUs: drift check {drift_ms:.2f} ms adopted "
+        f"v{drifted['version'] if drifted else '-'} {drifted['scale'] if drifted else ''}; "
+        f"recompute {renormalize['processed']} rows, {renormalize['renormalized']} re-normalized, "
+        f"{renormalize['zone_changed']} zone changes in {renormalize['elapsed_ms'] / 1000:.2f}s"
+    )
+    print(f"store index memory (priority index + raw statistics): {store['memory']['index_bytes'] / 1e6:.1f} MB")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
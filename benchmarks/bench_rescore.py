@@ -0,0 +1,199 @@
+"""
+Benchmark: re-scoring stored SKUs when a scoring profile is activated.
+
+Loads a synthetic catalog into a throwaway SQLite file (WAL, as configured
+by backend.database) and activates profiles that move few and many SKUs
+across zones. For each, times the chunked recompute and reports rows
+processed, rewritten and only stamped. Meanwhile reader threads page through
+SKUs by zone (GET /api/sku/list's database query) and a writer updates one
+SKU every 20 ms, one commit each (PUT /api/sku/{id}'s write). Their p50/p99
+and worst latency during the recompute are compared with an idle database
+and with one transaction that rewrites every row, which holds the write lock
+until it commits; writes that give up on the lock ("database is locked")
+are counted as errors.
+
+    python benchmarks/bench_rescore.py --rows 100000 --readers 2
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy import bindparam, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.database import init_db, make_engine
+from backend.services.priority_calculator import calculate_priority_batch, priority_to_zone_batch
+from backend.services.scoring import activate_profile, create_profile, load_active_profile, recompute_profile
+from backend.services.sku_ingest import upsert_skus
+from backend.services.sku_query import list_sku_rows
+from backend.services.sku_store import SKU_STORE
+
+
+def make_rows(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "sku_code": f"BENCH{idx:06d}",
+            "product_name": f"Bench item {idx}",
+            "f": round(rng.random(), 4),
+            "w": round(rng.random(), 4),
+            "s": round(rng.random(), 4),
+            "i": round(rng.random(), 4),
+        }
+        for idx in range(count)
+    ]
+
+
+class Traffic:
+    """Reader threads paging 100 SKUs of a random zone and one writer
+    updating a random SKU, until stopped."""
+
+    def __init__(self, session_factory, readers, rows):
+        self._session_factory = session_factory
+        self._readers = readers
+        self._rows = rows
+        self._stop = threading.Event()
+        self._latencies = {"read": [], "write": []}
+        self._errors = 0
+        self._lock = threading.Lock()
+
+    def _record(self, kind, seconds):
+        with self._lock:
+            self._latencies[kind].append(seconds * 1000)
+
+    def _read(self, seed):
+        rng = random.Random(seed)
+        with self._session_factory() as db:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                list_sku_rows(db, limit=100, zones=[rng.choice("ABCD")])
+                db.rollback()
+                self._record("read", time.perf_counter() - start)
+
+    def _write(self):
+        rng = random.Random(3)
+        table = models.SKUItem.__table__
+        with self._session_factory() as db:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                try:
+                    db.execute(
+                        update(table)
+                        .where(table.c.sku_code == f"BENCH{rng.randrange(self._rows):06d}")
+                        .values(product_name=f"Renamed {rng.random():.6f}")
+                    )
+                    db.commit()
+                except OperationalError:
+                    db.rollback()
+                    with self._lock:
+                        self._errors += 1
+                self._record("write", time.perf_counter() - start)
+                time.sleep(0.02)
+
+    def measure(self, work):
+        self._latencies = {"read": [], "write": []}
+        self._errors = 0
+        self._stop.clear()
+        threads = [threading.Thread(target=self._read, args=(n,)) for n in range(self._readers)]
+        threads.append(threading.Thread(target=self._write))
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        start = time.perf_counter()
+        result = work()
+        elapsed = time.perf_counter() - start
+        self._stop.set()
+        for thread in threads:
+            thread.join()
+        latencies = {kind: np.array(values) for kind, values in self._latencies.items()}
+        return result, elapsed, latencies, self._errors
+
+
+def describe(latencies, errors):
+    return "; ".join(
+        f"{kind}s {values.size}, p50 {np.percentile(values, 50):.2f} ms, "
+        f"p99 {np.percentile(values, 99):.2f} ms, max {values.max():.1f} ms"
+        for kind, values in latencies.items()
+    ) + f"; write errors {errors}"
+
+
+def rewrite_all(session_factory, weights, thresholds):
+    """The naive alternative: every row rewritten in one transaction."""
+    with session_factory() as db:
+        columns = SKU_STORE.columns(db, ("id", "f", "w", "s", "i"))
+        priority = calculate_priority_batch(columns["f"], columns["w"], columns["s"], columns["i"], weights=weights)
+        zones = priority_to_zone_batch(priority, cutoffs=thresholds)
+        table = models.SKUItem.__table__
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("row_id"))
+            .values(priority=bindparam("new_priority"), zone=bindparam("new_zone")),
+            [
+                {"row_id": row_id, "new_priority": pr, "new_zone": zone}
+                for row_id, pr, zone in zip(columns["id"].tolist(), priority.tolist(), zones.tolist())
+            ],
+        )
+        db.commit()
+        return int(priority.size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--readers", type=int, default=2)
+    args = parser.parse_args()
+
+    profiles = [
+        ("cut-offs nudged", [0.38, 0.24, 0.20, 0.18], [0.71, 0.5, 0.3]),
+        ("frequency heavy", [0.6, 0.2, 0.1, 0.1], [0.6, 0.4, 0.2]),
+    ]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = make_engine(f"sqlite:///{os.path.join(tmpdir, 'rescore.sqlite3')}")
+        init_db(engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with session_factory() as db:
+            load_active_profile(db)
+            upsert_skus(db, make_rows(args.rows))
+            SKU_STORE.ensure_loaded(db)
+        traffic = Traffic(session_factory, args.readers, args.rows)
+
+        _, _, *idle = traffic.measure(lambda: time.sleep(2.0))
+        print("=" * 72)
+        print(f"SKUs: {args.rows}, readers: {args.readers}")
+        print(f"idle: {describe(*idle)}")
+        for name, weights, thresholds in profiles:
+            with session_factory() as db:
+                profile = create_profile(db, name, weights, thresholds)
+                activate_profile(db, profile.id)
+
+                def work():
+                    return recompute_profile(db, profile.id)
+
+                result, elapsed, *latencies = traffic.measure(work)
+            print(
+                f"{name}: {elapsed:.2f}s, {result['processed']} rows, "
+                f"{result['zone_changed']} zone changes, "
+                f"{result['rewritten']} rewritten, "
+                f"{result['stamped_only']} stamped only"
+            )
+            print(f"  during recompute: {describe(*latencies)}")
+
+        weights, thresholds = profiles[-1][1], profiles[-1][2]
+        count, elapsed, *latencies = traffic.measure(lambda: rewrite_all(session_factory, weights, thresholds))
+        print(f"one-transaction rewrite of {count} rows: {elapsed:.2f}s")
+        print(f"  during rewrite: {describe(*latencies)}")
+        print("=" * 72)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
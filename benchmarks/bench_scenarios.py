@@ -0,0 +1,120 @@
+"""
+Benchmark: what-if scenario scoring (POST /api/scenarios/evaluate's path).
+
+Loads a synthetic catalog into a throwaway SQLite file and scores a grid of
+weight vectors x cut-off triples against every SKU in one chunked matrix
+pass. For comparison, a sample of the scenarios is re-scored one at a time
+with the existing batch helpers (`calculate_priority_batch` +
+`priority_to_zone_batch`) and the per-scenario time extrapolated to the
+whole grid; the zone counts of both paths are checked to agree. Then times
+the travel simulation for a handful of scenarios.
+
+    python benchmarks/bench_scenarios.py --rows 100000 --scenarios 1000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import init_db, make_engine
+from backend.services.priority_calculator import calculate_priority_batch, priority_to_zone_batch
+from backend.services.scenarios import evaluate_scenarios
+from backend.services.sku_ingest import upsert_skus
+from backend.services.sku_query import sku_columns
+
+
+def make_rows(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "sku_code": f"BENCH{idx:06d}",
+            "product_name": f"Bench item {idx}",
+            "f": round(rng.random(), 4),
+            "w": round(rng.random(), 4),
+            "s": round(rng.random(), 4),
+            "i": round(rng.random(), 4),
+        }
+        for idx in range(count)
+    ]
+
+
+def make_grid(count, seed=11):
+    """About `count` scenarios: random weight vectors x a few cut-off triples."""
+    rng = np.random.default_rng(seed)
+    thresholds = [[0.7, 0.5, 0.3], [0.65, 0.45, 0.25], [0.6, 0.4, 0.2], [0.75, 0.55, 0.35]]
+    weights = rng.dirichlet(np.ones(4), size=max(1, count // len(thresholds)))
+    return {"weights": np.round(weights, 4).tolist(), "thresholds": thresholds}
+
+
+def loop_counts(columns, scenario):
+    """One scenario scored with the existing batch helpers."""
+    priorities = calculate_priority_batch(
+        columns["f"], columns["w"], columns["s"], columns["i"], weights=scenario["weights"]
+    )
+    zones = priority_to_zone_batch(priorities, cutoffs=scenario["thresholds"])
+    return {label: int((zones == label).sum()) for label in "ABCD"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--scenarios", type=int, default=1000)
+    parser.add_argument("--loop-sample", type=int, default=20, help="scenarios re-scored one at a time")
+    parser.add_argument("--travel", type=int, default=10, help="scenarios with simulated travel")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = make_engine(f"sqlite:///{os.path.join(tmpdir, 'scenarios.sqlite3')}")
+        init_db(engine)
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        upsert_skus(db, make_rows(args.rows))
+        grid = make_grid(args.scenarios)
+        evaluate_scenarios(db, grid={"weights": grid["weights"][:1], "thresholds": [[0.7, 0.5, 0.3]]})
+
+        start = time.perf_counter()
+        result = evaluate_scenarios(db, grid=grid)
+        vectorized_s = time.perf_counter() - start
+
+        columns = sku_columns(db, ("f", "w", "s", "i"))
+        sample = result["results"][: args.loop_sample]
+        start = time.perf_counter()
+        looped = [loop_counts(columns, scenario) for scenario in sample]
+        loop_s = (time.perf_counter() - start) / len(sample) * result["scenarios"]
+        assert looped == [scenario["zone_counts"] for scenario in sample]
+
+        start = time.perf_counter()
+        travel = evaluate_scenarios(
+            db,
+            scenarios=[
+                {"weights": weights, "thresholds": [0.7, 0.5, 0.3]}
+                for weights in grid["weights"][: args.travel]
+            ],
+            travel=True,
+        )
+        travel_s = time.perf_counter() - start
+        db.close()
+        engine.dispose()
+
+    changed = np.array([scenario["changed"] for scenario in result["results"]])
+    best = min(travel["results"], key=lambda scenario: scenario["travel"]["total_m"])
+    print("=" * 72)
+    print(f"SKUs: {result['skus']}, scenarios: {result['scenarios']}")
+    print(f"vectorized pass: {vectorized_s:.2f}s (scoring {result['scoring_ms'] / 1000:.2f}s)")
+    print(f"one scenario at a time (extrapolated from {len(sample)}): {loop_s:.2f}s")
+    print(f"SKUs changing zone: min {changed.min()}, median {int(np.median(changed))}, max {changed.max()}")
+    print(
+        f"travel for {len(travel['results'])} scenarios + baseline, {travel['orders']} orders: "
+        f"{travel_s:.2f}s; best {best['name']} {best['travel_vs_baseline_pct']:+.1f}% vs stored layout"
+    )
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Benchmark: SKU reads from the in-memory columnar store versus the database.
+
+Loads a synthetic catalog into a throwaway SQLite file and reports the
+store's load time and memory per 100k SKUs, then times the hot reads both
+ways: a filtered list page, the full list, the columnar read the planners
+use, `generate_layout`, and the priority index queries (top-K, a SKU's
+rank, per-zone quantiles) against the SQL or full-scan equivalent. Finally
+times write-through for single saves and a bulk upsert.
+
+    python benchmarks/bench_sku_store.py --rows 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.database import init_db, make_engine
+from backend.services.layout_builder import generate_layout
+from backend.services.sku_ingest import upsert_skus
+from backend.services.sku_query import list_sku_rows, sku_columns
+from backend.services.sku_store import SKUStore
+
+
+def make_rows(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "sku_code": f"BENCH{idx:06d}",
+            "product_name": f"Bench item {idx}",
+            "f": round(rng.random(), 4),
+            "w": round(rng.random(), 4),
+            "s": round(rng.random(), 4),
+            "i": round(rng.random(), 4),
+        }
+        for idx in range(count)
+    ]
+
+
+def best_ms(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = make_engine(f"sqlite:///{os.path.join(tmpdir, 'store.sqlite3')}")
+        init_db(engine)
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        rows = make_rows(args.rows)
+        upsert_skus(db, [dict(row) for row in rows])
+
+        # A private store, so the timings do not depend on the process-wide one.
+        store = SKUStore()
+        store.ensure_loaded(db)
+        stats = store.stats()
+        memory = stats["memory"]
+
+        # generate_layout reads the process-wide store; time it cold (loads
+        # from the database) and warm.
+        from backend.services.sku_store import SKU_STORE
+
+        def layout_cold():
+            SKU_STORE.invalidate()
+            generate_layout(db)
+
+        table = models.SKUItem.__table__
+        probe = rows[len(rows) // 2]["sku_code"]
+        quantiles = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+        def sql_rank():
+            priority, item_id = db.execute(
+                select(table.c.priority, table.c.id).where(table.c.sku_code == probe)
+            ).one()
+            return db.execute(
+                select(func.count()).where(
+                    or_(table.c.priority > priority, and_(table.c.priority == priority, table.c.id <= item_id))
+                )
+            ).scalar()
+
+        def scan_quantiles():
+            columns = sku_columns(db, ("priority",))
+            return {
+                zone: np.quantile(columns["priority"][columns["zone"] == zone], quantiles)
+                for zone in np.unique(columns["zone"])
+            }
+
+        reads = [
+            (
+                "list page (zone B, 100)",
+                lambda: list_sku_rows(db, limit=100, zones=["B"]),
+                lambda: store.list_rows(db, limit=100, zones=["B"]),
+            ),
+            ("list all", lambda: list_sku_rows(db), lambda: store.list_rows(db)),
+            (
+                "columns (priority,f,w,s,i)",
+                lambda: sku_columns(db),
+                lambda: store.columns(db),
+            ),
+            ("generate_layout", layout_cold, lambda: generate_layout(db)),
+            ("top 100", lambda: list_sku_rows(db, limit=100), lambda: store.top(db, 100)),
+            ("rank of one SKU", sql_rank, lambda: store.rank(db, probe)),
+            ("per-zone quantiles", scan_quantiles, lambda: store.quantiles(db, quantiles)),
+        ]
+        results = [
+            (name, best_ms(from_db, args.repeat), best_ms(from_store, args.repeat))
+            for name, from_db, from_store in reads
+        ]
+        # Sanity: both paths return the same rows.
+        assert store.list_rows(db, limit=100, zones=["B"]) == list_sku_rows(db, limit=100, zones=["B"])
+        assert store.rank(db, probe)["rank"] == sql_rank()
+
+        rng = random.Random(3)
+        items = db.query(models.SKUItem).limit(200).all()
+
+        def saves():
+            for item in items:
+                item.f = round(rng.random(), 4)
+                item.priority = round(rng.random(), 4)
+                store.record_saved(item)
+
+        save_ms = best_ms(saves, args.repeat) / len(items)
+        batch = [dict(rows[rng.randrange(len(rows))], f=round(rng.random(), 4)) for _ in range(1000)]
+        upsert_skus(db, batch)
+        bulk_ms = best_ms(lambda: store.record_rows(db, batch), args.repeat)
+        db.close()
+        engine.dispose()
+
+    print("=" * 72)
+    print(f"SKUs: {args.rows}, zones: {', '.join(stats['zones'])}")
+    print(f"store load: {stats['last_load_ms']:.0f} ms")
+    print(
+        f"memory: {memory['total_bytes'] / 1e6:.1f} MB total "
+        f"({memory['array_bytes'] / 1e6:.1f} MB arrays, {memory['object_bytes'] / 1e6:.1f} MB strings/lookups, "
+        f"{memory['index_bytes'] / 1e6:.1f} MB priority index), "
+        f"{memory['bytes_per_100k_skus'] / 1e6:.1f} MB per 100k SKUs"
+    )
+    print(f"{'read':<30}{'database ms':>14}{'store ms':>12}{'speedup':>10}")
+    for name, db_ms, store_ms in results:
+        print(f"{name:<30}{db_ms:>14.2f}{store_ms:>12.2f}{db_ms / max(store_ms, 1e-9):>9.1f}x")
+    print(f"write-through: {save_ms * 1000:.1f} us per saved SKU, {bulk_ms:.2f} ms per 1000-row bulk")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
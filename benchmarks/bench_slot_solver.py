@@ -0,0 +1,83 @@
+"""
+Benchmark: banded `generate_layout` versus the gate-distance slot solver.
+
+Loads a synthetic catalog into a throwaway SQLite file and reports run time
+and the travel objective sum(f * rectilinear metres to the gate) for the
+banded heuristic and both solver modes.
+
+    python benchmarks/bench_slot_solver.py --rows 50000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import init_db
+from backend.services.layout_builder import generate_layout
+from backend.services.sku_ingest import upsert_skus
+from backend.services.slot_solver import solve_layout
+
+
+def make_rows(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "sku_code": f"BENCH{idx:06d}",
+            "product_name": f"Bench item {idx}",
+            "f": round(rng.random(), 4),
+            "w": round(rng.random(), 4),
+            "s": round(rng.random(), 4),
+            "i": round(rng.random(), 4),
+        }
+        for idx in range(count)
+    ]
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmpdir, 'solver.sqlite3')}",
+            connect_args={"check_same_thread": False},
+        )
+        init_db(engine)
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        upsert_skus(db, make_rows(args.rows))
+
+        _, banded_s = timed(generate_layout, db)
+        zone, zone_s = timed(solve_layout, db, "zone")
+        global_, global_s = timed(solve_layout, db, "global")
+        db.close()
+        engine.dispose()
+
+    print("=" * 72)
+    print(f"SKUs: {args.rows}")
+    print(f"{'layout':<22}{'time':>10}{'objective':>18}{'vs banded':>14}")
+    print(f"{'banded heuristic':<22}{banded_s:>9.3f}s{zone['objective']['banded']:>18,.1f}{'':>14}")
+    for name, result, seconds in (("solver (zone)", zone, zone_s), ("solver (global)", global_, global_s)):
+        objective = result["objective"]
+        print(
+            f"{name:<22}{seconds:>9.3f}s{objective['solver']:>18,.1f}"
+            f"{-objective['improvement_pct']:>13.1f}%"
+        )
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: picker travel for the banded, optimize and solver layouts.
+
+Loads a synthetic catalog into a throwaway SQLite file, builds each layout,
+and evaluates all of them against the same synthetic order stream (SKUs
+drawn by pick frequency f) with the aisle-aware travel model.
+
+    python benchmarks/bench_travel.py --rows 20000 --orders 333000
+
+The optimize layout uses engine=ai, which falls back to the local rule
+engine when no OpenAI key is configured; the engine used is printed.
+Layouts are compared on the order lines every one of them placed; lines on
+SKUs a layout could not place (rack slot overflow) are counted under
+"unplaced", and the header says when that leaves part of the stream out.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import init_db
+from backend.services.layout_builder import generate_layout, load_warehouse
+from backend.services.optimizer import build_plan
+from backend.services.rack_model import slot_layout
+from backend.services.sku_ingest import upsert_skus
+from backend.services.sku_query import sku_columns
+from backend.services.slot_solver import gate_point, solve_layout
+from backend.services.travel_sim import evaluate, generate_orders, layout_coordinates, placed_lines
+
+
+def make_rows(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "sku_code": f"BENCH{idx:06d}",
+            "product_name": f"Bench item {idx}",
+            "f": round(rng.random(), 4),
+            "w": round(rng.random(), 4),
+            "s": round(rng.random(), 4),
+            "i": round(rng.random(), 4),
+        }
+        for idx in range(count)
+    ]
+
+
+def optimized_layout(db):
+    items = sku_columns(db)
+    payload = [
+        {
+            "sku_code": code,
+            "zone": zone,
+            **{name: float(items[name][idx]) for name in ("priority", "f", "w", "s", "i")},
+        }
+        for idx, (code, zone) in enumerate(zip(items["sku_code"], items["zone"].tolist()))
+    ]
+    result = build_plan(payload, engine="ai")
+    overrides = {entry["sku_code"]: entry["recommended_zone"] for entry in result["plan"]["reassignments"]}
+    return generate_layout(db, zone_overrides=overrides)["placements"], result["engine_used"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--orders", type=int, default=333000)
+    parser.add_argument("--mean-lines", type=float, default=3.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmpdir, 'travel.sqlite3')}",
+            connect_args={"check_same_thread": False},
+        )
+        init_db(engine)
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        upsert_skus(db, make_rows(args.rows))
+
+        codes = sku_columns(db, ("f",))
+        optimized, engine_used = optimized_layout(db)
+        layouts = {
+            "banded": generate_layout(db)["placements"],
+            f"optimize ({engine_used})": optimized,
+            "solver (zone)": solve_layout(db, "zone")["placements"],
+            "solver (global)": solve_layout(db, "global")["placements"],
+            "rack slots": slot_layout(db)["placements"],
+        }
+        db.close()
+        engine.dispose()
+
+    start = time.perf_counter()
+    order_idx, sku_idx = generate_orders(codes["f"], args.orders, args.mean_lines)
+    generate_s = time.perf_counter() - start
+    gate = gate_point(load_warehouse())
+    coordinates = {name: layout_coordinates(placements, codes["sku_code"]) for name, placements in layouts.items()}
+    common = placed_lines(sku_idx, *[sku_x for sku_x, _ in coordinates.values()])
+
+    print("=" * 90)
+    print(f"SKUs: {args.rows}, orders: {args.orders}, lines: {order_idx.size} (generated in {generate_s:.2f}s)")
+    if common.sum() < order_idx.size:
+        print(f"Compared on the {common.sum()} lines every layout placed")
+    print(f"{'layout':<22}{'eval time':>11}{'total km':>12}{'mean m':>10}{'p95 m':>10}{'vs banded':>12}{'unplaced':>12}")
+    baseline = None
+    for name, (sku_x, sku_y) in coordinates.items():
+        start = time.perf_counter()
+        stats = evaluate(order_idx, sku_idx, sku_x, sku_y, gate, args.orders, lines=common)
+        seconds = time.perf_counter() - start
+        baseline = baseline or stats["total_m"]
+        change = 100 * (stats["total_m"] - baseline) / baseline
+        print(
+            f"{name:<22}{seconds:>10.3f}s{stats['total_m'] / 1000:>12,.1f}"
+            f"{stats['mean_m']:>10.1f}{stats['p95_m']:>10.1f}{change:>11.1f}%"
+            f"{stats['missing_lines']:>12}"
+        )
+    print("=" * 90)
+
+
+if __name__ == "__main__":
+    main()
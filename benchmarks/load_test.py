@@ -0,0 +1,220 @@
+"""
+Load test: read endpoints while optimize calls are in flight.
+
+Seeds a throwaway SQLite database, starts the API under uvicorn (one
+worker) against it, and points the OpenAI client at a local stand-in that
+answers every chat completion after `--ai-latency` seconds. Reader tasks
+loop over GET /api/sku/list and GET /api/sku/visualize; the test runs once
+without optimize traffic and once with `--optimizers` concurrent
+POST /api/sku/optimize loops, and reports requests/s and p50/p99 latency
+per endpoint for both phases.
+
+    python benchmarks/load_test.py --rows 5000 --readers 32 --optimizers 8 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import httpx
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import init_db
+from backend.services.sku_ingest import upsert_skus
+
+
+def make_rows(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "sku_code": f"BENCH{idx:06d}",
+            "product_name": f"Bench item {idx}",
+            "f": round(rng.random(), 4),
+            "w": round(rng.random(), 4),
+            "s": round(rng.random(), 4),
+            "i": round(rng.random(), 4),
+        }
+        for idx in range(count)
+    ]
+
+
+def fake_ai_server(latency):
+    """Chat-completions stand-in that sleeps `latency` seconds per call."""
+    body = json.dumps(
+        {
+            "id": "bench",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "bench",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {
+                        "role": "assistant",
+                        "content": json.dumps({"summary": "No changes.", "reassignments": []}),
+                    },
+                }
+            ],
+        }
+    ).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("content-length", 0)))
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_api(database_url, port, ai_url):
+    env = dict(
+        os.environ,
+        PYTHONPATH=ROOT,
+        DATABASE_URL=database_url,
+        OPENAI_API_KEY="bench",
+        OPENAI_BASE_URL=ai_url,
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("API did not start")
+
+
+async def run_phase(base_url, readers, optimizers, duration):
+    latencies = {"list": [], "visualize": [], "optimize": []}
+    errors = {name: 0 for name in latencies}
+    # Readers stop at `stop`; optimize loops finish their last call, so
+    # each endpoint's rate is over its own busy window.
+    windows = {name: 0.0 for name in latencies}
+    started = time.monotonic()
+    stop = started + duration
+
+    async def timed(client, name, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            response.raise_for_status()
+        except httpx.HTTPError:
+            errors[name] += 1
+            return
+        latencies[name].append(time.perf_counter() - start)
+        windows[name] = time.monotonic() - started
+
+    async def reader(client, number):
+        rng = random.Random(number)
+        while time.monotonic() < stop:
+            if rng.random() < 0.5:
+                await timed(client, "list", "GET", f"/api/sku/list?limit=100&zone={rng.choice('ABC')}")
+            else:
+                await timed(client, "visualize", "GET", "/api/sku/visualize")
+
+    async def optimizer(client, number):
+        call = 0
+        while time.monotonic() < stop:
+            call += 1
+            # Distinct instructions so every call misses the plan cache.
+            body = {"instructions": f"load test {number}-{call}", "engine": "ai"}
+            await timed(client, "optimize", "POST", "/api/sku/optimize", json=body)
+
+    limits = httpx.Limits(max_connections=readers + optimizers + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        await asyncio.gather(
+            *(reader(client, n) for n in range(readers)),
+            *(optimizer(client, n) for n in range(optimizers)),
+        )
+    return latencies, errors, windows
+
+
+def report(title, latencies, errors, windows):
+    print(title)
+    print(f"  {'endpoint':<12}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, values in latencies.items():
+        if not values and not errors[name]:
+            continue
+        ms = np.array(values) * 1000 if values else np.zeros(1)
+        print(
+            f"  {name:<12}{len(values):>10}{len(values) / max(windows[name], 1e-9):>10.1f}"
+            f"{np.percentile(ms, 50):>10.1f}{np.percentile(ms, 99):>10.1f}{errors[name]:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--readers", type=int, default=32)
+    parser.add_argument("--optimizers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--ai-latency", type=float, default=0.5, help="seconds per simulated model call")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    ai = fake_ai_server(args.ai_latency)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        database_url = f"sqlite:///{os.path.join(tmpdir, 'backend_db.sqlite3')}"
+        engine = create_engine(database_url, connect_args={"check_same_thread": False})
+        init_db(engine)
+        with sessionmaker(bind=engine)() as db:
+            upsert_skus(db, make_rows(args.rows))
+        engine.dispose()
+
+        api = start_api(database_url, args.port, f"http://127.0.0.1:{ai.server_address[1]}/v1")
+        base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            # Warm the layout cache so the first phase does not time a rebuild.
+            httpx.get(f"{base_url}/api/sku/visualize", timeout=120).raise_for_status()
+            print("=" * 80)
+            print(
+                f"{args.rows} SKUs, {args.readers} readers, simulated model latency "
+                f"{args.ai_latency:.2f}s"
+            )
+            report("Readers only", *asyncio.run(run_phase(base_url, args.readers, 0, args.duration)))
+            report(
+                f"Readers + {args.optimizers} concurrent optimize calls",
+                *asyncio.run(run_phase(base_url, args.readers, args.optimizers, args.duration)),
+            )
+            print("=" * 80)
+        finally:
+            api.terminate()
+            api.wait(timeout=10)
+            ai.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,48 @@ const API_BASE =
   import.meta.env.VITE_API_BASE_URL ||
   "https://smart-warehouse-aagw.onrender.com/api";
 
+// Last /sku/visualize response and its ETag; the server answers 304 while unchanged.
+let visualizeCache = { etag: null, data: null };
+
+async function fetchLayout() {
+  const res = await axios.get(`${API_BASE}/sku/visualize`, {
+    headers: visualizeCache.etag ? { "If-None-Match": visualizeCache.etag } : {},
+    validateStatus: (status) =>
+      (status >= 200 && status < 300) || status === 304,
+  });
+  if (res.status === 304 && visualizeCache.data) {
+    return visualizeCache.data;
+  }
+  visualizeCache = { etag: res.headers.etag ?? null, data: res.data };
+  return res.data;
+}
+
+// Submit an optimize job and follow its progress over server-sent events;
+// resolves with the stored result once the job succeeds.
+async function runOptimizeJob(body, onProgress) {
+  const { data: job } = await axios.post(`${API_BASE}/jobs/optimize`, body);
+  await new Promise((resolve, reject) => {
+    const source = new EventSource(`${API_BASE}/jobs/${job.id}/events`);
+    source.addEventListener("progress", (event) => onProgress(JSON.parse(event.data)));
+    source.addEventListener("status", (event) => {
+      const status = JSON.parse(event.data);
+      if (status.status === "succeeded") {
+        source.close();
+        resolve();
+      } else if (status.status === "failed") {
+        source.close();
+        reject(new Error(status.error || "Optimization job failed"));
+      }
+    });
+    source.onerror = () => {
+      source.close();
+      reject(new Error("Lost the job progress stream"));
+    };
+  });
+  const { data } = await axios.get(`${API_BASE}/jobs/${job.id}/result`);
+  return data;
+}
+
 export default function AppNew() {
   const [sku, setSku] = useState({
     sku_code: "",
@@ -78,40 +120,23 @@ export default function AppNew() {
     }
   }
 
-  function normalizeInputs(raw) {
-    // raw values can be either already normalized (0-1) or large integers.
-    // Rules: F -> /200, W -> /20, I -> /20, S -> /50000
-    const safe = (v) => {
-      const n = Number(v);
-      return Number.isFinite(n) ? n : 0;
-    };
-
-    const rf = safe(raw.f);
-    const rw = safe(raw.w);
-    const rs = safe(raw.s);
-    const ri = safe(raw.i);
-
-    // Always normalize to 0-1 scale based on max values
-    const f = Math.min(1, rf / 200);
-    const w = Math.min(1, rw / 20);
-    const i = Math.min(1, ri / 20);
-    const s = Math.min(1, rs / 50000);
-
-    return { f, w, s, i };
-  }
-
   async function handleAdd(e) {
     e.preventDefault();
     setIsAdding(true);
     try {
-      const normalized = normalizeInputs(sku);
+      // Raw metrics; the API normalizes them against the catalog.
+      const metric = (value) => {
+        const num = Number(value);
+        return Number.isFinite(num) ? num : 0;
+      };
       const payload = {
         sku_code: sku.sku_code,
         product_name: sku.product_name,
-        f: normalized.f,
-        w: normalized.w,
-        s: normalized.s,
-        i: normalized.i,
+        f: metric(sku.f),
+        w: metric(sku.w),
+        s: metric(sku.s),
+        i: metric(sku.i),
+        normalized: false,
       };
       await axios.post(`${API_BASE}/sku/add`, payload);
       setSku({ sku_code: "", product_name: "", f: 0, w: 0, s: 0, i: 0 });
@@ -145,11 +170,11 @@ export default function AppNew() {
     setAiInsight(null);
     try {
       // First, call visualize to get basic layout with priority-based placement
-      const res = await axios.get(`${API_BASE}/sku/visualize`);
-      setPlacements(res.data);
+      const layout = await fetchLayout();
+      setPlacements(layout);
 
       // Show optimization summary
-      const counts = res.data.counts || {};
+      const counts = layout.counts || {};
       const totalPlaced = Object.values(counts).reduce(
         (sum, count) => sum + count,
         0
@@ -183,17 +208,23 @@ export default function AppNew() {
             "[AI] Calling optimize with instructions:",
             optInstructions.trim()
           );
-          const aiRes = await axios.post(`${API_BASE}/sku/optimize`, {
-            instructions: optInstructions.trim(),
-          });
-          console.log("[AI] Optimize response:", aiRes.data);
-          setPlacements(aiRes.data);
-
-          const summary = aiRes.data?.assistant_summary ?? null;
-          const reassignments = Array.isArray(
-            aiRes.data?.assistant_reassignments
-          )
-            ? aiRes.data.assistant_reassignments
+          const aiData = await runOptimizeJob(
+            { instructions: optInstructions.trim() },
+            (progress) =>
+              setToast({
+                message: `⏳ AI optimization: ${progress.stage} (${Math.round(
+                  progress.progress * 100
+                )}%)`,
+                type: "info",
+                duration: 10000,
+              })
+          );
+          console.log("[AI] Optimize response:", aiData);
+          setPlacements(aiData);
+
+          const summary = aiData?.assistant_summary ?? null;
+          const reassignments = Array.isArray(aiData?.assistant_reassignments)
+            ? aiData.assistant_reassignments
             : [];
 
           console.log("[AI] Summary:", summary);
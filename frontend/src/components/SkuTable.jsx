@@ -5,24 +5,15 @@ const API_BASE =
   import.meta.env.VITE_API_BASE_URL ||
   "https://smart-warehouse-aagw.onrender.com/api";
 
-function normalizeInputs(raw) {
+// Raw metrics are sent as entered; the API normalizes them. Rows stored
+// without raw metrics are edited (and sent back) on the 0-1 scale.
+function rawInputs(raw) {
   const safe = (value) => {
     const num = Number(value);
     return Number.isFinite(num) ? num : 0;
   };
 
-  const rf = safe(raw.f);
-  const rw = safe(raw.w);
-  const rs = safe(raw.s);
-  const ri = safe(raw.i);
-
-  // Always normalize to 0-1 scale based on max values
-  const f = Math.min(1, rf / 200);
-  const w = Math.min(1, rw / 20);
-  const s = Math.min(1, rs / 50000);
-  const i = Math.min(1, ri / 20);
-
-  return { f, w, s, i };
+  return { f: safe(raw.f), w: safe(raw.w), s: safe(raw.s), i: safe(raw.i) };
 }
 
 function formatValue(value, digits = 4) {
@@ -42,6 +33,7 @@ export default function SkuTable({ items, onRefresh, onDelete }) {
     w: "",
     s: "",
     i: "",
+    normalized: false,
   });
   const [isSaving, setIsSaving] = useState(false);
   const [deletingId, setDeletingId] = useState(null);
@@ -59,26 +51,38 @@ export default function SkuTable({ items, onRefresh, onDelete }) {
   }
 
   function startEdit(item) {
+    const normalized = [item.raw_f, item.raw_w, item.raw_s, item.raw_i].some(
+      (value) => value == null
+    );
     setEditingId(item.id);
     setDraft({
       sku_code: item.sku_code,
       product_name: item.product_name || "",
-      f: item.f,
-      w: item.w,
-      s: item.s,
-      i: item.i,
+      f: normalized ? item.f : item.raw_f,
+      w: normalized ? item.w : item.raw_w,
+      s: normalized ? item.s : item.raw_s,
+      i: normalized ? item.i : item.raw_i,
+      normalized,
     });
   }
 
   function cancelEdit() {
     setEditingId(null);
-    setDraft({ sku_code: "", product_name: "", f: "", w: "", s: "", i: "" });
+    setDraft({
+      sku_code: "",
+      product_name: "",
+      f: "",
+      w: "",
+      s: "",
+      i: "",
+      normalized: false,
+    });
   }
 
   async function handleSave() {
     if (!editingId) return;
 
-    const payload = normalizeInputs(draft);
+    const payload = rawInputs(draft);
     const skuCode = (draft.sku_code || "").trim();
     if (!skuCode) {
       alert("SKU code is required");
@@ -94,6 +98,7 @@ export default function SkuTable({ items, onRefresh, onDelete }) {
         w: payload.w,
         s: payload.s,
         i: payload.i,
+        normalized: draft.normalized,
       });
       await onRefresh?.();
       cancelEdit();
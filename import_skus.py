@@ -0,0 +1,101 @@
+"""
+Import a SKU catalog (CSV or NDJSON) straight into the database.
+
+Replaces the old add_20_skus.py / backend/add_sample_data.py scripts. Raw
+metrics are normalized with the same rules as the API, the file is read
+incrementally, and every chunk is committed on its own. If an import stops
+part-way, re-run it with the printed --offset to resume.
+
+Examples:
+    python import_skus.py backend/sample_data/sample_skus.csv
+    python import_skus.py erp_export.ndjson --chunk-size 2000 --offset 150000
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.database import SessionLocal, init_db
+from backend.services.metric_scaling import load_active_scale
+from backend.services.scoring import load_active_profile
+from backend.services.sku_import import (
+    IMPORT_CHUNK_SIZE,
+    SUPPORTED_FORMATS,
+    detect_format,
+    import_stream,
+)
+
+DEFAULT_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "backend", "sample_data", "sample_skus.csv"
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a SKU catalog into the database.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_FILE, help="CSV or NDJSON file")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS, help="Detected from the extension by default")
+    parser.add_argument("--offset", type=int, default=0, help="Records to skip (resume point)")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    parser.add_argument("--on-conflict", choices=("update", "skip"), default="update")
+    parser.add_argument("--normalized", action="store_true", help="Metrics are already within 0..1")
+    parser.add_argument("--progress-every", type=int, default=10, help="Print progress every N chunks")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+    print("=" * 60)
+    print(f"Importing {args.path} ({fmt}) from offset {args.offset}")
+    print("=" * 60)
+
+    def report(stats):
+        if stats["chunks"] % max(1, args.progress_every):
+            return
+        print(
+            f"  offset {stats['next_offset']:>10}  created {stats['created']:>9}  "
+            f"updated {stats['updated']:>9}  invalid {stats['invalid']:>6}  "
+            f"{stats['rows_per_s']:>10.0f} rows/s"
+        )
+
+    init_db()
+    db = SessionLocal()
+    stats = None
+    try:
+        # Score and normalize with what the server uses, not the built-ins.
+        profile = load_active_profile(db)
+        scale = load_active_scale(db)
+        print(f"Scoring profile {profile.name} v{profile.version}, metric scale v{scale.id}")
+        with open(args.path, "rb") as handle:
+            stats = import_stream(
+                db,
+                handle,
+                fmt,
+                offset=args.offset,
+                chunk_size=args.chunk_size,
+                on_conflict=args.on_conflict,
+                normalized=args.normalized,
+                progress=report,
+            )
+    except KeyboardInterrupt:
+        print("\nInterrupted. Re-run with the last printed offset to resume.")
+        return 1
+    finally:
+        db.close()
+
+    for error in stats["errors"]:
+        print(f"  ⚠️  record {error['offset']}: {error['detail']}")
+    print()
+    print(
+        f"Summary: {stats['created']} created, {stats['updated']} updated, "
+        f"{stats['skipped']} skipped, {stats['invalid']} invalid, {stats['failed']} failed"
+    )
+    print(f"Elapsed {stats['elapsed_s']}s ({stats['rows_per_s']:.0f} rows/s), next offset {stats['next_offset']}")
+    if stats["failed"]:
+        print(f"❌ A chunk failed. Resume with: --offset {stats['next_offset']}")
+        return 1
+    print("✅ Import complete")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,7 +7,7 @@ import sys
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from backend.database import Base, engine
+from backend.database import Base, engine, init_db
 from backend import models
 
 def reset_database():
@@ -16,25 +16,25 @@ def reset_database():
     print("=" * 60)
     print()
     
-    # Find and delete database files
-    db_files = [
-        "backend_db.sqlite3",
-        "backend/backend_db.sqlite3",
-        "./backend_db.sqlite3"
-    ]
-    
+    # Delete the configured database (DATABASE_URL); PostgreSQL and other
+    # servers get their tables dropped instead.
     deleted_count = 0
-    for db_file in db_files:
-        if os.path.exists(db_file):
-            try:
-                os.remove(db_file)
-                print(f"✅ Deleted: {db_file}")
-                deleted_count += 1
-            except Exception as e:
-                print(f"❌ Failed to delete {db_file}: {e}")
-        else:
-            print(f"⏭️  Not found: {db_file}")
-    
+    url = engine.url
+    if engine.dialect.name == "sqlite" and url.database not in (None, "", ":memory:"):
+        for db_file in (url.database, f"{url.database}-wal", f"{url.database}-shm"):
+            if os.path.exists(db_file):
+                try:
+                    os.remove(db_file)
+                    print(f"✅ Deleted: {db_file}")
+                    deleted_count += 1
+                except Exception as e:
+                    print(f"❌ Failed to delete {db_file}: {e}")
+            else:
+                print(f"⏭️  Not found: {db_file}")
+    else:
+        Base.metadata.drop_all(bind=engine)
+        print(f"✅ Dropped all tables in {url.render_as_string(hide_password=True)}")
+
     print()
     print(f"Deleted {deleted_count} database file(s)")
     print()
@@ -42,7 +42,7 @@ def reset_database():
     # Recreate database with new schema
     print("Creating new database with updated schema...")
     try:
-        Base.metadata.create_all(bind=engine)
+        init_db(engine)
         print("✅ Database created successfully!")
         print()
         print("Schema includes:")